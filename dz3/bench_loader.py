@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+import time
+
+from config3 import LOADERS, CommentFilter, convert_stream, iter_top_level
+
+def generate_document(path: str, keys: int) -> None:
+    """Создаёт YAML-документ с keys ключами: числа, массивы, выражения и комментарии."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(keys):
+            kind = i % 4
+            if kind == 0:
+                f.write(f"value_{i}: {i}  ; константа {i}\n")
+            elif kind == 1:
+                f.write(f"array_{i}: [{i}, {i + 1}.5, {i + 2}]\n")
+            elif kind == 2:
+                f.write(f"result_{i}:\n  expr: [\"value_{i - 2}\", \"{i % 7 + 1}\", \"*\"]\n")
+            else:
+                f.write(f"float_{i}: {i}.25\n")
+
+def measure(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def parse(path: str, loader_class) -> None:
+    # Только разбор YAML: пары ключ-значение строятся и отбрасываются
+    with open(path, 'r', encoding='utf-8') as f:
+        for _ in iter_top_level(CommentFilter(f), loader_class):
+            pass
+
+def convert(path: str, output: str, loader_class) -> None:
+    with open(path, 'r', encoding='utf-8') as f:
+        convert_stream(f, output, loader_class=loader_class)
+
+def main():
+    parser = argparse.ArgumentParser(description="Время разбора YAML загрузчиками libyaml и Python.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Количество ключей в сгенерированных документах.")
+    parser.add_argument("--loaders", nargs="+", choices=sorted(LOADERS), default=sorted(LOADERS),
+                        help="Сравниваемые загрузчики.")
+    args = parser.parse_args()
+
+    print(f"{'keys':>10} {'loader':>8} {'parse, s':>10} {'convert, s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "input.yaml")
+        output = os.path.join(tmp, "output.txt")
+        for keys in args.sizes:
+            generate_document(source, keys)
+            for name in args.loaders:
+                loader_class = LOADERS[name]
+                parse_time = measure(lambda: parse(source, loader_class))
+                convert_time = measure(lambda: convert(source, output, loader_class))
+                print(f"{keys:>10} {name:>8} {parse_time:>10.3f} {convert_time:>11.3f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import yaml
 import sys
+import os
 import argparse
 import re
+import tempfile
+import hashlib
+import io
+import marshal
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 
 # Определение операций для вычислений
@@ -13,43 +20,75 @@ OPERATORS = {
     'pow': lambda x, y: x ** y
 }
 
+# Операции, которые компилятор выражений записывает синтаксисом Python;
+# должны совпадать с OPERATORS, остальные операции вызываются через OPERATORS
+INLINE_OPERATORS = {'+': '+', '-': '-', '*': '*', 'pow': '**'}
+
+# Размер LRU-кэша скомпилированных выражений
+EXPRESSION_CACHE_SIZE = 4096
+
+# Версия формата кэша инкрементальной сборки (marshal зависит и от версии Python)
+CACHE_VERSION = 1
+
 # Регулярное выражение для проверки корректности имён
 NAME_REGEX = r'^[_a-zA-Z][_a-zA-Z0-9]*$'
 
+# Загрузчики YAML: 'c' — libyaml (CSafeLoader), доступен, только если PyYAML собран с libyaml;
+# 'python' — загрузчик на чистом Python
+LOADERS = {"python": yaml.SafeLoader}
+if hasattr(yaml, "CSafeLoader"):
+    LOADERS["c"] = yaml.CSafeLoader
+
+def select_loader(name: str = "auto"):
+    """Возвращает класс загрузчика YAML: при 'auto' — CSafeLoader, если он доступен, иначе SafeLoader."""
+    if name == "auto":
+        return LOADERS.get("c", LOADERS["python"])
+    if name not in LOADERS:
+        raise ValueError(f"Загрузчик YAML '{name}' недоступен")
+    return LOADERS[name]
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Конвертер YAML в учебный конфигурационный язык.")
     parser.add_argument("input", help="Путь к входному файлу.")
     parser.add_argument("output", help="Путь к выходному файлу.")
-    return parser.parse_args()
+    parser.add_argument("--align", action="store_true",
+                        help="Выровнять комментарии по одной колонке (второй проход по временному файлу).")
+    parser.add_argument("--loader", choices=("auto", "c", "python"), default="auto",
+                        help="Загрузчик YAML: auto (libyaml, если доступен), c (libyaml) или python.")
+    parser.add_argument("--graph", action="store_true",
+                        help="Вычислять выражения в порядке зависимостей (можно ссылаться на ключи ниже по документу).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Количество процессов для независимых выражений в режиме --graph.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Вычислять заново только изменённые ключи и зависящие от них (кэш рядом с выходным файлом).")
+    parser.add_argument("--cache-file", help="Путь к кэшу инкрементальной сборки (по умолчанию output + '.cache').")
+    args = parser.parse_args()
+    if args.incremental and args.graph:
+        parser.error("--incremental нельзя использовать вместе с --graph")
+    return args
 
-def load_yaml(file_path: str) -> Tuple[Dict[str, Any], List[Tuple[int, str]]]:
+def load_yaml(file_path: str, loader: str = "auto") -> Tuple[Dict[str, Any], List[Tuple[int, str]]]:
+    """Загружает весь YAML-файл в словарь через потоковый разбор (CommentFilter и iter_top_level)."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            data = f.read()
-        data, comments = remove_comments(data)
-        data_dict = yaml.safe_load(data)
-        return data_dict, comments
+            stream = CommentFilter(f)
+            data_dict = dict(iter_top_level(stream, select_loader(loader)))
+        return data_dict, list(stream.comments.items())
     except yaml.YAMLError as e:
         sys.stderr.write("Ошибка синтаксиса YAML: " + str(e) + "\n")
         sys.exit(1)
+    except ValueError as e:
+        sys.stderr.write("Ошибка обработки данных: " + str(e) + "\n")
+        sys.exit(1)
     except IOError as e:
         sys.stderr.write("Ошибка чтения файла: " + str(e) + "\n")
         sys.exit(1)
 
 def remove_comments(data: str) -> Tuple[str, List[Tuple[int, str]]]:
     """Удаляет однострочные комментарии из данных и возвращает комментарии с их строками."""
-    lines = data.splitlines()
-    cleaned_lines = []
-    comments = []
-    
-    for line_number, line in enumerate(lines):
-        # Убираем часть строки, начиная с символа ';'
-        comment_split = line.split(';', 1)
-        cleaned_lines.append(comment_split[0].rstrip())
-        if len(comment_split) > 1:
-            comments.append((line_number, comment_split[1].strip()))  # Сохраняем номер строки и комментарий
-    
-    return '\n'.join(cleaned_lines), comments
+    stream = CommentFilter(io.StringIO(data))
+    cleaned = stream.read()
+    return cleaned.removesuffix("\n"), list(stream.comments.items())
 
 def validate_name(name: str):
     if not re.match(NAME_REGEX, name):
@@ -81,9 +120,102 @@ def evaluate_postfix(expression: List[Any], constants: Dict[str, Any]) -> Any:
         raise ValueError("Ошибка в выражении: неверный остаток на стеке")
     return stack.pop()
 
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_postfix(tokens: Tuple[Any, ...]):
+    """
+    Компилирует постфиксное выражение в функцию f(constants, tokens).
+
+    Стек разбирается один раз: каждая ячейка стека становится локальной переменной,
+    числа из строк преобразуются заранее, а количество операндов проверяется при компиляции.
+    Порядок вычисления и ошибок совпадает с evaluate_postfix: константы ищутся и операции
+    выполняются в порядке токенов, ошибка стека возникает после вычисления предшествующих токенов.
+    Функция кэшируется по кортежу токенов; числовые токены берутся из переданного кортежа,
+    поэтому равные, но разнотипные числа (1 и 1.0) дают верный результат.
+    """
+    lines = ["def _postfix(c, t):"]
+    depth = 0
+    for index, token in enumerate(tokens):
+        if isinstance(token, (int, float)):
+            lines.append(f"    s{depth} = t[{index}]")
+            depth += 1
+        elif isinstance(token, str) and token.isdigit():
+            try:
+                lines.append(f"    s{depth} = {int(token)!r}")
+            except ValueError:
+                # Ошибка преобразования возникает при исполнении, в порядке токенов
+                lines.append(f"    s{depth} = int(t[{index}])")
+            depth += 1
+        elif token in OPERATORS:
+            if depth < 2:
+                lines.append("    raise ValueError('Недостаточно операндов для операции')")
+                break
+            depth -= 1
+            if token in INLINE_OPERATORS:
+                lines.append(f"    s{depth - 1} = s{depth - 1} {INLINE_OPERATORS[token]} s{depth}")
+            else:
+                lines.append(f"    s{depth - 1} = o[t[{index}]](s{depth - 1}, s{depth})")
+        else:
+            lines.append("    try:")
+            lines.append(f"        s{depth} = c[t[{index}]]")
+            lines.append("    except KeyError:")
+            lines.append(f"        raise ValueError(f\"Неизвестная операция или константа '{{t[{index}]}}'\") from None")
+            depth += 1
+    else:
+        if depth != 1:
+            lines.append("    raise ValueError('Ошибка в выражении: неверный остаток на стеке')")
+        else:
+            lines.append("    return s0")
+
+    namespace = {'o': OPERATORS}
+    exec("\n".join(lines), namespace)
+    return namespace['_postfix']
+
+def evaluate_compiled(expression: List[Any], constants: Dict[str, Any]) -> Any:
+    """
+    Вычисляет постфиксное выражение скомпилированной функцией из кэша compile_postfix.
+
+    Результат и ошибки совпадают с evaluate_postfix. Если токен нельзя использовать
+    как ключ кэша (список, словарь) или среди констант есть имя операции (константа
+    заменяет операцию), выражение вычисляется evaluate_postfix.
+    """
+    try:
+        tokens = tuple(expression)
+        function = compile_postfix(tokens)
+    except TypeError:
+        return evaluate_postfix(expression, constants)
+    if not constants.keys().isdisjoint(OPERATORS):
+        return evaluate_postfix(expression, constants)
+    return function(constants, tokens)
+
 def format_postfix_expression(expression: List[str]) -> str:
     return "{. " + " ".join(expression) + " .}"
 
+def validate_key(key: Any):
+    if not isinstance(key, str):
+        raise ValueError(f"Некорректное имя '{key}'")
+    validate_name(key)
+
+def convert_item(key: Any, value: Any, constants: Dict[str, Any]) -> str:
+    """Преобразует одну пару ключ-значение верхнего уровня в строку выходного языка."""
+    validate_key(key)
+
+    if isinstance(value, (int, float)):  # Простое значение
+        constants[key] = value
+        return f"{value} -> {key}"
+    if isinstance(value, list):  # Массив
+        if all(isinstance(v, (int, float)) for v in value):
+            return f"{format_array(value)} -> {key}"
+        raise ValueError(f"Массив '{key}' содержит недопустимые элементы")
+    if isinstance(value, dict) and "expr" in value:  # Постфиксное выражение
+        expression = value["expr"]
+        try:
+            result = evaluate_compiled(expression, constants)
+        except ValueError as e:
+            raise ValueError(f"Ошибка в выражении для '{key}': {e}")
+        constants[key] = result
+        return f"{result} -> {format_postfix_expression(expression)}"
+    raise ValueError(f"Некорректный формат для '{key}'")
+
 def process_data(data: Dict[str, Any], constants: Dict[str, Any], comments: List[Tuple[int, str]]) -> List[str]:
     output_lines = []
     
@@ -91,30 +223,7 @@ def process_data(data: Dict[str, Any], constants: Dict[str, Any], comments: List
     comment_dict = {line_number: comment for line_number, comment in comments}
     
     for key, value in data.items():
-        validate_name(key)
-        output_line = ""
-        
-        if isinstance(value, (int, float)):  # Простое значение
-            output_line = f"{value} -> {key}"
-            constants[key] = value
-        elif isinstance(value, list):  # Массив
-            if all(isinstance(v, (int, float)) for v in value):
-                output_line = f"{format_array(value)} -> {key}"
-            else:
-                raise ValueError(f"Массив '{key}' содержит недопустимые элементы")
-        elif isinstance(value, dict) and "expr" in value:  # Постфиксное выражение
-            expression = value["expr"]
-            try:
-                result = evaluate_postfix(expression, constants)
-                postfix_expression = format_postfix_expression(expression)
-                output_line = f"{result} -> {postfix_expression}"
-                constants[key] = result
-            except ValueError as e:
-                raise ValueError(f"Ошибка в выражении для '{key}': {e}")
-        else:
-            raise ValueError(f"Некорректный формат для '{key}'")
-        
-        output_lines.append(output_line)
+        output_lines.append(convert_item(key, value, constants))
 
         # Добавляем комментарий, если есть соответствующий
         current_index = len(output_lines) - 1  # Индекс текущей строки вывода
@@ -123,29 +232,481 @@ def process_data(data: Dict[str, Any], constants: Dict[str, Any], comments: List
 
     return output_lines
 
+def expression_names(expression: List[Any], names) -> List[str]:
+    """Имена из names, на которые ссылается постфиксное выражение, в порядке первого упоминания."""
+    found = []
+    for token in expression:
+        if isinstance(token, str) and token in names and token not in found:
+            found.append(token)
+    return found
+
+def dependency_layers(dependencies: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Разбивает ключи на слои топологического порядка: ключи слоя зависят только от предыдущих слоёв.
+    Внутри слоя сохраняется порядок dependencies.
+
+    Исключения:
+        ValueError: При циклической зависимости; в сообщении — ключи, входящие в циклы.
+    """
+    order = {key: index for index, key in enumerate(dependencies)}
+    remaining = {key: len(names) for key, names in dependencies.items()}
+    dependents = {key: [] for key in dependencies}
+    for key, names in dependencies.items():
+        for name in names:
+            dependents[name].append(key)
+
+    layers = []
+    layer = [key for key, count in remaining.items() if count == 0]
+    while layer:
+        layers.append(layer)
+        next_layer = []
+        for key in layer:
+            del remaining[key]
+            for dependent in dependents[key]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    next_layer.append(dependent)
+        layer = sorted(next_layer, key=order.__getitem__)
+
+    if remaining:
+        # Оставшиеся ключи — циклы и ключи, зависящие от них; последние отбрасываются,
+        # пока у каждого оставшегося ключа есть зависимый среди оставшихся
+        cycle = set(remaining)
+        changed = True
+        while changed:
+            changed = False
+            for key in list(cycle):
+                if not any(dependent in cycle for dependent in dependents[key]):
+                    cycle.discard(key)
+                    changed = True
+        keys = ", ".join(sorted(cycle, key=order.__getitem__))
+        raise ValueError(f"Циклическая зависимость между ключами: {keys}")
+    return layers
+
+def evaluate_batch(tasks: List[Tuple[List[Any], Dict[str, Any]]]) -> List[Tuple[bool, Any]]:
+    """Вычисляет пачку выражений (в рабочем процессе); возвращает пары (успех, результат или исключение)."""
+    results = []
+    for expression, constants in tasks:
+        try:
+            results.append((True, evaluate_compiled(expression, constants)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+def process_data_graph(data: Dict[str, Any], constants: Dict[str, Any], comments: List[Tuple[int, str]],
+                       workers: int = 1) -> List[str]:
+    """
+    Вариант process_data с вычислением выражений в порядке зависимостей.
+
+    Выражение может ссылаться на константу, объявленную в документе позже. Выражения
+    упорядочиваются топологически по именам, на которые они ссылаются; независимые выражения
+    одного слоя при workers > 1 вычисляются параллельно в пуле процессов. Строки выводятся
+    в порядке документа, поэтому результат не зависит от количества процессов.
+
+    Сначала в порядке документа проверяются имена и форматы значений, затем зависимости.
+    Если в слое несколько ошибочных выражений, сообщается о первом из них по документу.
+    """
+    comment_dict = {line_number: comment for line_number, comment in comments}
+    output_lines = {}
+    expressions = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and "expr" in value:
+            validate_key(key)
+            expressions[key] = value["expr"]
+        else:
+            output_lines[key] = convert_item(key, value, constants)
+
+    dependencies = {key: expression_names(expression, expressions) for key, expression in expressions.items()}
+    layers = dependency_layers(dependencies)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(expressions) > 1 else None
+    try:
+        for layer in layers:
+            # Каждому выражению передаются только константы, на которые оно ссылается
+            tasks = []
+            for key in layer:
+                expression = expressions[key]
+                tasks.append((expression, {name: constants[name] for name in expression_names(expression, constants)}))
+            if executor is not None and len(layer) > 1:
+                size = -(-len(tasks) // workers)
+                batches = executor.map(evaluate_batch, [tasks[i:i + size] for i in range(0, len(tasks), size)])
+                results = [result for batch in batches for result in batch]
+            else:
+                results = evaluate_batch(tasks)
+
+            for key, (success, result) in zip(layer, results):
+                if not success:
+                    if isinstance(result, ValueError):
+                        raise ValueError(f"Ошибка в выражении для '{key}': {result}")
+                    raise result
+                constants[key] = result
+                output_lines[key] = f"{result} -> {format_postfix_expression(expressions[key])}"
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result_lines = []
+    for index, key in enumerate(data):
+        line = output_lines[key]
+        if index in comment_dict:
+            line += f"   ; {comment_dict[index]}"
+        result_lines.append(line)
+    return result_lines
+
+class CommentFilter:
+    """
+    Входной поток для парсера YAML: по мере чтения удаляет однострочные комментарии
+    (часть строки, начиная с символа ';') и запоминает их по номерам строк.
+    """
+
+    def __init__(self, source):
+        self.name = getattr(source, "name", "<file>")
+        self.lines = enumerate(source)
+        self.comments: Dict[int, str] = {}
+
+    def read(self, size: int = -1) -> str:
+        chunks = []
+        length = 0
+        for line_number, line in self.lines:
+            comment_split = line.rstrip("\n").split(";", 1)
+            chunk = comment_split[0].rstrip() + "\n"
+            if len(comment_split) > 1:
+                self.comments[line_number] = comment_split[1].strip()
+            chunks.append(chunk)
+            length += len(chunk)
+            if 0 <= size <= length:
+                break
+        return "".join(chunks)
+
+    def take(self, line_number: int):
+        """Возвращает комментарий строки line_number и забывает комментарии строк до неё."""
+        comments = self.comments
+        while comments:
+            first = next(iter(comments))
+            if first > line_number:
+                return None
+            comment = comments.pop(first)
+            if first == line_number:
+                return comment
+        return None
+
+def compose_node(loader, anchors: Dict[str, Any]):
+    """Строит узел YAML из событий парсера (аналог Composer.compose_node для любого загрузчика)."""
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(None, None, f"found undefined alias {event.anchor!r}",
+                                              event.start_mark)
+        return anchors[event.anchor]
+
+    tag = event.tag
+    if isinstance(event, yaml.ScalarEvent):
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    else:
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+
+    # Якорь регистрируется до дочерних узлов, чтобы работали рекурсивные ссылки
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    if isinstance(node, yaml.SequenceNode):
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(compose_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(node, yaml.MappingNode):
+        while not loader.check_event(yaml.MappingEndEvent):
+            node.value.append((compose_node(loader, anchors), compose_node(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    return node
+
+def merge_pairs(loader, node):
+    """Пары (ключ, значение) ключа слияния '<<' в порядке применения, как в SafeConstructor.flatten_mapping."""
+    if isinstance(node, yaml.MappingNode):
+        mappings = [node]
+    elif isinstance(node, yaml.SequenceNode) and all(isinstance(item, yaml.MappingNode) for item in node.value):
+        # Из нескольких словарей важнее первый, поэтому он применяется последним
+        mappings = list(reversed(node.value))
+    else:
+        raise yaml.constructor.ConstructorError("while constructing a mapping", None,
+                                                "expected a mapping or list of mappings for merging",
+                                                node.start_mark)
+    for mapping in mappings:
+        yield from loader.construct_document(mapping).items()
+
+def iter_top_level(stream, loader_class=None):
+    """
+    Генератор пар (ключ, значение) корневого словаря YAML-документа.
+
+    Документ разбирается потоково через события парсера: в памяти находится только
+    значение текущего ключа (и узлы с якорями, на которые могут ссылаться следующие ключи).
+    Повторяющиеся ключи отклоняются: значение первого уже преобразовано и записано.
+    Ключи слияния '<<' обрабатываются как в yaml.safe_load (явный ключ важнее ключа из слияния),
+    но ключи, пришедшие только из слияния, выдаются после всех явных ключей словаря.
+    """
+    loader = (loader_class or select_loader())(stream)
+    try:
+        loader.get_event()  # StreamStartEvent
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStartEvent
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise ValueError("Корневой элемент YAML должен быть словарём")
+        loader.get_event()
+
+        anchors = {}
+        seen = set()
+        # Значения из ключей слияния, ещё не переопределённые явными ключами
+        merged: Dict[Any, Any] = {}
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_node = compose_node(loader, anchors)
+            if key_node.tag == "tag:yaml.org,2002:merge":
+                for key, value in merge_pairs(loader, compose_node(loader, anchors)):
+                    if key not in seen:
+                        merged[key] = value
+                continue
+            key = loader.construct_document(key_node)
+            value = loader.construct_document(compose_node(loader, anchors))
+            if key in seen:
+                raise ValueError(f"Повторяющийся ключ '{key}'")
+            seen.add(key)
+            merged.pop(key, None)
+            yield key, value
+        yield from merged.items()
+        loader.get_event()  # MappingEndEvent
+        loader.get_event()  # DocumentEndEvent
+
+        if not loader.check_event(yaml.StreamEndEvent):
+            event = loader.get_event()
+            raise yaml.composer.ComposerError("expected a single document in the stream", None,
+                                              "but found another document", event.start_mark)
+    finally:
+        loader.dispose()
+
+def write_aligned(lines, output) -> None:
+    """Второй проход: выравнивает комментарии строк из временного файла по самой длинной строке."""
+    width = 0
+    lines.seek(0)
+    for line in lines:
+        width = max(width, len(line.rstrip("\n").split("   ; ", 1)[0]))
+    lines.seek(0)
+    for line in lines:
+        code_comment = line.rstrip("\n").split("   ; ", 1)
+        if len(code_comment) > 1:
+            line = f"{code_comment[0]:<{width}}   ; {code_comment[1]}"
+        # Как и без выравнивания, пробелы в конце строки (пустой комментарий) убираются
+        output.write(line.rstrip() + "\n")
+
+def stream_lines(stream: CommentFilter, constants: Dict[str, Any], loader_class=None):
+    """Генератор строк выходного языка: каждый ключ преобразуется сразу после разбора."""
+    for index, (key, value) in enumerate(iter_top_level(stream, loader_class)):
+        line = convert_item(key, value, constants)
+        comment = stream.take(index)
+        yield line if comment is None else f"{line}   ; {comment}"
+
+def convert_stream(source, output_path: str, align: bool = False, loader_class=None, graph: bool = False,
+                   workers: int = 1) -> int:
+    """
+    Потоково преобразует YAML из source в файл output_path, ключ за ключом.
+
+    Каждая строка записывается сразу после преобразования своего ключа. Результат пишется
+    во временный файл и заменяет output_path только при успешном преобразовании.
+    При align=True строки сначала пишутся во временный файл, а затем переписываются
+    с комментариями, выровненными по одной колонке. Без loader_class используется
+    select_loader(). При graph=True документ разбирается целиком и вычисляется
+    process_data_graph в workers процессах.
+
+    Возвращает количество записанных строк.
+    """
+    stream = CommentFilter(source)
+    constants = {}
+    if graph:
+        data = dict(iter_top_level(stream, loader_class))
+        output_lines = process_data_graph(data, constants, list(stream.comments.items()), workers)
+    else:
+        output_lines = stream_lines(stream, constants, loader_class)
+
+    return write_lines(output_lines, output_path, align)
+
+def write_lines(output_lines, output_path: str, align: bool = False) -> int:
+    """Записывает строки во временный файл и заменяет им output_path; возвращает количество строк."""
+    tmp_path = output_path + ".tmp"
+    count = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as output:
+            lines = tempfile.TemporaryFile("w+", encoding="utf-8") if align else output
+            try:
+                for line in output_lines:
+                    # Пробелы в конце строки (например, после пустого комментария) убираются;
+                    # при выравнивании это делает второй проход
+                    lines.write((line if align else line.rstrip()) + "\n")
+                    count += 1
+                if align:
+                    write_aligned(lines, output)
+            finally:
+                if align:
+                    lines.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+def file_stamp(path: str):
+    """Размер и время изменения файла или None, если файла нет."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_cache(cache_file: str, keys: bool = True) -> Dict[str, Any]:
+    """
+    Загружает кэш инкрементальной сборки; при отсутствии или несовместимости возвращает пустой кэш.
+
+    Файл кэша — два объекта marshal: заголовок (версия, хэш исходного файла, параметры,
+    отметка выходного файла) и записи ключей. При keys=False читается только заголовок.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            cache = marshal.load(f)
+            if not isinstance(cache, dict) or cache.get("version") != (CACHE_VERSION, sys.version_info[:2]):
+                return {"keys": {}}
+            cache["keys"] = marshal.load(f) if keys else None
+    except (OSError, EOFError, ValueError, TypeError):
+        return {"keys": {}}
+    return cache
+
+def save_cache(cache_file: str, header: Dict[str, Any], entries: Dict[str, Any]) -> None:
+    tmp_path = cache_file + ".tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump(dict(header, version=(CACHE_VERSION, sys.version_info[:2])), f)
+        marshal.dump(entries, f)
+    os.replace(tmp_path, cache_file)
+
+def visible_value(constants: Dict[str, Any], name: str) -> Tuple[str, Any, Any]:
+    """Значение имени для выражения: (имя, тип, значение) или (имя, None, None), если константы нет."""
+    if name in constants:
+        value = constants[name]
+        return name, type(value).__name__, value
+    return name, None, None
+
+def convert_cached(key: Any, value: Any, constants: Dict[str, Any], entries: Dict[str, Any],
+                   new_entries: Dict[str, Any]) -> Tuple[str, bool]:
+    """
+    Как convert_item, но с кэшем: запись ключа берётся из entries, если не изменилось
+    значение ключа и значения всех имён, которые читает его выражение.
+
+    Запись кэша: (хэш значения, строка вывода, объявляет ли ключ константу, значение
+    константы, прочитанные имена со значениями). Изменение константы делает устаревшими
+    записи всех выражений, читающих её, а через их значения — и транзитивно зависимых.
+
+    Возвращает строку вывода и признак того, что ключ был вычислен заново.
+    """
+    digest = hashlib.sha1(repr(value).encode()).hexdigest()
+    entry = entries.get(key)
+    if entry is not None and entry[0] == digest and \
+            all(visible_value(constants, name) == (name, type_name, read) for name, type_name, read in entry[4]):
+        if entry[2]:
+            constants[key] = entry[3]
+        new_entries[key] = entry
+        return entry[1], False
+
+    reads = ()
+    is_expression = isinstance(value, dict) and "expr" in value
+    if is_expression:
+        # Значения всех имён выражения, которые могут быть константами (и имён операций), до вычисления;
+        # для выражения, по которому нельзя пройти, ошибку выдаст convert_item
+        try:
+            names = dict.fromkeys(token for token in value["expr"] if isinstance(token, str) and not token.isdigit())
+        except TypeError:
+            names = {}
+        reads = tuple(visible_value(constants, name) for name in names)
+    line = convert_item(key, value, constants)
+    defines = is_expression or isinstance(value, (int, float))
+    new_entries[key] = (digest, line, defines, constants[key] if defines else None, reads)
+    return line, True
+
+def convert_incremental(source, output_path: str, cache_file: str, align: bool = False,
+                        loader_class=None) -> Dict[str, Any]:
+    """
+    Преобразует YAML как convert_stream, повторно используя результаты прошлой сборки.
+
+    Кэш (cache_file) хранит для каждого ключа хэш значения, вычисленное значение,
+    строку вывода и имена, прочитанные выражением. Заново вычисляются только изменённые
+    ключи и ключи, которые (транзитивно) читают изменившиеся константы. Если исходный
+    файл и выходной файл не изменились с прошлой сборки, файл не перезаписывается.
+
+    Возвращает словарь: keys — количество ключей (None, если сборка пропущена),
+    reevaluated — количество заново вычисленных ключей, unchanged — сборка пропущена.
+    """
+    digest = hashlib.sha1()
+    for chunk in iter(lambda: source.read(1 << 20), ""):
+        digest.update(chunk.encode("utf-8", "surrogatepass"))
+    source.seek(0)
+    header = load_cache(cache_file, keys=False)
+    if header.get("source") == digest.hexdigest() and header.get("align") == align and \
+            header.get("output") is not None and header.get("output") == file_stamp(output_path):
+        return {"keys": None, "reevaluated": 0, "unchanged": True}
+    cache = load_cache(cache_file)
+
+    stream = CommentFilter(source)
+    constants = {}
+    entries = cache["keys"]
+    new_entries = {}
+    reevaluated = 0
+
+    def output_lines():
+        nonlocal reevaluated
+        for index, (key, value) in enumerate(iter_top_level(stream, loader_class)):
+            line, changed = convert_cached(key, value, constants, entries, new_entries)
+            reevaluated += changed
+            comment = stream.take(index)
+            yield line if comment is None else f"{line}   ; {comment}"
+
+    count = write_lines(output_lines(), output_path, align)
+    save_cache(cache_file, {"source": digest.hexdigest(), "align": align, "output": file_stamp(output_path)},
+               new_entries)
+    return {"keys": count, "reevaluated": reevaluated, "unchanged": False}
+
 def main():
     args = parse_arguments()
-    data, comments = load_yaml(args.input)
-    constants = {}
-    
     try:
-        output_lines = process_data(data, constants, comments)
+        loader_class = select_loader(args.loader)
     except ValueError as e:
-        sys.stderr.write("Ошибка обработки данных: " + str(e) + "\n")
+        sys.stderr.write(str(e) + "\n")
         sys.exit(1)
 
     try:
-        # Определяем максимальную длину строки вывода
-        max_length = max(len(line) for line in output_lines)
-        
-        with open(args.output, 'w', encoding='utf-8') as f:
-            for line in output_lines:
-                # Форматируем вывод с учетом максимальной длины
-                formatted_line = f"{line:<{max_length}}".rstrip()  # Убираем лишние пробелы справа
-                f.write(f"{formatted_line}\n")
+        source = open(args.input, 'r', encoding='utf-8')
     except IOError as e:
-        sys.stderr.write("Ошибка записи в файл: " + str(e) + "\n")
+        sys.stderr.write("Ошибка чтения файла: " + str(e) + "\n")
         sys.exit(1)
 
+    with source:
+        try:
+            if args.incremental:
+                convert_incremental(source, args.output, args.cache_file or args.output + ".cache", align=args.align,
+                                    loader_class=loader_class)
+            else:
+                convert_stream(source, args.output, align=args.align, loader_class=loader_class, graph=args.graph,
+                               workers=args.workers)
+        except yaml.YAMLError as e:
+            sys.stderr.write("Ошибка синтаксиса YAML: " + str(e) + "\n")
+            sys.exit(1)
+        except ValueError as e:
+            sys.stderr.write("Ошибка обработки данных: " + str(e) + "\n")
+            sys.exit(1)
+        except IOError as e:
+            sys.stderr.write("Ошибка записи в файл: " + str(e) + "\n")
+            sys.exit(1)
+
 if __name__ == "__main__":
     main()
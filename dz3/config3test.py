@@ -1,6 +1,11 @@
+import io
+import os
+import random
+import tempfile
 import unittest
 import yaml
-from config3 import evaluate_postfix, format_array, process_data  # Импортируем process_data
+from config3 import (LOADERS, CommentFilter, compile_postfix, convert_incremental, convert_stream, evaluate_compiled, evaluate_postfix, format_array,
+                     iter_top_level, load_yaml, process_data, remove_comments, select_loader)  # Тестируемые функции конвертера
 
 # Добавляем функцию для загрузки YAML-данных из строки
 def load_yaml_from_string(yaml_data: str):
@@ -84,5 +89,229 @@ class TestProgram(unittest.TestCase):
         output_lines = process_data(data, {}, comments)
         self.assertEqual(output_lines, expected_output)
 
+    def convert(self, yaml_data: str, align: bool = False, loader_class=None, **options) -> str:
+        # Потоковое преобразование во временный файл
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "output.txt")
+            convert_stream(io.StringIO(yaml_data), output, align=align, loader_class=loader_class, **options)
+            with open(output, encoding="utf-8") as f:
+                return f.read()
+
+    def test_stream_matches_process_data(self):
+        yaml_data = """constant1: 5  ; Константа
+constant2: 3
+array1: [1, 2, 3]  ; Массив
+result_add:
+  expr: ["constant1", "constant2", "+"]  ; Сложение
+result_pow:
+  expr: ["result_add", "2", "pow"]
+"""
+        data, comments = load_yaml_from_string(yaml_data)
+        expected_output = process_data(data, {}, comments)
+        self.assertEqual(self.convert(yaml_data), "\n".join(expected_output) + "\n")
+
+    def test_stream_aliases(self):
+        output = self.convert("a: &values [1, 2]\nb: *values\n")
+        self.assertEqual(output, "array(1, 2) -> a\narray(1, 2) -> b\n")
+
+    def test_stream_merge_keys(self):
+        # Значения и порядок ключей слияния как у yaml.safe_load; ключи только из слияния выдаются после явных
+        yaml_data = "a: &a {x: 1, y: 2}\nb: &b {y: 3, z: 4}\n<<: [*a, *b]\ny: 5\n"
+        for name, loader in LOADERS.items():
+            with self.subTest(loader=name):
+                pairs = list(iter_top_level(CommentFilter(io.StringIO(yaml_data)), loader))
+                self.assertEqual([key for key, _ in pairs], ["a", "b", "y", "z", "x"])
+                self.assertEqual(dict(pairs), yaml.safe_load(yaml_data))
+        with self.assertRaises(yaml.YAMLError):
+            self.convert("<<: 5\n")
+
+    def test_stream_align(self):
+        output = self.convert("a: 1  ; first\nlong_name: 2\nb: 3  ; third\n", align=True)
+        self.assertEqual(output, "1 -> a           ; first\n2 -> long_name\n3 -> b           ; third\n")
+
+    def test_empty_comment(self):
+        # Пустой комментарий не оставляет пробелов в конце строки, как и в исходной версии
+        yaml_data = "key: 1 ;\nother: 2  ; text\n"
+        self.assertEqual(self.convert(yaml_data), "1 -> key   ;\n2 -> other   ; text\n")
+        self.assertEqual(self.convert(yaml_data, align=True), "1 -> key     ;\n2 -> other   ; text\n")
+
+    def test_stream_duplicate_key(self):
+        with self.assertRaises(ValueError):
+            self.convert("a: 1\na: 2\n")
+
+    def test_load_yaml_wrappers(self):
+        yaml_data = "a: 1  ; first\r\nb: [1, 2]\r\n\r\nc: 3 ;\r\n"
+        self.assertEqual(remove_comments(yaml_data), ("a: 1\nb: [1, 2]\n\nc: 3", [(0, "first"), (3, "")]))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "input.yaml")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(yaml_data)
+            for name in LOADERS:
+                with self.subTest(loader=name):
+                    self.assertEqual(load_yaml(path, name), load_yaml_from_string(yaml_data))
+
+    def test_stream_error_keeps_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "output.txt")
+            with self.assertRaises(ValueError):
+                convert_stream(io.StringIO("a: 1\nb: [x]\n"), output)
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_select_loader(self):
+        self.assertIs(select_loader("python"), yaml.SafeLoader)
+        self.assertIs(select_loader(), LOADERS.get("c", yaml.SafeLoader))
+        with self.assertRaises(ValueError):
+            select_loader("rust")
+
+    def test_loaders_same_output(self):
+        yaml_data = """a: &x 5  ; first
+b: [1, 2.5, 0x10]
+c:
+  expr: ["a", "2", "pow"]
+d: *x
+"""
+        outputs = {name: self.convert(yaml_data, loader_class=loader) for name, loader in LOADERS.items()}
+        self.assertEqual(outputs["python"], "5 -> a   ; first\narray(1, 2.5, 16) -> b\n25 -> {. a 2 pow .}\n5 -> d\n")
+        self.assertEqual(len(set(outputs.values())), 1)
+
+    def test_compiled_matches_evaluate_postfix(self):
+        # Результаты и ошибки (включая порядок ошибок) совпадают с evaluate_postfix
+        def outcome(function, expression, constants):
+            try:
+                result = function(expression, constants)
+                return result, type(result)
+            except Exception as e:
+                return type(e), str(e)
+
+        rng = random.Random(5)
+        tokens = [1, 2, 0, 1.5, True, "4", "0", "a", "b", "missing", "+", "-", "*", "pow", None]
+        for _ in range(3000):
+            expression = [rng.choice(tokens) for _ in range(rng.randrange(7))]
+            constants = {"a": rng.choice([2, 2.5, -1]), "b": 3}
+            if rng.random() < 0.1:
+                constants["pow"] = 7  # Константа с именем операции заменяет операцию
+            with self.subTest(expression=expression, constants=constants):
+                self.assertEqual(outcome(evaluate_compiled, expression, constants),
+                                 outcome(evaluate_postfix, expression, constants))
+
+    def test_compiled_cache(self):
+        compile_postfix.cache_clear()
+        for _ in range(3):
+            self.assertEqual(evaluate_compiled(["a", "2", "pow"], {"a": 3}), 9)
+        self.assertEqual(compile_postfix.cache_info().hits, 2)
+        # Равные, но разнотипные числа используют одну функцию и дают свой результат
+        self.assertEqual(repr(evaluate_compiled([1, 2, "+"], {})), "3")
+        self.assertEqual(repr(evaluate_compiled([1.0, 2, "+"], {})), "3.0")
+        # Непригодный для кэша токен вычисляется без компиляции
+        with self.assertRaises(TypeError):
+            evaluate_compiled([[1], 2, "+"], {})
+
+    def test_graph_forward_reference(self):
+        yaml_data = """total:
+  expr: ["a", "b", "+"]  ; сумма
+a: 2
+b:
+  expr: ["a", "3", "pow"]
+c: [1, 2]
+"""
+        expected_output = "10 -> {. a b + .}\n2 -> a   ; сумма\n8 -> {. a 3 pow .}\narray(1, 2) -> c\n"
+        for workers in (1, 2):
+            self.assertEqual(self.convert(yaml_data, graph=True, workers=workers), expected_output)
+        # В порядке документа ссылка на ключ ниже по тексту — ошибка
+        with self.assertRaises(ValueError):
+            self.convert(yaml_data)
+
+    def test_graph_matches_document_order(self):
+        yaml_data = "".join(f"k{i}:\n  expr: [\"k{i - 1}\", \"{i}\", \"+\"]\n" for i in range(1, 50))
+        yaml_data = "k0: 1\n" + yaml_data + "".join(f"x{i}:\n  expr: [\"k49\", \"{i}\", \"*\"]\n" for i in range(50))
+        expected_output = self.convert(yaml_data)
+        for workers in (1, 3):
+            self.assertEqual(self.convert(yaml_data, graph=True, workers=workers), expected_output)
+
+    def test_graph_cycle(self):
+        yaml_data = """a:
+  expr: ["b", "1", "+"]
+b:
+  expr: ["a", "1", "+"]
+c:
+  expr: ["a", "1", "+"]
+d:
+  expr: ["d", "1", "+"]
+"""
+        with self.assertRaises(ValueError) as cm:
+            self.convert(yaml_data, graph=True)
+        self.assertEqual(str(cm.exception), "Циклическая зависимость между ключами: a, b, d")
+
+    def test_graph_first_error_in_document_order(self):
+        yaml_data = "a:\n  expr: [\"1\", \"+\"]\nb:\n  expr: [\"missing\"]\n"
+        for workers in (1, 2):
+            with self.assertRaises(ValueError) as cm:
+                self.convert(yaml_data, graph=True, workers=workers)
+            self.assertEqual(str(cm.exception), "Ошибка в выражении для 'a': Недостаточно операндов для операции")
+
+    def test_incremental(self):
+        def document(values):
+            return "".join(f"{key}: {value}\n" if not isinstance(value, list)
+                           else f"{key}:\n  expr: {value}  ; {key}\n" for key, value in values.items())
+
+        values = {"a": 1, "b": 2, "c": ["a", "b", "+"], "d": ["c", "2", "*"], "e": ["b", "3", "pow"], "f": "[1, 2]"}
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "output.txt")
+            cache_file = os.path.join(tmp, "output.cache")
+
+            def build(values):
+                yaml_data = document(values)
+                stats = convert_incremental(io.StringIO(yaml_data), output, cache_file)
+                with open(output, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), self.convert(yaml_data))
+                return stats
+
+            self.assertEqual(build(values)["reevaluated"], 6)
+            self.assertTrue(build(values)["unchanged"])
+
+            # Изменилась константа a: заново вычисляются a, c и зависящий от c ключ d
+            values["a"] = 5
+            self.assertEqual(build(values)["reevaluated"], 3)
+
+            # Значение c не изменилось (a + b = 7 и при a=6, b=1): d берётся из кэша
+            values["a"], values["b"] = 6, 1
+            self.assertEqual(build(values)["reevaluated"], 4)
+
+            # Изменение порядка: ключ c выше своей константы — ошибка, как и без кэша
+            reordered = {"c": values["c"], **{key: value for key, value in values.items() if key != "c"}}
+            with self.assertRaises(ValueError):
+                convert_incremental(io.StringIO(document(reordered)), output, cache_file)
+
+            # Изменённый выходной файл пересобирается
+            with open(output, "a", encoding="utf-8") as f:
+                f.write("garbage\n")
+            self.assertEqual(build(values)["reevaluated"], 0)
+
+    def test_incremental_random_edits(self):
+        rng = random.Random(9)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "output.txt")
+            cache_file = os.path.join(tmp, "output.cache")
+            keys = [f"k{i}" for i in range(30)]
+            values = {}
+            for _ in range(40):
+                key = rng.choice(keys)
+                if rng.random() < 0.5:
+                    values[key] = str(rng.choice([1, 2, 3, 1.5]))
+                else:
+                    names = [name for name in values if name != key] or ["1"]
+                    values[key] = f"{{expr: [\"{rng.choice(names)}\", \"{rng.randrange(1, 4)}\", \"{rng.choice('+-*')}\"]}}"
+                if rng.random() < 0.2:
+                    values.pop(rng.choice(list(values)))
+                yaml_data = "".join(f"{key}: {value}\n" for key, value in values.items())
+                try:
+                    expected = self.convert(yaml_data)
+                except ValueError:
+                    continue
+                with self.subTest(yaml_data=yaml_data):
+                    convert_incremental(io.StringIO(yaml_data), output, cache_file)
+                    with open(output, encoding="utf-8") as f:
+                        self.assertEqual(f.read(), expected)
+
 if __name__ == "__main__":
     unittest.main()
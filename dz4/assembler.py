@@ -1,6 +1,19 @@
 import argparse  # Модуль для парсинга аргументов командной строки
+import io  # Модуль для построчного чтения фрагментов исходного файла
 import json  # Модуль для работы с JSON-форматом
+import os  # Модуль для работы с временными выходными файлами
 import sys  # Модуль для взаимодействия с интерпретатором Python
+from collections import deque  # Очередь фрагментов, находящихся в работе
+from concurrent.futures import ProcessPoolExecutor  # Пул процессов для параллельного ассемблирования
+
+from isa import BY_NAME, BY_OPCODE, encode  # Общая спецификация системы команд УВМ
+from optimizer import Instruction, optimize  # Оптимизация программы перед записью
+
+# Размер буфера бинарного кода, после которого он сбрасывается в выходной файл
+FLUSH_SIZE = 1 << 16
+
+# Примерный размер фрагмента исходного файла при параллельном ассемблировании
+CHUNK_SIZE = 1 << 22
 
 
 def assemble_instruction(line):
@@ -27,107 +40,283 @@ def assemble_instruction(line):
     # Получаем opcode (команду) и приводим его к верхнему регистру для стандартизации
     opcode = tokens[0].upper()
 
-    if opcode == 'LOAD_CONST':
-        # Формат команды: LOAD_CONST B C
-        A = 10  # Устанавливаем фиксированное значение для поля A
-        B = int(tokens[1])  # Получаем значение поля B из второго токена
-        C = int(tokens[2])  # Получаем значение поля C из третьего токена
-
-        # Проверяем, что значения полей находятся в допустимых диапазонах
-        if not (0 <= A <= 0x7F):
-            raise ValueError(f"Field A={A} out of range for LOAD_CONST (0-127)")
-        if not (0 <= B <= 0x7):
-            raise ValueError(f"Field B={B} out of range for LOAD_CONST (0-7)")
-        if not (0 <= C <= 0xFFFFFF):
-            raise ValueError(f"Field C={C} out of range for LOAD_CONST (0-16777215)")
-
-        # Формируем бинарную инструкцию путем объединения полей A, B и C
-        # A занимает биты 0-6, B — биты 7-9, C — биты 10-33
-        instruction = (A << 0) | (B << 7) | (C << 10)
-
-        # Преобразуем инструкцию в байты (5 байт) с порядком байтов 'little endian'
-        binary = instruction.to_bytes(5, byteorder='little')
-
-        # Создаем запись для лога с разобранными полями
-        log_entry = {'A': A, 'B': B, 'C': C}
-
-    elif opcode == 'READ_MEM':
-        # Формат команды: READ_MEM B C
-        A = 54  # Устанавливаем фиксированное значение для поля A
-        B = int(tokens[1])  # Получаем значение поля B из второго токена
-        C = int(tokens[2])  # Получаем значение поля C из третьего токена
-
-        # Проверяем, что значения полей находятся в допустимых диапазонах
-        if not (0 <= A <= 0x7F):
-            raise ValueError(f"Field A={A} out of range for READ_MEM (0-127)")
-        if not (0 <= B <= 0xFFFFFFFF):
-            raise ValueError(f"Field B={B} out of range for READ_MEM (0-4294967295)")
-        if not (0 <= C <= 0x7):
-            raise ValueError(f"Field C={C} out of range for READ_MEM (0-7)")
-
-        # Формируем бинарную инструкцию
-        # A занимает биты 0-6, B — биты 7-38, C — биты 39-41
-        instruction = (A & 0x7F) | ((B & 0xFFFFFFFF) << 7) | ((C & 0x7) << 39)
-
-        # Преобразуем инструкцию в байты (6 байт) с порядком байтов 'little endian'
-        binary = instruction.to_bytes(6, byteorder='little')
-
-        # Создаем запись для лога с разобранными полями
-        log_entry = {'A': A, 'B': B, 'C': C}
-
-    elif opcode == 'WRITE_MEM':
-        # Формат команды: WRITE_MEM B C
-        A = 39  # Устанавливаем фиксированное значение для поля A
-        B = int(tokens[1])  # Получаем значение поля B из второго токена
-        C = int(tokens[2])  # Получаем значение поля C из третьего токена
-
-        # Проверяем, что значения полей находятся в допустимых диапазонах
-        if not (0 <= A <= 0x7F):
-            raise ValueError(f"Field A={A} out of range for WRITE_MEM (0-127)")
-        if not (0 <= B <= 0x7):
-            raise ValueError(f"Field B={B} out of range for WRITE_MEM (0-7)")
-        if not (0 <= C <= 0x7):
-            raise ValueError(f"Field C={C} out of range for WRITE_MEM (0-7)")
-
-        # Формируем бинарную инструкцию
-        # A занимает биты 0-6, B — биты 7-9, C — биты 10-12
-        instruction = (A & 0x7F) | ((B & 0x7) << 7) | ((C & 0x7) << 10)
-
-        # Преобразуем инструкцию в байты (2 байта) с порядком байтов 'little endian'
-        binary = instruction.to_bytes(2, byteorder='little')
-
-        # Создаем запись для лога с разобранными полями
-        log_entry = {'A': A, 'B': B, 'C': C}
-
-    elif opcode == 'POPCNT':
-        # Формат команды: POPCNT B C
-        A = 18  # Устанавливаем фиксированное значение для поля A
-        B = int(tokens[1])  # Получаем значение поля B из второго токена
-        C = int(tokens[2])  # Получаем значение поля C из третьего токена
-
-        # Проверяем, что значения полей находятся в допустимых диапазонах
-        if not (0 <= A <= 0x7F):
-            raise ValueError(f"Field A={A} out of range for POPCNT (0-127)")
-        if not (0 <= B <= 0x7):
-            raise ValueError(f"Field B={B} out of range for POPCNT (0-7)")
-        if not (0 <= C <= 0xFFFFFFFF):
-            raise ValueError(f"Field C={C} out of range for POPCNT (0-4294967295)")
-
-        # Формируем бинарную инструкцию
-        # A занимает биты 0-6, B — биты 7-9, C — биты 10-41
-        instruction = (A & 0x7F) | ((B & 0x7) << 7) | ((C & 0xFFFFFFFF) << 10)
-
-        # Преобразуем инструкцию в байты (6 байт) с порядком байтов 'little endian'
-        binary = instruction.to_bytes(6, byteorder='little')
-
-        # Создаем запись для лога с разобранными полями
-        log_entry = {'A': A, 'B': B, 'C': C}
-
-    else:
+    # Находим описание команды в общей спецификации системы команд (isa.py)
+    spec = BY_NAME.get(opcode)
+    if spec is None:
         # Если opcode не распознан, выбрасываем исключение
         raise ValueError(f"Unknown opcode: {opcode}")
 
-    return binary, log_entry
+    # Получаем значения полей операндов (B, C) из следующих токенов
+    field_count = len(spec.fields)
+    if len(tokens) <= field_count:
+        raise ValueError(f"{opcode} expects {field_count} operands, got {len(tokens) - 1}")
+    operands = [int(token) for token in tokens[1:field_count + 1]]
+
+    # Проверяем диапазоны полей и формируем бинарную инструкцию по заранее вычисленным сдвигам
+    return encode(opcode, operands)
+
+
+# Разделитель элементов лога в формате 'json' (как при json.dump(..., indent=2))
+LOG_SEPARATOR = ',\n  '
+
+
+def format_log_entry(log_entry, log_format):
+    """
+    Возвращает текст одной записи лога.
+
+    Параметры:
+        log_entry (dict): Поля команды.
+        log_format (str): 'json' — элемент массива с отступами (без разделителя),
+                          'jsonl' — строка JSON Lines с переводом строки.
+
+    Возвращает:
+        str: Текст записи.
+    """
+    if log_format == 'jsonl':
+        return json.dumps(log_entry) + '\n'
+    # Элементы массива сдвигаются на 2 пробела, как при json.dump(..., indent=2)
+    return json.dumps(log_entry, indent=2).replace('\n', '\n  ')
+
+
+class LogWriter:
+    """
+    Потоковая запись лога ассемблера.
+
+    Записи выводятся в файл по мере ассемблирования, поэтому лог не хранится в памяти целиком.
+    Формат 'json' побайтно совпадает с json.dump(log_entries, f, indent=2),
+    формат 'jsonl' записывает по одной записи в строке (JSON Lines).
+    """
+
+    def __init__(self, f, log_format='json'):
+        self.f = f
+        self.log_format = log_format
+        self.count = 0
+
+    def write(self, log_entry):
+        if self.log_format == 'jsonl':
+            self.f.write(format_log_entry(log_entry, 'jsonl'))
+        else:
+            self.f.write(('[\n  ' if self.count == 0 else LOG_SEPARATOR) + format_log_entry(log_entry, 'json'))
+        self.count += 1
+
+    def close(self):
+        if self.log_format != 'jsonl':
+            self.f.write('[]' if self.count == 0 else '\n]')
+
+
+class AssemblyError(Exception):
+    """Ошибка ассемблирования строки исходного кода с номером строки в исходном файле."""
+
+    def __init__(self, line_number, line, message):
+        super().__init__(f"Error assembling line {line_number}: {line} - {message}")
+        self.line_number = line_number
+
+
+def assemble_serial(source_file, out, log_writer):
+    """
+    Последовательно ассемблирует исходный файл с потоковой записью результата.
+
+    Параметры:
+        source_file (str): Путь к исходному файлу.
+        out: Бинарный выходной файл.
+        log_writer (LogWriter): Запись лога или None.
+
+    Исключения:
+        AssemblyError: При ошибке в строке исходного кода.
+    """
+    # Буфер переиспользуется: после сброса в файл он очищается без повторного выделения
+    buffer = bytearray()
+
+    with open(source_file, 'r') as f:
+        # Проходим по каждой строке в файле
+        for line_number, line in enumerate(f, 1):
+            try:
+                # Ассемблируем текущую строку
+                binary_instr, log_entry = assemble_instruction(line)
+            except Exception as e:
+                raise AssemblyError(line_number, line.strip(), e)
+
+            # Если инструкция успешно ассемблирована, добавляем её бинарное представление
+            if binary_instr:
+                buffer += binary_instr
+                if len(buffer) >= FLUSH_SIZE:
+                    out.write(buffer)
+                    buffer.clear()
+
+            # Если требуется логирование, сразу записываем запись в лог
+            if log_entry and log_writer:
+                log_writer.write(log_entry)
+
+    # Записываем остаток буфера
+    out.write(buffer)
+
+
+def assemble_optimized(source_file, out, log_writer):
+    """
+    Ассемблирует исходный файл, оптимизирует программу целиком и записывает результат.
+
+    Оптимизатору нужна вся программа, поэтому команды хранятся в памяти,
+    а бинарный код и лог формируются уже для оптимизированной программы.
+
+    Параметры:
+        source_file (str): Путь к исходному файлу.
+        out: Бинарный выходной файл.
+        log_writer (LogWriter): Запись лога или None.
+
+    Возвращает:
+        dict: Отчёт оптимизатора: количество команд и байтов до и после, удалённые
+              и заменённые команды.
+
+    Исключения:
+        AssemblyError: При ошибке в строке исходного кода.
+    """
+    instructions = []
+    size_before = 0
+    with open(source_file, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                binary_instr, log_entry = assemble_instruction(line)
+            except Exception as e:
+                raise AssemblyError(line_number, line.strip(), e)
+            if binary_instr:
+                spec = BY_OPCODE[log_entry['A']]
+                operands = [log_entry[field] for field, _, _ in spec.fields]
+                instructions.append(Instruction(spec.name, operands, line_number))
+                size_before += len(binary_instr)
+
+    optimized, changes = optimize(instructions)
+
+    buffer = bytearray()
+    size_after = 0
+    for instr in optimized:
+        binary_instr, log_entry = encode(instr.name, instr.operands)
+        buffer += binary_instr
+        size_after += len(binary_instr)
+        if log_writer:
+            log_writer.write(log_entry)
+        if len(buffer) >= FLUSH_SIZE:
+            out.write(buffer)
+            buffer.clear()
+    out.write(buffer)
+
+    return {
+        'instructions_before': len(instructions),
+        'instructions_after': len(optimized),
+        'bytes_before': size_before,
+        'bytes_after': size_after,
+        'changes': changes,
+    }
+
+
+def split_source(source_file, chunk_size):
+    """
+    Делит исходный файл на фрагменты, выровненные по границам строк.
+
+    Параметры:
+        source_file (str): Путь к исходному файлу.
+        chunk_size (int): Примерный размер фрагмента в байтах.
+
+    Возвращает:
+        list[tuple]: Пары (начальное смещение, конечное смещение) в байтах.
+    """
+    size = os.path.getsize(source_file)
+    chunks = []
+    start = 0
+    with open(source_file, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # Дочитываем строку до конца, чтобы фрагмент заканчивался переводом строки
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def assemble_chunk(task):
+    """
+    Ассемблирует один фрагмент исходного файла в рабочем процессе.
+
+    Параметры:
+        task (tuple): (путь к исходному файлу, начальное смещение, конечное смещение, нужен ли лог).
+
+    Возвращает:
+        tuple: (бинарный код фрагмента, записи лога, количество строк,
+                ошибка (номер строки во фрагменте, строка, сообщение) или None).
+    """
+    source_file, start, end, want_log = task
+    with open(source_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    binary = bytearray()
+    log_entries = []
+    line_count = 0
+    # Декодируем фрагмент так же, как open(source_file, 'r') в последовательном режиме
+    for line in io.TextIOWrapper(io.BytesIO(data)):
+        line_count += 1
+        try:
+            binary_instr, log_entry = assemble_instruction(line)
+        except Exception as e:
+            return bytes(binary), log_entries, line_count, (line_count, line.strip(), str(e))
+        if binary_instr:
+            binary += binary_instr
+        if log_entry and want_log:
+            log_entries.append(log_entry)
+    return bytes(binary), log_entries, line_count, None
+
+
+def assemble_parallel(source_file, out, log_writer, jobs, chunk_size=CHUNK_SIZE):
+    """
+    Ассемблирует исходный файл фрагментами в пуле процессов.
+
+    Фрагменты собираются в исходном порядке, поэтому результат побайтно совпадает
+    с последовательным режимом. Одновременно в работе находится не больше 2 * jobs
+    фрагментов, чтобы память не росла с размером исходного файла.
+
+    Параметры:
+        source_file (str): Путь к исходному файлу.
+        out: Бинарный выходной файл.
+        log_writer (LogWriter): Запись лога или None.
+        jobs (int): Количество рабочих процессов.
+        chunk_size (int): Примерный размер фрагмента в байтах.
+
+    Исключения:
+        AssemblyError: При ошибке в строке исходного кода (с номером строки во всём файле).
+    """
+    tasks = [(source_file, start, end, log_writer is not None)
+             for start, end in split_source(source_file, chunk_size)]
+    lines_before = 0
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        task_iter = iter(tasks)
+        for task in task_iter:
+            pending.append(pool.submit(assemble_chunk, task))
+            if len(pending) >= 2 * jobs:
+                break
+
+        while pending:
+            binary, log_entries, line_count, error = pending.popleft().result()
+            out.write(binary)
+            if log_writer:
+                for log_entry in log_entries:
+                    log_writer.write(log_entry)
+            if error:
+                for future in pending:
+                    future.cancel()
+                line_number, line, message = error
+                raise AssemblyError(lines_before + line_number, line, message)
+            lines_before += line_count
+
+            # Отправляем следующий фрагмент взамен обработанного
+            task = next(task_iter, None)
+            if task is not None:
+                pending.append(pool.submit(assemble_chunk, task))
 
 
 def main():
@@ -136,12 +325,25 @@ def main():
 
     Выполняет следующие шаги:
         1. Парсит аргументы командной строки.
-        2. Читает исходный файл с инструкциями УВМ.
+        2. Построчно читает исходный файл с инструкциями УВМ
+           (или, с --jobs N, делит его на фрагменты по границам строк для пула процессов).
         3. Ассемблирует каждую инструкцию в бинарный формат.
-        4. Записывает бинарные данные в выходной файл.
-        5. Если указан, записывает лог с разобранными полями инструкций в JSON-файл.
+        4. Накапливает бинарные данные в переиспользуемом буфере и сбрасывает его в выходной файл
+           по мере заполнения.
+        5. Если указан, по мере ассемблирования записывает лог с разобранными полями инструкций
+           (JSON-массив или JSON Lines).
+
+    С --optimize программа перед записью проходит через оптимизатор (optimizer.py);
+    в этом режиме вся программа хранится в памяти, а отчёт можно записать в --optimize_report.
+
+    С --incremental заново ассемблируются только изменённые строки (incremental.py),
+    а выходные файлы собираются из фрагментов прошлого запуска.
 
-    При возникновении ошибки в процессе ассемблирования выводит сообщение об ошибке и завершает работу с кодом 1.
+    Память не зависит от размера исходного файла. Выходные файлы пишутся во временные
+    файлы и заменяются только после успешного ассемблирования.
+
+    При возникновении ошибки в процессе ассемблирования выводит сообщение об ошибке
+    с номером строки и завершает работу с кодом 1.
     """
     # Создаём парсер для обработки аргументов командной строки
     parser = argparse.ArgumentParser(description='Assembler for EVM.')
@@ -150,45 +352,92 @@ def main():
     parser.add_argument('source_file', help='Path to the source code file.')
     parser.add_argument('binary_file', help='Path to the output binary file.')
 
-    # Определяем необязательный аргумент: путь к лог-файлу
+    # Определяем необязательные аргументы: путь к лог-файлу и его формат
     parser.add_argument('--log_file', help='Path to the assembler log file.')
+    parser.add_argument('--log_format', choices=['json', 'jsonl'], default='json',
+                        help='Log format: JSON array (default) or JSON Lines.')
 
-    # Парсим переданные аргументы
-    args = parser.parse_args()
+    # Параллельное ассемблирование фрагментами
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes (default 1, serial).')
+    parser.add_argument('--chunk_size', type=int, default=CHUNK_SIZE,
+                        help='Approximate source chunk size in bytes for --jobs.')
 
-    # Инициализируем переменные для хранения бинарного кода и лог-записей
-    binary_code = b''
-    log_entries = []
-
-    # Открываем исходный файл для чтения
-    with open(args.source_file, 'r') as f:
-        # Проходим по каждой строке в файле
-        for line in f:
-            try:
-                # Ассемблируем текущую строку
-                binary_instr, log_entry = assemble_instruction(line)
+    # Оптимизация программы перед записью и отчёт об удалённых командах
+    parser.add_argument('--optimize', action='store_true',
+                        help='Run dead-store and redundant-load elimination before writing the binary.')
+    parser.add_argument('--optimize_report', help='Path to the optimizer report (JSON); implies --optimize.')
 
-                # Если инструкция успешно ассемблирована, добавляем её бинарное представление
-                if binary_instr:
-                    binary_code += binary_instr
+    # Инкрементальное ассемблирование с кэшем рядом с бинарным файлом
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-encode only changed source lines using a sidecar cache.')
+    parser.add_argument('--cache_file', help='Path to the incremental cache (default: <binary_file>.uvmi).')
 
-                # Если требуется логирование, добавляем запись в лог
-                if log_entry:
-                    log_entries.append(log_entry)
-
-            except Exception as e:
-                # В случае ошибки выводим сообщение об ошибке и завершаем работу с кодом 1
-                print(f"Error assembling line: {line.strip()} - {e}", file=sys.stderr)
-                sys.exit(1)
-
-    # Записываем собранный бинарный код в выходной файл
-    with open(args.binary_file, 'wb') as f:
-        f.write(binary_code)
-
-    # Если указан лог-файл, записываем туда лог-записи в формате JSON
-    if args.log_file:
-        with open(args.log_file, 'w') as f:
-            json.dump(log_entries, f, indent=2)
+    # Парсим переданные аргументы
+    args = parser.parse_args()
+    optimize_program = args.optimize or args.optimize_report is not None
+    report = None
+
+    # Инкрементальная сборка повторно использует байты прошлого запуска построчно,
+    # поэтому не сочетается с оптимизацией всей программы и с параллельным режимом
+    if args.incremental and optimize_program:
+        parser.error('--incremental cannot be combined with --optimize or --optimize_report')
+    if args.incremental and args.jobs > 1:
+        parser.error('--incremental cannot be combined with --jobs')
+
+    if args.incremental:
+        # Импорт здесь: incremental.py сам использует функции этого модуля
+        from incremental import assemble_incremental
+        try:
+            assemble_incremental(args.source_file, args.binary_file, args.log_file, args.log_format,
+                                 args.cache_file)
+        except AssemblyError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # Результаты пишутся во временные файлы, чтобы при ошибке не оставить неполный вывод
+    binary_tmp = args.binary_file + '.tmp'
+    log_tmp = args.log_file + '.tmp' if args.log_file else None
+
+    try:
+        with open(binary_tmp, 'wb') as out:
+            log_f = open(log_tmp, 'w') if log_tmp else None
+            log_writer = LogWriter(log_f, args.log_format) if log_f else None
+            try:
+                if optimize_program:
+                    report = assemble_optimized(args.source_file, out, log_writer)
+                elif args.jobs > 1:
+                    assemble_parallel(args.source_file, out, log_writer, args.jobs, args.chunk_size)
+                else:
+                    assemble_serial(args.source_file, out, log_writer)
+                if log_writer:
+                    log_writer.close()
+            finally:
+                if log_f:
+                    log_f.close()
+    except AssemblyError as e:
+        # В случае ошибки выводим сообщение об ошибке и завершаем работу с кодом 1
+        _remove_files(binary_tmp, log_tmp)
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    except BaseException:
+        _remove_files(binary_tmp, log_tmp)
+        raise
+
+    # Заменяем выходные файлы готовыми результатами
+    os.replace(binary_tmp, args.binary_file)
+    if log_tmp:
+        os.replace(log_tmp, args.log_file)
+    if args.optimize_report:
+        with open(args.optimize_report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def _remove_files(*paths):
+    # Удаляем неполные временные файлы
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
 
 
 # Проверяем, что скрипт запускается непосредственно, а не импортируется как модуль
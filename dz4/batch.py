@@ -0,0 +1,137 @@
+import argparse  # Модуль для парсинга аргументов командной строки
+import json  # Модуль для работы с JSON-форматом
+import os  # Модуль для работы с файловой системой
+import sys  # Модуль для взаимодействия с интерпретатором Python
+import time  # Измерение времени исполнения программ
+from concurrent.futures import ProcessPoolExecutor  # Пул процессов для исполнения на всех ядрах
+
+from interpreter import parse_mem_range  # Разбор диапазона памяти, как в interpreter.py
+from memory_backend import memory_slice  # Срезы памяти без копирования
+from vm import VM, VMError  # Виртуальная машина для исполнения внутри процесса
+
+# Виртуальная машина рабочего процесса, создаётся один раз в _init_worker
+_vm = None
+_mem_range = None
+
+
+def collect_programs(source):
+    """
+    Функция для получения списка бинарных файлов для пакетного исполнения.
+
+    Параметры:
+        source (str): Каталог с файлами .bin или файл-манифест со списком путей
+                      (по одному на строку, '#' — комментарий; относительные пути
+                      отсчитываются от каталога манифеста).
+
+    Возвращает:
+        list[str]: Пути к бинарным файлам в стабильном порядке.
+    """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.endswith('.bin'))
+        return [os.path.join(source, name) for name in names]
+
+    base = os.path.dirname(source)
+    paths = []
+    with open(source, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(os.path.join(base, line))
+    return paths
+
+
+def _init_worker(memory_size, mem_range, cache_dir, verify=True):
+    # Каждый рабочий процесс создаёт свою УВМ и переиспользует её для всех программ
+    global _vm, _mem_range
+    _vm = VM(memory_size=memory_size, cache_dir=cache_dir, verify=verify)
+    _mem_range = mem_range
+
+
+def run_program(path):
+    """
+    Исполняет одну программу в УВМ рабочего процесса.
+
+    Семантика совпадает с interpreter.py: новая программа стартует с нулевыми
+    регистрами и памятью, по умолчанию проверяется при загрузке, результатом
+    является указанный диапазон памяти.
+
+    Параметры:
+        path (str): Путь к бинарному файлу.
+
+    Возвращает:
+        dict: Запись результата: путь, статус, результат или ошибка, время исполнения.
+    """
+    started = time.perf_counter()
+    record = {'file': path}
+    try:
+        with open(path, 'rb') as f:
+            code = f.read()
+        _vm.reset()
+        _vm.load(code)
+        _vm.run()
+        start, end = parse_mem_range(_mem_range, len(_vm.memory))
+        record['status'] = 'ok'
+        record['result'] = memory_slice(_vm.memory, start, end).tolist()
+    except (OSError, ValueError, VMError) as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['wall_time'] = time.perf_counter() - started
+    return record
+
+
+def main():
+    """
+    Основная функция пакетного исполнения программ УВМ.
+
+    Выполняет следующие шаги:
+        1. Собирает список .bin файлов из каталога или манифеста.
+        2. Исполняет программы в пуле процессов на всех ядрах.
+        3. По мере готовности записывает результаты в файл JSON Lines
+           (одна строка на программу, в порядке входного списка).
+        4. Выводит в stderr сводку: количество программ, ошибок и общее время.
+
+    Возвращает код 1, если хотя бы одна программа завершилась с ошибкой.
+    """
+    parser = argparse.ArgumentParser(description='Batch interpreter for EVM.')
+    parser.add_argument('source', help='Directory with .bin files or a manifest file listing them.')
+    parser.add_argument('mem_range', help='Memory range to output (start:end).')
+    parser.add_argument('output_file', help='Path to the JSON Lines output file.')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--memory-size', type=int, default=1024, help='VM memory size in cells.')
+    parser.add_argument('--decode-cache', help='Directory for caching decoded programs by content hash.')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Skip load-time verification; invalid instructions fail only when executed.')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1.')
+    if args.memory_size < 1:
+        parser.error('--memory-size must be at least 1.')
+
+    try:
+        paths = collect_programs(args.source)
+    except OSError as e:
+        print(f"Error reading program list: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    errors = 0
+    # Небольшие порции уменьшают накладные расходы на передачу задач между процессами
+    chunksize = max(1, min(64, len(paths) // (4 * max(1, args.jobs))))
+
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                             initargs=(args.memory_size, args.mem_range, args.decode_cache,
+                                       not args.no_verify)) as pool, \
+            open(args.output_file, 'w') as out:
+        for record in pool.map(run_program, paths, chunksize=chunksize):
+            if record['status'] != 'ok':
+                errors += 1
+            out.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    elapsed = time.perf_counter() - started
+    print(f"Executed {len(paths)} programs ({errors} failed) in {elapsed:.3f} s.", file=sys.stderr)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
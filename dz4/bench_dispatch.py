@@ -0,0 +1,87 @@
+import argparse  # Модуль для парсинга аргументов командной строки
+import random  # Генерация синтетических программ
+import time  # Измерение времени исполнения
+
+from block_compiler import compile_program, run_compiled  # Компиляция программы в функции Python
+from decoder import decode_program  # Декодирование синтетической программы
+from dispatch import VMState, run_chain, run_table  # Сравниваемые движки исполнения
+from isa import encode  # Кодирование команд по спецификации
+
+
+def make_program(count, seed=0):
+    """
+    Генерирует синтетическую программу УВМ со смешанными командами.
+
+    Регистр 7 всегда содержит корректный адрес, поэтому WRITE_MEM не выходит за границы памяти.
+
+    Параметры:
+        count (int): Количество команд.
+        seed (int): Начальное значение генератора случайных чисел.
+
+    Возвращает:
+        bytes: Бинарный код программы.
+    """
+    rng = random.Random(seed)
+    code = bytearray()
+    # LOAD_CONST 7 0: адрес для WRITE_MEM
+    code += encode('LOAD_CONST', [7, 0])[0]
+    for _ in range(count - 1):
+        kind = rng.randrange(4)
+        if kind == 0:
+            binary, _ = encode('LOAD_CONST', [rng.randrange(7), rng.randrange(1 << 24)])
+        elif kind == 1:
+            binary, _ = encode('READ_MEM', [rng.randrange(1024), rng.randrange(7)])
+        elif kind == 2:
+            binary, _ = encode('WRITE_MEM', [rng.randrange(7), 7])
+        else:
+            binary, _ = encode('POPCNT', [rng.randrange(7), rng.randrange(1024)])
+        code += binary
+    return bytes(code)
+
+
+def bench(engine, program, repeat):
+    """
+    Возвращает лучшее время исполнения программы заданным движком.
+
+    Параметры:
+        engine (callable): run_table или run_chain.
+        program (DecodedProgram): Декодированная программа.
+        repeat (int): Количество повторов.
+
+    Возвращает:
+        float: Минимальное время одного прогона в секундах.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        state = VMState([0] * 1024)
+        started = time.perf_counter()
+        engine(program, state)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dispatch micro-benchmark: if/elif chain vs table vs compiled.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Instruction stream lengths.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per engine, best time is reported.')
+    args = parser.parse_args()
+
+    print(f"{'instructions':>12} {'chain, s':>10} {'table, s':>10} {'compile, s':>10} {'compiled, s':>11} "
+          f"{'vs table':>8}")
+    for size in args.sizes:
+        program = decode_program(make_program(size))
+        chain = bench(run_chain, program, args.repeat)
+        table = bench(run_table, program, args.repeat)
+
+        # Компиляция выполняется один раз и в дальнейшем берётся из кэша по хэшу программы
+        started = time.perf_counter()
+        compiled = compile_program(program)
+        compile_time = time.perf_counter() - started
+        execute = bench(lambda p, state: run_compiled(compiled, p, state), program, args.repeat)
+        print(f"{size:>12} {chain:>10.4f} {table:>10.4f} {compile_time:>10.4f} {execute:>11.4f} "
+              f"{table / execute:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
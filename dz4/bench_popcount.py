@@ -0,0 +1,53 @@
+import argparse  # Модуль для парсинга аргументов командной строки
+import random  # Генерация входных данных
+import timeit  # Измерение времени выполнения
+from array import array  # Компактные типизированные массивы
+
+from popcnt_vector import apply_popcnt_to_vector  # Векторная операция popcnt
+from popcount import np, popcnt, popcnt_array  # Сравниваемые способы подсчёта битов
+
+
+def popcnt_bin(x):
+    # Прежняя реализация: строка на каждый вызов
+    return bin(x).count('1')
+
+
+def best(stmt, number, repeat=5):
+    # Лучшее время одного выполнения stmt в секундах
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Popcount benchmark: scalar, 8-wide and large vectors.')
+    parser.add_argument('--size', type=int, default=1_000_000, help='Length of the large vector.')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    scalar = rng.getrandbits(32)
+    vector8 = [rng.getrandbits(32) for _ in range(8)]
+    values = [rng.getrandbits(32) for _ in range(args.size)]
+    cells = array('I', values)
+
+    rows = [
+        ('scalar', 'bin(x).count', best(lambda: popcnt_bin(scalar), 200_000)),
+        ('scalar', 'int.bit_count', best(lambda: popcnt(scalar), 200_000)),
+        ('8-wide', 'bin(x).count', best(lambda: [popcnt_bin(x) for x in vector8], 50_000)),
+        ('8-wide', 'apply_popcnt', best(lambda: apply_popcnt_to_vector(vector8), 50_000)),
+        (f'{args.size}', 'bin(x).count', best(lambda: [popcnt_bin(x) for x in values], 1, 3)),
+        (f'{args.size}', 'python', best(lambda: popcnt_array(values, 'python'), 1, 3)),
+        (f'{args.size}', 'table', best(lambda: popcnt_array(cells, 'table'), 1, 3)),
+    ]
+    if np is not None:
+        data = np.array(values, dtype=np.uint32)
+        rows.append((f'{args.size}', 'numpy', best(lambda: popcnt_array(data, 'numpy'), 1, 3)))
+    else:
+        rows.append((f'{args.size}', 'numpy', None))
+
+    print(f"{'input':>10} {'method':>14} {'time, us':>12}")
+    for size, method, seconds in rows:
+        time_text = 'n/a' if seconds is None else f"{seconds * 1e6:.3f}"
+        print(f"{size:>10} {method:>14} {time_text:>12}")
+
+
+if __name__ == '__main__':
+    main()
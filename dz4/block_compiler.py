@@ -0,0 +1,290 @@
+import marshal  # Сериализация скомпилированного кода для дискового кэша
+import os  # Модуль для работы с путями дискового кэша
+import sys  # Версия интерпретатора для ключа кэша
+from collections import OrderedDict  # Упорядоченный словарь для LRU-кэша
+
+from decoder import RECORD_SIZE  # Размер записи декодированной команды
+from dispatch import run_table  # Интерпретация участков, которые нельзя исполнить без проверок
+from isa import OPCODES  # Общая спецификация системы команд УВМ
+from popcount import HAS_BIT_COUNT, popcnt, popcnt_inplace  # Подсчёт битов для ячейки и для диапазона памяти
+
+# Максимальное количество команд в одной сгенерированной функции
+SEGMENT_SIZE = 4096
+
+# Версия генератора: входит в ключ дискового кэша вместе с версией Python
+COMPILER_VERSION = 2
+
+# Максимальное количество программ в кэше текущего процесса
+CACHE_SIZE = 16
+
+_LOAD_CONST = OPCODES['LOAD_CONST']
+_READ_MEM = OPCODES['READ_MEM']
+_WRITE_MEM = OPCODES['WRITE_MEM']
+_POPCNT = OPCODES['POPCNT']
+_VPOPCNT = OPCODES['VPOPCNT']
+
+_REGISTERS = ', '.join(f'r{i}' for i in range(8))
+
+# Метка выхода из участка в генерируемом коде: на выходе нужны все регистры
+_ALL = object()
+
+_cache = OrderedDict()
+
+
+class CompiledProgram:
+    """
+    Программа УВМ, скомпилированная в функции Python.
+
+    Атрибуты:
+        segments (tuple): Тройки (первая команда, конец, функция) в порядке исполнения.
+        digest (str): Хэш исходного бинарного кода.
+    """
+
+    __slots__ = ('segments', 'digest')
+
+    def __init__(self, segments, digest):
+        self.segments = segments
+        self.digest = digest
+
+
+def basic_blocks(program):
+    """
+    Делит программу на базовые блоки.
+
+    В системе команд УВМ нет переходов, поэтому вся программа — один базовый блок.
+    При появлении команд перехода здесь нужно будет начинать новый блок на каждой
+    цели перехода и после каждой команды перехода.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+
+    Возвращает:
+        list[tuple]: Пары (первая команда, конец блока).
+    """
+    return [(0, len(program))] if len(program) else []
+
+
+def _segment_source(program, name, start, end, known):
+    # Генерирует функцию для команд [start, end): регистры — локальные переменные,
+    # память — обращения к буферу по индексу.
+    # known — регистры, значение которых известно при генерации (после LOAD_CONST);
+    # словарь обновляется и передаётся следующему участку того же базового блока
+    records = program.records
+    # Команды участка: (регистр-результат, читаемые регистры, код, код без записи результата);
+    # регистр-результат ALL означает выход из участка, где нужны все регистры
+    ops = []
+    max_address = -1
+    # Значения регистров на входе, на которые опирается участок
+    entry = dict(known)
+    assumed = {}
+
+    for ip in range(start, end):
+        index = ip * RECORD_SIZE
+        opcode = records[index]
+        B = records[index + 1]
+        C = records[index + 2]
+        if opcode == _LOAD_CONST:
+            known[B] = C
+            ops.append((B, (), f"    r{B} = {C}", None))
+        elif opcode == _READ_MEM:
+            max_address = max(max_address, B)
+            known.pop(C, None)
+            ops.append((C, (), f"    r{C} = mem[{B}]", None))
+        elif opcode == _WRITE_MEM:
+            address = known.get(C)
+            # Известное значение подставляется в код, регистр тогда не читается
+            value = known.get(B)
+            source, uses = (value, ()) if value is not None else (f"r{B}", (B,))
+            if address is not None:
+                if entry.get(C) == address and C not in assumed:
+                    assumed[C] = address
+                # Адрес известен при генерации: проверяется вместе с непосредственными адресами
+                max_address = max(max_address, address)
+                ops.append((None, uses, f"    mem[{address}] = {source}", None))
+            else:
+                # Адрес вычислен во время исполнения, поэтому проверяется на месте
+                ops.append((_ALL, (), f"    if r{C} >= n:\n"
+                                      f"        regs[:] = ({_REGISTERS})\n"
+                                      f"        return {ip}", None))
+                ops.append((None, (C,) + uses, f"    mem[r{C}] = {source}", None))
+        elif opcode == _POPCNT:
+            max_address = max(max_address, C)
+            known.pop(B, None)
+            # int.bit_count вызывается напрямую, без дополнительного вызова функции Python
+            count = f"mem[{C}].bit_count()" if HAS_BIT_COUNT else f"popcnt(mem[{C}])"
+            ops.append((B, (), f"    r{B} = mem[{C}] = {count}", f"    mem[{C}] = {count}"))
+        elif opcode == _VPOPCNT:
+            if C:
+                max_address = max(max_address, B + C - 1)
+                ops.append((None, (), f"    popcnt_inplace(mem, {B}, {B + C})", None))
+        else:
+            # Неизвестная команда: дальнейшее исполнение передаётся интерпретатору
+            ops.append((_ALL, (), f"    regs[:] = ({_REGISTERS})\n    return {ip}", None))
+            break
+
+    # Удаление мёртвых записей: значение регистра, которое перезаписывается до чтения
+    # и до выхода из участка, не вычисляется
+    body = []
+    live = set(range(8))
+    for dest, uses, code, dead_code in reversed(ops):
+        if dest is _ALL:
+            live = set(range(8))
+        elif dest is not None:
+            if dest not in live:
+                if dead_code is not None:
+                    body.append(dead_code)
+                continue
+            live.discard(dest)
+        live.update(uses)
+        body.append(code)
+    body.reverse()
+
+    lines = [f"def {name}(regs, mem, n):"]
+    guards = [f"n <= {max_address}"] if max_address >= 0 else []
+    # Значения регистров, унаследованные от предыдущего участка, проверяются на входе:
+    # участок может начаться с другим состоянием (например, после restore)
+    guards.extend(f"regs[{register}] != {value}" for register, value in sorted(assumed.items()))
+    if guards:
+        # Все известные при генерации адреса проверяются один раз в начале участка;
+        # если какой-то из них вне памяти, участок исполняет интерпретатор с обычными проверками
+        lines.append(f"    if {' or '.join(guards)}:")
+        lines.append(f"        return {start}")
+    lines.append(f"    {_REGISTERS} = regs")
+    lines.extend(body)
+    lines.append(f"    regs[:] = ({_REGISTERS})")
+    lines.append("    return None")
+    return '\n'.join(lines)
+
+
+def generate_source(program):
+    """
+    Генерирует исходный код Python для декодированной программы.
+
+    Каждый базовый блок разбивается на участки не длиннее SEGMENT_SIZE команд,
+    каждый участок становится одной функцией без циклов и ветвлений по opcode.
+    Функция участка возвращает None при успешном завершении или номер команды,
+    с которой исполнение должен продолжить интерпретатор.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+
+    Возвращает:
+        str: Исходный код модуля с кортежем SEGMENTS.
+    """
+    functions = []
+    segments = []
+    for block_start, block_end in basic_blocks(program):
+        # Внутри базового блока нет переходов, поэтому известные значения регистров
+        # переходят из участка в участок
+        known = {}
+        for start in range(block_start, block_end, SEGMENT_SIZE):
+            end = min(start + SEGMENT_SIZE, block_end)
+            name = f"_segment_{start}"
+            functions.append(_segment_source(program, name, start, end, known))
+            segments.append(f"({start}, {end}, {name})")
+    functions.append(f"SEGMENTS = ({', '.join(segments)}{',' if len(segments) == 1 else ''})")
+    return '\n\n\n'.join(functions) + '\n'
+
+
+def _cache_path(cache_dir, digest):
+    tag = sys.implementation.cache_tag
+    return os.path.join(cache_dir, f"{digest}.{tag}.v{COMPILER_VERSION}.uvmc")
+
+
+def compile_program(program, cache_dir=None):
+    """
+    Компилирует декодированную программу в функции Python с кэшированием.
+
+    Скомпилированный код хранится в кэше процесса и (если указан cache_dir) на диске,
+    по хэшу бинарного кода, поэтому генерация и compile() выполняются один раз.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+        cache_dir (str): Каталог дискового кэша.
+
+    Возвращает:
+        CompiledProgram: Скомпилированная программа.
+    """
+    digest = program.digest
+    if digest is not None:
+        compiled = _cache.get(digest)
+        if compiled is not None:
+            _cache.move_to_end(digest)
+            return compiled
+
+    path = _cache_path(cache_dir, digest) if cache_dir and digest else None
+    code = None
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                code = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Повреждённый кэш не должен мешать исполнению: компилируем заново
+            code = None
+
+    if code is None:
+        code = compile(generate_source(program), f"<uvm {digest or 'program'}>", 'exec')
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(code, f)
+            os.replace(tmp_path, path)
+
+    namespace = {'popcnt': popcnt, 'popcnt_inplace': popcnt_inplace}
+    exec(code, namespace)
+    compiled = CompiledProgram(namespace['SEGMENTS'], digest)
+
+    if digest is not None:
+        _cache[digest] = compiled
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def run_compiled(compiled, program, state, max_steps=None):
+    """
+    Исполняет скомпилированную программу с текущей команды до конца.
+
+    Участки, которые нельзя исполнить без проверок (адрес вне памяти, неизвестная команда),
+    начало с середины участка и участок, на котором заканчивается лимит команд,
+    исполняются интерпретатором run_table, поэтому ошибки и их сообщения совпадают
+    с обычным режимом.
+
+    Параметры:
+        compiled (CompiledProgram): Скомпилированная программа.
+        program (DecodedProgram): Та же программа в декодированном виде.
+        state (VMState): Состояние УВМ.
+        max_steps (int): Максимальное количество команд (None — до конца программы).
+
+    Возвращает:
+        int: Количество выполненных команд.
+
+    Исключения:
+        VMError: При ошибке исполнения; state.ip указывает на команду с ошибкой.
+    """
+    first = state.ip
+    limit = len(program) if max_steps is None else min(len(program), first + max_steps)
+    registers = state.registers
+    memory = state.memory
+    size = len(memory)
+
+    for start, end, function in compiled.segments:
+        if end <= state.ip:
+            continue
+        if state.ip >= limit:
+            break
+        if state.ip > start or end > limit:
+            # Продолжение с середины участка (после run(max_steps)) или остаток лимита
+            # выполняет интерпретатор
+            run_table(program, state, min(end, limit) - state.ip)
+            continue
+        resume = function(registers, memory, size)
+        if resume is None:
+            state.ip = end
+        else:
+            state.ip = resume
+            run_table(program, state, end - resume)
+
+    state.ip = max(state.ip, limit)
+    return state.ip - first
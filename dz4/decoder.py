@@ -0,0 +1,206 @@
+import hashlib  # Модуль для вычисления хэша содержимого программы
+import os  # Модуль для работы с путями дискового кэша
+import sys  # Модуль для определения порядка байтов платформы
+from array import array  # Компактные типизированные массивы
+from collections import OrderedDict  # Упорядоченный словарь для LRU-кэша
+
+from isa import DECODE_FORMATS, OPCODE_MASK  # Общая спецификация системы команд УВМ
+
+# Каждая декодированная команда занимает 4 ячейки: opcode, B, C, длина
+RECORD_SIZE = 4
+
+# Сигнатура и версия формата файла дискового кэша
+CACHE_MAGIC = b'UVMD\x02'
+
+# Максимальное количество программ в кэше текущего процесса
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+
+
+class DecodedProgram:
+    """
+    Программа УВМ, заранее декодированная в компактный массив записей.
+
+    Каждая запись состоит из четырёх беззнаковых 32-битных чисел:
+    opcode, поле B, поле C и длина команды в байтах. Для неизвестного opcode
+    декодирование останавливается и записывается запись (opcode, opcode, pc, 0),
+    чтобы ошибка была выдана только при попытке выполнить эту команду.
+    """
+
+    __slots__ = ('records', 'digest')
+
+    def __init__(self, records, digest):
+        self.records = records  # array('I') с записями команд
+        self.digest = digest  # SHA-256 исходного бинарного кода (hex)
+
+    def __len__(self):
+        return len(self.records) // RECORD_SIZE
+
+    def __iter__(self):
+        it = iter(self.records)
+        return zip(it, it, it, it)
+
+    def pc_at(self, ip):
+        """
+        Возвращает смещение в бинарном коде (pc) для команды с номером ip.
+
+        Параметры:
+            ip (int): Номер команды в декодированной программе.
+
+        Возвращает:
+            int: Смещение команды в байтах.
+        """
+        return sum(self.records[3:ip * RECORD_SIZE:RECORD_SIZE])
+
+    def ip_at(self, pc):
+        """
+        Возвращает номер команды (ip), начинающейся со смещения pc в бинарном коде.
+
+        Параметры:
+            pc (int): Смещение команды в байтах.
+
+        Возвращает:
+            int: Номер команды (равен len(program), если pc указывает на конец программы).
+
+        Исключения:
+            ValueError: Если pc не совпадает с началом команды.
+        """
+        offset = 0
+        ip = 0
+        for length in self.records[3::RECORD_SIZE]:
+            if offset >= pc:
+                break
+            offset += length
+            ip += 1
+        if offset != pc:
+            raise ValueError(f"pc={pc} is not an instruction boundary.")
+        return ip
+
+    def to_bytes(self):
+        """
+        Сериализует декодированную программу для дискового кэша.
+
+        Возвращает:
+            bytes: Сигнатура формата и записи в порядке байтов 'little endian'.
+        """
+        records = self.records
+        if sys.byteorder != 'little':
+            records = array('I', records)
+            records.byteswap()
+        return CACHE_MAGIC + records.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, digest):
+        """
+        Восстанавливает декодированную программу из дискового кэша.
+
+        Параметры:
+            data (bytes): Содержимое файла кэша.
+            digest (str): Хэш исходного бинарного кода.
+
+        Возвращает:
+            DecodedProgram: Декодированная программа.
+
+        Исключения:
+            ValueError: Если данные не являются корректным файлом кэша.
+        """
+        if not data.startswith(CACHE_MAGIC):
+            raise ValueError("Invalid decoded program cache file.")
+        records = array('I')
+        records.frombytes(data[len(CACHE_MAGIC):])
+        if sys.byteorder != 'little':
+            records.byteswap()
+        if len(records) % RECORD_SIZE:
+            raise ValueError("Truncated decoded program cache file.")
+        return cls(records, digest)
+
+
+def decode_program(code, digest=None):
+    """
+    Функция для декодирования бинарного кода УВМ в массив записей.
+
+    Декодирование выполняется один раз за линейный проход: для каждой команды
+    извлекаются поля B и C и её длина. Неполная последняя команда декодируется
+    из имеющихся байтов, как и при прямом исполнении.
+
+    Параметры:
+        code (bytes): Бинарный код программы.
+        digest (str): Хэш бинарного кода, если уже вычислен.
+
+    Возвращает:
+        DecodedProgram: Декодированная программа.
+    """
+    records = array('I')
+    if not code:
+        return DecodedProgram(records, digest)
+
+    # Форматы команд: opcode -> (длина, сдвиг B, маска B, сдвиг C, маска C), построены по isa.py
+    formats = DECODE_FORMATS
+    append = records.extend
+    pc = 0
+    code_length = len(code)
+
+    while pc < code_length:
+        # Извлекаем opcode текущей команды (7 младших битов первого байта)
+        opcode = code[pc] & OPCODE_MASK
+        fmt = formats.get(opcode)
+        if fmt is None:
+            # Длина неизвестной команды не определена, дальше декодировать нельзя
+            append((opcode, opcode, pc, 0))
+            break
+        length, b_shift, b_mask, c_shift, c_mask = fmt
+        instr = int.from_bytes(code[pc:pc + length], byteorder='little')
+        append((opcode, (instr >> b_shift) & b_mask, (instr >> c_shift) & c_mask, length))
+        pc += length
+
+    return DecodedProgram(records, digest)
+
+
+def load_program(code, cache_dir=None):
+    """
+    Возвращает декодированную программу, используя кэш по хэшу содержимого.
+
+    Сначала проверяется кэш текущего процесса, затем (если указан cache_dir)
+    дисковый кэш. Повторный запуск того же .bin не выполняет декодирование.
+
+    Параметры:
+        code (bytes): Бинарный код программы.
+        cache_dir (str): Каталог дискового кэша декодированных программ.
+
+    Возвращает:
+        DecodedProgram: Декодированная программа.
+    """
+    if not code:
+        return decode_program(code)
+
+    digest = hashlib.sha256(code).hexdigest()
+    program = _cache.get(digest)
+    if program is not None:
+        _cache.move_to_end(digest)
+        return program
+
+    cache_path = os.path.join(cache_dir, digest + '.uvmd') if cache_dir else None
+    program = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                program = DecodedProgram.from_bytes(f.read(), digest)
+        except (OSError, ValueError):
+            # Повреждённый кэш не должен мешать исполнению: декодируем заново
+            program = None
+
+    if program is None:
+        program = decode_program(code, digest)
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Пишем во временный файл и переименовываем, чтобы не оставить неполный кэш
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(program.to_bytes())
+            os.replace(tmp_path, cache_path)
+
+    _cache[digest] = program
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return program
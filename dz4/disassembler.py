@@ -0,0 +1,211 @@
+import argparse  # Модуль для парсинга аргументов командной строки
+import mmap  # Отображение больших бинарных файлов и индексов без чтения целиком
+import os  # Модуль для работы с путями и атрибутами файлов
+import struct  # Упаковка заголовка индекса
+import sys  # Модуль для взаимодействия с интерпретатором Python
+from array import array  # Компактные типизированные массивы
+
+from isa import INSTRUCTIONS, OPCODE_MASK, decode  # Общая спецификация системы команд УВМ
+
+# Формат файла индекса: сигнатура, размер и время изменения бинарного файла (для проверки
+# актуальности), количество команд, затем смещения команд (uint64, 'little endian')
+INDEX_MAGIC = b'UVMX\x01\x00\x00\x00'
+INDEX_HEADER = struct.Struct('<8sQQQ')
+INDEX_SUFFIX = '.uvmx'
+
+# Длина команды по opcode (0 — неизвестная команда)
+_LENGTHS = bytes(
+    next((spec.length for spec in INSTRUCTIONS if spec.opcode == opcode), 0) for opcode in range(OPCODE_MASK + 1)
+)
+
+# Размер буфера вывода в строках
+_FLUSH_LINES = 4096
+
+
+def build_index(code):
+    """
+    Строит индекс смещений команд за один линейный проход по бинарному коду.
+
+    Для каждой команды достаточно первого байта: по opcode определяется длина команды.
+    Неизвестная команда попадает в индекс последней, так как её длина не определена.
+
+    Параметры:
+        code (bytes): Бинарный код (любой bytes-подобный объект, в том числе mmap).
+
+    Возвращает:
+        array: Смещения команд array('Q'), индекс i — номер команды.
+    """
+    offsets = array('Q')
+    append = offsets.append
+    lengths = _LENGTHS
+    pc = 0
+    code_length = len(code)
+    while pc < code_length:
+        append(pc)
+        length = lengths[code[pc] & OPCODE_MASK]
+        if not length:
+            break
+        pc += length
+    return offsets
+
+
+def save_index(index_path, offsets, binary_path):
+    """
+    Сохраняет индекс смещений рядом с бинарным файлом.
+
+    Параметры:
+        index_path (str): Путь к файлу индекса.
+        offsets (array): Смещения команд.
+        binary_path (str): Путь к проиндексированному бинарному файлу.
+    """
+    stat = os.stat(binary_path)
+    if sys.byteorder != 'little':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets)))
+        f.write(offsets)
+    os.replace(tmp_path, index_path)
+
+
+def load_index(index_path, binary_path):
+    """
+    Загружает сохранённый индекс, если он соответствует бинарному файлу.
+
+    Смещения отображаются из файла (mmap), поэтому загрузка не зависит от размера индекса.
+
+    Параметры:
+        index_path (str): Путь к файлу индекса.
+        binary_path (str): Путь к бинарному файлу.
+
+    Возвращает:
+        memoryview | array | None: Смещения команд или None, если индекс отсутствует или устарел.
+    """
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) != INDEX_HEADER.size:
+                return None
+            magic, size, mtime_ns, count = INDEX_HEADER.unpack(header)
+            stat = os.stat(binary_path)
+            if magic != INDEX_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            if os.fstat(f.fileno()).st_size != INDEX_HEADER.size + count * 8:
+                return None
+            if not count:
+                return array('Q')
+            if sys.byteorder != 'little':
+                offsets = array('Q')
+                offsets.fromfile(f, count)
+                offsets.byteswap()
+                return offsets
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+    return memoryview(buffer)[INDEX_HEADER.size:].cast('Q')
+
+
+def open_index(binary_path, index_path=None):
+    """
+    Возвращает индекс смещений для бинарного файла, строя и сохраняя его при необходимости.
+
+    Параметры:
+        binary_path (str): Путь к бинарному файлу.
+        index_path (str): Путь к файлу индекса (по умолчанию binary_path + '.uvmx').
+
+    Возвращает:
+        memoryview | array: Смещения команд.
+    """
+    index_path = index_path or binary_path + INDEX_SUFFIX
+    offsets = load_index(index_path, binary_path)
+    if offsets is None:
+        # Бинарный файл отображается, а не читается целиком: индекс строится и для огромных файлов
+        with open(binary_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as code:
+                    offsets = build_index(code)
+            else:
+                offsets = build_index(b'')
+        save_index(index_path, offsets, binary_path)
+    return offsets
+
+
+def disassemble(code, offsets, start=0, count=None, show_offsets=False):
+    """
+    Дизассемблирует окно команд [start, start + count).
+
+    Время работы пропорционально размеру окна: начало каждой команды берётся из индекса.
+    Строки имеют формат исходного кода ассемблера, поэтому вывод можно снова ассемблировать.
+
+    Параметры:
+        code (bytes): Бинарный код (любой bytes-подобный объект, в том числе mmap).
+        offsets: Смещения команд (результат build_index или open_index).
+        start (int): Номер первой команды.
+        count (int): Количество команд (None — до конца программы).
+        show_offsets (bool): Добавлять к строкам комментарий с номером и смещением команды.
+
+    Возвращает:
+        generator: Строки дизассемблированного кода.
+    """
+    end = len(offsets) if count is None else min(len(offsets), start + count)
+    for ip in range(start, end):
+        pc = offsets[ip]
+        spec, operands = decode(code, pc)
+        if spec is None:
+            yield f"# Unknown opcode {operands} at pc={pc}"
+            return
+        line = f"{spec.name} {' '.join(map(str, operands))}"
+        if show_offsets:
+            line = f"{line}  # {ip}: pc={pc}"
+        yield line
+
+
+def main():
+    """
+    Основная функция дизассемблера УВМ.
+
+    Аргументы командной строки:
+        binary_file (str): Путь к бинарному файлу с командами УВМ.
+        --start (int): Номер первой команды окна.
+        --count (int): Количество команд в окне (по умолчанию — до конца программы).
+        --index (str): Путь к файлу индекса смещений (по умолчанию binary_file + '.uvmx').
+        --offsets: Выводить номер и смещение каждой команды.
+        --output (str): Файл для вывода (по умолчанию — стандартный вывод).
+    """
+    parser = argparse.ArgumentParser(description='Disassembler for EVM.')
+    parser.add_argument('binary_file', help='Path to the binary file.')
+    parser.add_argument('--start', type=int, default=0, help='First instruction number of the window.')
+    parser.add_argument('--count', type=int, help='Number of instructions to disassemble (default: to the end).')
+    parser.add_argument('--index', help='Path to the offset index (default: <binary_file>.uvmx).')
+    parser.add_argument('--offsets', action='store_true', help='Annotate lines with instruction number and pc.')
+    parser.add_argument('--output', help='Write the listing to this file instead of stdout.')
+    args = parser.parse_args()
+
+    if args.start < 0 or (args.count is not None and args.count < 0):
+        print("Window start and count must be non-negative.", file=sys.stderr)
+        sys.exit(1)
+
+    offsets = open_index(args.binary_file, args.index)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        with open(args.binary_file, 'rb') as f:
+            # Пустой файл нельзя отобразить, а окна в нём нет
+            code = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if len(offsets) else b''
+        # Строки выводятся порциями по мере дизассемблирования
+        buffer = []
+        for line in disassemble(code, offsets, args.start, args.count, args.offsets):
+            buffer.append(line)
+            if len(buffer) >= _FLUSH_LINES:
+                out.write('\n'.join(buffer) + '\n')
+                buffer.clear()
+        if buffer:
+            out.write('\n'.join(buffer) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+from decoder import RECORD_SIZE  # Размер записи декодированной команды
+from isa import OPCODE_MASK, OPCODES  # Общая спецификация системы команд УВМ
+from popcount import popcnt, popcnt_inplace  # Подсчёт битов для ячейки и для диапазона памяти
+
+
+class VMError(Exception):
+    """Ошибка исполнения программы УВМ (выход за границы памяти, неизвестный opcode)."""
+
+
+class VMState:
+    """
+    Компактное состояние УВМ, общее для всех обработчиков команд.
+
+    Атрибуты:
+        registers (list[int]): 8 регистров УВМ.
+        memory: Память УВМ (поддерживает len() и доступ по индексу).
+        ip (int): Номер следующей исполняемой команды в декодированной программе.
+    """
+
+    __slots__ = ('registers', 'memory', 'ip')
+
+    def __init__(self, memory, registers=None):
+        self.registers = registers if registers is not None else [0] * 8
+        self.memory = memory
+        self.ip = 0
+
+
+def op_load_const(state, B, C):
+    """
+    Команда LOAD_CONST:
+        Формат: LOAD_CONST B C
+        Описание: Загружает константу C в регистр по адресу B.
+    """
+    state.registers[B] = C
+
+
+def op_read_mem(state, B, C):
+    """
+    Команда READ_MEM:
+        Формат: READ_MEM B C
+        Описание: Читает значение из памяти по адресу B и сохраняет его в регистр по адресу C.
+    """
+    memory = state.memory
+    if B >= len(memory):
+        raise VMError(f"Memory read error: Address {B} out of bounds.")
+    state.registers[C] = memory[B]
+
+
+def op_write_mem(state, B, C):
+    """
+    Команда WRITE_MEM:
+        Формат: WRITE_MEM B C
+        Описание: Записывает значение из регистра по адресу B в память по адресу,
+                  хранящемуся в регистре по адресу C.
+    """
+    registers = state.registers
+    memory = state.memory
+    addr = registers[C]
+    if addr >= len(memory):
+        raise VMError(f"Memory write error: Address {addr} out of bounds.")
+    memory[addr] = registers[B]
+
+
+def op_popcnt(state, B, C):
+    """
+    Команда POPCNT:
+        Формат: POPCNT B C
+        Описание: Выполняет операцию popcnt на значении из памяти по адресу C,
+                  записывает результат обратно в память и в регистр по адресу B.
+    """
+    memory = state.memory
+    if C >= len(memory):
+        raise VMError(f"Memory popcnt error: Address {C} out of bounds.")
+    value = popcnt(memory[C])
+    memory[C] = value
+    state.registers[B] = value
+
+
+def op_vpopcnt(state, B, C):
+    """
+    Команда VPOPCNT:
+        Формат: VPOPCNT B C
+        Описание: Выполняет операцию popcnt над каждой ячейкой памяти в диапазоне [B, B + C)
+                  и записывает результаты на место исходных значений. Регистры не изменяются.
+    """
+    memory = state.memory
+    end = B + C
+    if end > len(memory):
+        raise VMError(f"Memory popcnt error: Range {B}:{end} out of bounds.")
+    popcnt_inplace(memory, B, end)
+
+
+def op_unknown(state, B, C):
+    """
+    Обработчик для всех неизвестных opcode.
+
+    Декодер записывает для неизвестной команды сам opcode в поле B и её pc в поле C.
+    """
+    raise VMError(f"Unknown opcode at pc={C}: {B}")
+
+
+# Таблица обработчиков, индексируемая 7-битным полем A (0-127)
+HANDLERS = [op_unknown] * (OPCODE_MASK + 1)
+HANDLERS[OPCODES['LOAD_CONST']] = op_load_const
+HANDLERS[OPCODES['READ_MEM']] = op_read_mem
+HANDLERS[OPCODES['WRITE_MEM']] = op_write_mem
+HANDLERS[OPCODES['POPCNT']] = op_popcnt
+HANDLERS[OPCODES['VPOPCNT']] = op_vpopcnt
+
+
+def op_read_mem_unchecked(state, B, C):
+    """READ_MEM без проверки адреса: адрес B проверен верификатором при загрузке."""
+    state.registers[C] = state.memory[B]
+
+
+def op_popcnt_unchecked(state, B, C):
+    """POPCNT без проверки адреса: адрес C проверен верификатором при загрузке."""
+    memory = state.memory
+    value = popcnt(memory[C])
+    memory[C] = value
+    state.registers[B] = value
+
+
+def op_vpopcnt_unchecked(state, B, C):
+    """VPOPCNT без проверки диапазона: диапазон [B, B + C) проверен верификатором при загрузке."""
+    popcnt_inplace(state.memory, B, B + C)
+
+
+# Таблица для программ, прошедших verifier.verify_program: непосредственные адреса уже проверены,
+# динамическая проверка остаётся только у WRITE_MEM (адрес берётся из регистра)
+UNCHECKED_HANDLERS = list(HANDLERS)
+UNCHECKED_HANDLERS[OPCODES['READ_MEM']] = op_read_mem_unchecked
+UNCHECKED_HANDLERS[OPCODES['POPCNT']] = op_popcnt_unchecked
+UNCHECKED_HANDLERS[OPCODES['VPOPCNT']] = op_vpopcnt_unchecked
+
+
+def run_table(program, state, max_steps=None, handlers=HANDLERS):
+    """
+    Исполняет декодированную программу через таблицу обработчиков.
+
+    Каждая команда выполняется одним обращением к таблице по opcode,
+    без последовательных сравнений.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+        state (VMState): Состояние УВМ; исполнение начинается с команды state.ip.
+        max_steps (int): Максимальное количество команд (None — до конца программы).
+        handlers (list): Таблица обработчиков на 128 элементов.
+
+    Возвращает:
+        int: Количество выполненных команд.
+
+    Исключения:
+        VMError: При ошибке исполнения; state.ip указывает на команду с ошибкой.
+    """
+    records = program.records
+    start = state.ip * RECORD_SIZE
+    index = start
+    end = len(records)
+    if max_steps is not None:
+        end = min(end, start + max_steps * RECORD_SIZE)
+    try:
+        while index < end:
+            handlers[records[index]](state, records[index + 1], records[index + 2])
+            index += RECORD_SIZE
+    finally:
+        state.ip = index // RECORD_SIZE
+    return (index - start) // RECORD_SIZE
+
+
+def run_chain(program, state):
+    """
+    Исполняет декодированную программу цепочкой сравнений opcode (if/elif).
+
+    Эталонная реализация прежнего цикла интерпретатора для четырёх исходных команд,
+    используется для сравнения в bench_dispatch.py.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+        state (VMState): Состояние УВМ.
+
+    Возвращает:
+        int: Количество выполненных команд.
+
+    Исключения:
+        VMError: При ошибке исполнения.
+    """
+    records = program.records
+    registers = state.registers
+    memory = state.memory
+    start = state.ip * RECORD_SIZE
+    index = start
+    end = len(records)
+    try:
+        while index < end:
+            opcode = records[index]
+            B = records[index + 1]
+            C = records[index + 2]
+            if opcode == 10:  # LOAD_CONST
+                registers[B] = C
+            elif opcode == 54:  # READ_MEM
+                if B >= len(memory):
+                    raise VMError(f"Memory read error: Address {B} out of bounds.")
+                registers[C] = memory[B]
+            elif opcode == 39:  # WRITE_MEM
+                addr = registers[C]
+                if addr >= len(memory):
+                    raise VMError(f"Memory write error: Address {addr} out of bounds.")
+                memory[addr] = registers[B]
+            elif opcode == 18:  # POPCNT
+                if C >= len(memory):
+                    raise VMError(f"Memory popcnt error: Address {C} out of bounds.")
+                memory[C] = popcnt(memory[C])
+                registers[B] = memory[C]
+            else:
+                raise VMError(f"Unknown opcode at pc={C}: {B}")
+            index += RECORD_SIZE
+    finally:
+        state.ip = index // RECORD_SIZE
+    return (index - start) // RECORD_SIZE
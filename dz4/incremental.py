@@ -0,0 +1,347 @@
+import hashlib  # Хэши блоков исходного файла
+import io  # Построчное чтение изменённого участка
+import json  # Метаданные кэша
+import os  # Временные файлы и копирование диапазонов
+from array import array  # Компактные таблицы по строкам
+
+from assembler import LOG_SEPARATOR, AssemblyError, assemble_instruction, format_log_entry  # Ассемблирование строк
+from isa import INSTRUCTIONS  # Спецификация системы команд: её изменение делает кэш недействительным
+
+# Сигнатура файла кэша и версия его формата
+CACHE_MAGIC = b'UVMI\x01\x00\x00\x00'
+
+# Размер блока исходного файла, по хэшам которых ищутся неизменённые начало и конец
+BLOCK_SIZE = 1 << 14
+
+# Начало файла лога в формате 'json' с хотя бы одной записью
+_JSON_LOG_HEAD = b'[\n  '
+
+_SEPARATOR = LOG_SEPARATOR.encode()
+
+# Подпись системы команд: кэш, построенный для другой спецификации, не используется
+_ISA_SIGNATURE = hashlib.sha1(repr(INSTRUCTIONS).encode()).hexdigest()
+
+
+def _digest(block):
+    return hashlib.sha1(block, usedforsecurity=False).digest()
+
+
+def _block_hashes(data, from_end=False, start_block=0):
+    # Хэши блоков, выровненных от начала файла или от его конца (первый — последние BLOCK_SIZE байтов).
+    # Генератор: при сравнении с кэшем хэши вычисляются, только пока блоки совпадают.
+    view = memoryview(data)
+    size = len(data)
+    for offset in range(start_block * BLOCK_SIZE, size, BLOCK_SIZE):
+        if from_end:
+            yield _digest(view[max(0, size - offset - BLOCK_SIZE):size - offset])
+        else:
+            yield _digest(view[offset:offset + BLOCK_SIZE])
+
+
+def _matching_blocks(new_hashes, old_hashes):
+    # Количество совпадающих подряд блоков
+    count = 0
+    for new_hash, old_hash in zip(new_hashes, old_hashes):
+        if new_hash != old_hash:
+            break
+        count += 1
+    return count
+
+
+class _Cache:
+    # Содержимое файла кэша: хэши блоков исходного файла прошлого запуска и таблицы по строкам
+
+    def __init__(self, meta, prefix_hashes, suffix_hashes, binary_lengths, log_lengths):
+        self.meta = meta
+        self.prefix_hashes = prefix_hashes
+        self.suffix_hashes = suffix_hashes
+        self.binary_lengths = binary_lengths  # array('B'): длина кода каждой строки
+        self.log_lengths = log_lengths  # array('I'): длина записи лога каждой строки (с разделителем)
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_cache(cache_file, binary_file, log_file, log_format):
+    """
+    Читает кэш инкрементального ассемблирования, если он пригоден для текущего запуска.
+
+    Кэш пригоден, если он построен для той же системы команд и формата лога, а выходные
+    файлы прошлого запуска (из которых берутся неизменённые фрагменты) не изменялись.
+
+    Параметры:
+        cache_file (str): Путь к файлу кэша.
+        binary_file (str): Путь к бинарному файлу.
+        log_file (str): Путь к файлу лога или None.
+        log_format (str): Формат лога.
+
+    Возвращает:
+        _Cache | None: Кэш или None, если нужна полная сборка.
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            meta = json.loads(f.readline())
+            if meta['isa'] != _ISA_SIGNATURE or meta['block_size'] != BLOCK_SIZE:
+                return None
+            if meta['log_format'] != (log_format if log_file else None):
+                return None
+            if meta['binary'] != _file_stamp(binary_file):
+                return None
+            if log_file and meta['log'] != _file_stamp(log_file):
+                return None
+
+            digest_size = hashlib.sha1().digest_size
+            data = f.read(meta['prefix_blocks'] * digest_size)
+            prefix_hashes = [data[i:i + digest_size] for i in range(0, len(data), digest_size)]
+            data = f.read(meta['suffix_blocks'] * digest_size)
+            suffix_hashes = [data[i:i + digest_size] for i in range(0, len(data), digest_size)]
+            binary_lengths = array('B')
+            binary_lengths.fromfile(f, meta['lines'])
+            log_lengths = array('I')
+            if log_file:
+                log_lengths.fromfile(f, meta['lines'])
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+    return _Cache(meta, prefix_hashes, suffix_hashes, binary_lengths, log_lengths)
+
+
+def _split_sums(lengths, prefix_lines, suffix_start, total):
+    # Суммы длин для строк начала и конца; непосредственно суммируется меньшая из двух частей,
+    # другая получается из общей суммы, известной по размеру выходного файла
+    middle = sum(lengths[prefix_lines:suffix_start])
+    if prefix_lines <= len(lengths) - suffix_start:
+        prefix = sum(lengths[:prefix_lines])
+        return prefix, total - prefix - middle
+    suffix = sum(lengths[suffix_start:])
+    return total - suffix - middle, suffix
+
+
+def _save_cache(cache_file, meta, prefix_hashes, suffix_hashes, binary_lengths, log_lengths):
+    meta = dict(meta, prefix_blocks=len(prefix_hashes), suffix_blocks=len(suffix_hashes), lines=len(binary_lengths))
+    tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(json.dumps(meta).encode() + b'\n')
+        f.write(b''.join(prefix_hashes))
+        f.write(b''.join(suffix_hashes))
+        binary_lengths.tofile(f)
+        log_lengths.tofile(f)
+    os.replace(tmp_path, cache_file)
+
+
+def _encode_lines(data, first_line_number, log_format):
+    # Ассемблирует строки изменённого участка; возвращает код, тексты записей лога и таблицы по строкам
+    binary = bytearray()
+    log = []
+    binary_lengths = array('B')
+    log_lengths = array('I')
+    for line_number, raw in enumerate(io.BytesIO(data), first_line_number):
+        line = raw.decode()
+        try:
+            binary_instr, log_entry = assemble_instruction(line)
+        except Exception as e:
+            raise AssemblyError(line_number, line.strip(), e)
+        binary_lengths.append(len(binary_instr) if binary_instr else 0)
+        if binary_instr:
+            binary += binary_instr
+        if log_entry and log_format:
+            text = format_log_entry(log_entry, log_format)
+            if log_format == 'json':
+                text += LOG_SEPARATOR
+            text = text.encode()
+            log.append(text)
+            log_lengths.append(len(text))
+        else:
+            log_lengths.append(0)
+    return bytes(binary), b''.join(log), binary_lengths, log_lengths
+
+
+def _copy_range(src, dst, offset, length):
+    # Копирует диапазон файла; на Linux — внутри ядра, без чтения в память процесса
+    if length <= 0:
+        return
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while length > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), length, offset)
+                if copied == 0:
+                    break
+                offset += copied
+                length -= copied
+            if length == 0:
+                return
+        except OSError:
+            pass
+    src.seek(offset)
+    dst.seek(0, 2)
+    dst.write(src.read(length))
+
+
+def _write_spliced(out, old, old_body_start, old_body_size, prefix, middle, suffix, virtual_tail=b''):
+    # Записывает prefix байтов начала старого тела, новый участок и suffix байтов конца старого тела.
+    # virtual_tail — байты в конце старого тела, которых нет в файле (последний разделитель лога 'json').
+    real_size = max(0, old_body_size - len(virtual_tail))
+    out.flush()
+    _copy_range(old, out, old_body_start, min(prefix, real_size))
+    out.seek(0, 2)
+    if prefix > real_size:
+        out.write(virtual_tail[:prefix - real_size])
+    out.write(middle)
+    suffix_start = old_body_size - suffix
+    out.flush()
+    _copy_range(old, out, old_body_start + suffix_start, max(0, real_size - suffix_start))
+    out.seek(0, 2)
+    if suffix:
+        out.write(virtual_tail[max(0, suffix_start - real_size):])
+
+
+def assemble_incremental(source_file, binary_file, log_file=None, log_format='json', cache_file=None):
+    """
+    Инкрементально ассемблирует исходный файл, повторно кодируя только изменённые строки.
+
+    По хэшам блоков исходного файла из кэша определяются неизменённые начало и конец файла
+    (с точностью до целых строк). Заново ассемблируются только строки между ними, а бинарный
+    файл и лог собираются из фрагментов прошлого запуска и нового участка. Результат побайтно
+    совпадает с полным ассемблированием.
+
+    Параметры:
+        source_file (str): Путь к исходному файлу.
+        binary_file (str): Путь к бинарному файлу.
+        log_file (str): Путь к файлу лога или None.
+        log_format (str): Формат лога: 'json' или 'jsonl'.
+        cache_file (str): Путь к файлу кэша (по умолчанию binary_file + '.uvmi').
+
+    Возвращает:
+        dict: Статистика: количество строк, заново ассемблированных строк и была ли сборка полной.
+
+    Исключения:
+        AssemblyError: При ошибке в строке исходного кода (выходные файлы и кэш не изменяются).
+    """
+    cache_file = cache_file or binary_file + '.uvmi'
+    with open(source_file, 'rb') as f:
+        source = f.read()
+    size = len(source)
+
+    cache = load_cache(cache_file, binary_file, log_file, log_format)
+    prefix = suffix = 0
+    prefix_blocks = suffix_blocks = 0
+    if cache is not None:
+        old_size = cache.meta['source_size']
+        # Неизменённое начало: совпадающие блоки от начала файла
+        prefix_blocks = _matching_blocks(_block_hashes(source), cache.prefix_hashes)
+        prefix = min(prefix_blocks * BLOCK_SIZE, size, old_size)
+        # Неизменённый конец: совпадающие блоки от конца файла, не пересекающиеся с началом
+        suffix_blocks = _matching_blocks(_block_hashes(source, from_end=True), cache.suffix_hashes)
+        suffix = min(suffix_blocks * BLOCK_SIZE, size - prefix, old_size - prefix)
+
+    # Строки, полностью лежащие в неизменённом начале, и строки, начинающиеся в неизменённом конце
+    # (перевод строки перед ними тоже лежит в неизменённом конце)
+    prefix_lines = source.count(b'\n', 0, prefix)
+    middle_start = source.rfind(b'\n', 0, prefix) + 1
+    middle_end = size
+    if suffix:
+        newline = source.find(b'\n', size - suffix)
+        if newline >= 0:
+            middle_end = newline + 1
+    suffix_lines = 0
+    if middle_end < size:
+        suffix_lines = source.count(b'\n', middle_end) + (0 if source.endswith(b'\n') else 1)
+
+    middle_binary, middle_log, middle_binary_lengths, middle_log_lengths = _encode_lines(
+        source[middle_start:middle_end], prefix_lines + 1, log_format if log_file else None)
+
+    binary_prefix = binary_suffix = log_prefix = log_suffix = old_log_body = 0
+    old_binary_lengths = array('B')
+    old_log_lengths = array('I')
+    if cache is not None:
+        old_binary_lengths = cache.binary_lengths
+        old_log_lengths = cache.log_lengths
+        suffix_start = cache.meta['lines'] - suffix_lines
+        binary_prefix, binary_suffix = _split_sums(old_binary_lengths, prefix_lines, suffix_start,
+                                                   cache.meta['binary'][0])
+        if log_file:
+            old_log_body = cache.meta['log_body']
+            log_prefix, log_suffix = _split_sums(old_log_lengths, prefix_lines, suffix_start, old_log_body)
+    suffix_start = len(old_binary_lengths) - suffix_lines
+
+    binary_lengths = old_binary_lengths[:prefix_lines] + middle_binary_lengths + old_binary_lengths[suffix_start:]
+    log_lengths = array('I')
+    if log_file:
+        log_lengths = old_log_lengths[:prefix_lines] + middle_log_lengths + old_log_lengths[suffix_start:]
+    log_body = log_prefix + len(middle_log) + log_suffix
+
+    # Выходные файлы собираются во временных файлах и заменяются только после успешной сборки
+    binary_tmp = binary_file + '.tmp'
+    log_tmp = log_file + '.tmp' if log_file else None
+    try:
+        with open(binary_tmp, 'wb') as out:
+            if cache is None:
+                out.write(middle_binary)
+            else:
+                with open(binary_file, 'rb') as old:
+                    _write_spliced(out, old, 0, cache.meta['binary'][0], binary_prefix, middle_binary,
+                                   binary_suffix)
+
+        if log_file:
+            with open(log_tmp, 'wb') as out:
+                _write_log(out, cache is not None, log_file, log_format, old_log_body, log_prefix, middle_log,
+                           log_suffix, log_body)
+    except BaseException:
+        for path in (binary_tmp, log_tmp):
+            if path and os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.replace(binary_tmp, binary_file)
+    if log_file:
+        os.replace(log_tmp, log_file)
+
+    # Хэши совпавших блоков берутся из кэша, остальные вычисляются заново
+    prefix_hashes = (cache.prefix_hashes[:prefix_blocks] if cache is not None else []) + \
+        list(_block_hashes(source, start_block=prefix_blocks))
+    suffix_hashes = (cache.suffix_hashes[:suffix_blocks] if cache is not None else []) + \
+        list(_block_hashes(source, from_end=True, start_block=suffix_blocks))
+    meta = {
+        'isa': _ISA_SIGNATURE,
+        'block_size': BLOCK_SIZE,
+        'source_size': size,
+        'log_format': log_format if log_file else None,
+        'binary': _file_stamp(binary_file),
+        'log': _file_stamp(log_file) if log_file else None,
+        'log_body': log_body,
+    }
+    _save_cache(cache_file, meta, prefix_hashes, suffix_hashes, binary_lengths, log_lengths)
+
+    return {
+        'lines': len(binary_lengths),
+        'reassembled_lines': len(middle_binary_lengths),
+        'full_rebuild': cache is None,
+    }
+
+
+def _write_log(out, spliced, log_file, log_format, old_body_size, prefix, middle, suffix, body_size):
+    # Тело лога — записи подряд; в формате 'json' после каждой записи стоит разделитель,
+    # а в файле последний разделитель заменён на '\n]' и тело предварено '[\n  '
+    is_json = log_format == 'json'
+    if is_json:
+        if body_size == 0:
+            out.write(b'[]')
+            return
+        out.write(_JSON_LOG_HEAD)
+
+    if spliced:
+        with open(log_file, 'rb') as old:
+            head = len(_JSON_LOG_HEAD) if is_json else 0
+            _write_spliced(out, old, head, old_body_size, prefix, middle, suffix,
+                           _SEPARATOR if is_json else b'')
+    else:
+        out.write(middle)
+
+    if is_json:
+        out.seek(-len(_SEPARATOR), 2)
+        out.truncate()
+        out.write(b'\n]')
@@ -1,19 +1,41 @@
 import argparse  # Модуль для парсинга аргументов командной строки
 import json  # Модуль для работы с JSON-форматом
 import sys  # Модуль для взаимодействия с интерпретатором Python
+import time  # Учёт бюджета времени между запусками
 
+from memory_backend import create_memory, memory_slice  # Типизированная память УВМ
+from profiler import Profile, open_trace  # Необязательное профилирование и трассировка
+from result_format import BINARY_FORMATS, FORMATS, write_json_compact, write_npy, write_raw  # Форматы файла-результата
+from vm import VM, VMError  # Виртуальная машина для исполнения внутри процесса
 
-def popcnt(x):
+# Код завершения при остановке по --max-steps или --time-budget до конца программы
+# (состояние сохранено в контрольную точку, исполнение можно продолжить через --restore)
+EXIT_SUSPENDED = 3
+
+
+def parse_mem_range(mem_range, memory_size):
     """
-    Функция для подсчёта количества установленных (1) битов в числе.
+    Функция для разбора диапазона памяти в формате "start:end".
 
     Параметры:
-        x (int): Входное число.
+        mem_range (str): Диапазон памяти.
+        memory_size (int): Размер памяти УВМ.
 
     Возвращает:
-        int: Количество установленных битов.
+        tuple: Начало и конец диапазона (конец не включается).
+
+    Исключения:
+        ValueError: Если формат диапазона некорректен или он выходит за границы памяти.
     """
-    return bin(x).count('1')
+    try:
+        start, end = map(int, mem_range.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid memory range format: {mem_range}. Expected format 'start:end'.")
+
+    # Проверяем, что диапазон памяти корректен
+    if not (0 <= start <= end <= memory_size):
+        raise ValueError(f"Memory range out of bounds: {mem_range}.")
+    return start, end
 
 
 def main():
@@ -23,14 +45,43 @@ def main():
     Выполняет следующие шаги:
         1. Парсит аргументы командной строки.
         2. Инициализирует память и регистры УВМ.
-        3. Загружает бинарный файл с командами УВМ.
+        3. Загружает бинарный файл с командами УВМ и декодирует его (с кэшированием).
         4. Исполняет команды последовательно, изменяя состояние регистров и памяти.
-        5. Сохраняет значения из указанного диапазона памяти в файл-результат в формате JSON.
+        5. Сохраняет значения из указанного диапазона памяти в файл-результат
+           (по умолчанию в формате JSON).
 
     Аргументы командной строки:
         binary_file (str): Путь к бинарному файлу с командами УВМ.
         result_file (str): Путь к файлу для сохранения результата выполнения.
         mem_range (str): Диапазон памяти для вывода в формате "start:end".
+        --decode-cache (str): Каталог дискового кэша декодированных и скомпилированных программ.
+        --engine (str): Способ исполнения: table (по умолчанию) или compiled.
+        --no-verify: Не проверять программу при загрузке. По умолчанию программа проверяется,
+                     как в batch.py и server.py, и некорректная команда отклоняется до исполнения
+                     ("Invalid program at pc=..."); с --no-verify ошибка выдаётся при исполнении команды.
+        --memory-size (int): Размер памяти УВМ в ячейках (по умолчанию 1024).
+        --mmap: Разместить память в разреженном анонимном отображении.
+        --mmap-file (str): Разместить память в отображаемом файле.
+        --profile (str): Файл для отчёта профилирования (JSON).
+        --profile-bucket (int): Размер корзины гистограммы обращений к памяти.
+        --trace (str): Файл для бинарной трассы исполнения.
+        --restore (str): Продолжить исполнение с состояния из файла снимка.
+        --restore-mmap: Отобразить память из файла снимка вместо чтения в массив.
+        --snapshot (str): Сохранить снимок состояния в файл.
+        --snapshot-steps (int): Сохранить снимок после указанного количества команд
+                                (по умолчанию — после завершения программы).
+        --format (str): Формат файла-результата: json (по умолчанию), json-compact,
+                        raw (32-битные числа 'little endian') или npy.
+        --max-steps (int): Остановить исполнение после указанного количества команд.
+        --time-budget (float): Остановить исполнение через указанное количество секунд.
+        --checkpoint (str): Файл контрольной точки при остановке
+                            (по умолчанию result_file + '.uvms').
+
+    Коды завершения:
+        0 — программа выполнена, результат записан;
+        1 — ошибка;
+        EXIT_SUSPENDED (3) — исполнение остановлено по лимиту, состояние записано
+                             в контрольную точку, файл-результат не создаётся.
     """
     # Создаём парсер для обработки аргументов командной строки
     parser = argparse.ArgumentParser(description='Interpreter for EVM.')
@@ -40,156 +91,153 @@ def main():
     parser.add_argument('result_file', help='Path to the result file.')
     parser.add_argument('mem_range', help='Memory range to output (start:end).')
 
+    # Необязательный каталог для дискового кэша декодированных программ
+    parser.add_argument('--decode-cache', help='Directory for caching decoded programs by content hash.')
+
+    # Способ исполнения: цикл с таблицей обработчиков или компиляция программы в функции Python
+    parser.add_argument('--engine', choices=VM.ENGINES, default='table',
+                        help='Execution engine: table dispatch loop or compiled Python code (default table).')
+
+    # Проверка программы при загрузке: некорректная программа отклоняется до исполнения
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Skip load-time verification; invalid instructions fail only when executed.')
+
+    # Параметры памяти УВМ: размер и необязательное отображение памяти (mmap)
+    parser.add_argument('--memory-size', type=int, default=1024, help='VM memory size in cells (default 1024).')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Back VM memory with a sparse anonymous memory map.')
+    parser.add_argument('--mmap-file', help='Back VM memory with a memory-mapped file.')
+
+    # Необязательное профилирование: отчёт в JSON и бинарная трасса исполнения
+    parser.add_argument('--profile', help='Write a JSON execution profile to this file.')
+    parser.add_argument('--profile-bucket', type=int, default=1,
+                        help='Memory histogram bucket size in cells (default 1).')
+    parser.add_argument('--trace', help='Write a binary execution trace to this file.')
+
+    # Снимки состояния: регистры, память и pc для продолжения исполнения без повтора общего префикса
+    parser.add_argument('--restore', help='Resume from a VM state snapshot (memory size is taken from it).')
+    parser.add_argument('--restore-mmap', action='store_true',
+                        help='Memory-map the snapshot memory instead of reading it.')
+    parser.add_argument('--snapshot', help='Write a VM state snapshot to this file.')
+    parser.add_argument('--snapshot-steps', type=int,
+                        help='Take the snapshot after this many instructions (default: at the end).')
+
+    # Ограничение работы: при остановке до конца программы состояние сохраняется в контрольную точку
+    parser.add_argument('--max-steps', type=int,
+                        help='Stop after this many instructions and write a resumable checkpoint.')
+    parser.add_argument('--time-budget', type=float,
+                        help='Stop after this many seconds and write a resumable checkpoint.')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint file written when execution stops early (default: <result_file>.uvms).')
+
+    # Формат файла-результата; двоичные форматы пишутся прямо из буфера памяти
+    parser.add_argument('--format', choices=FORMATS, default='json',
+                        help='Result format: json (default), json-compact, raw little-endian uint32 or npy.')
+
     # Парсим переданные аргументы
     args = parser.parse_args()
-
-    # Инициализируем память и регистры УВМ
-    memory = [0] * 1024  # Память УВМ: 1024 ячейки, инициализированные нулями
-    registers = [0] * 8  # Регистры УВМ: 8 регистров, инициализированных нулями
+    if args.profile_bucket < 1:
+        parser.error('--profile-bucket must be at least 1.')
+
+    # Инициализируем память и регистры УВМ: память заданного размера и 8 регистров, заполненных нулями
+    # При продолжении со снимка память берётся из него
+    memory = None
+    if not args.restore:
+        try:
+            memory = create_memory(args.memory_size, use_mmap=args.mmap, path=args.mmap_file)
+        except (OSError, ValueError) as e:
+            print(f"Memory allocation error: {e}", file=sys.stderr)
+            sys.exit(1)
+    vm = VM(cache_dir=args.decode_cache, memory=memory, engine=args.engine, verify=not args.no_verify)
 
     # Открываем бинарный файл и считываем все команды
     with open(args.binary_file, 'rb') as f:
         code = f.read()
 
-    # Инициализируем счётчик команд (Program Counter)
-    pc = 0
-    code_length = len(code)
-
-    # Главный цикл интерпретатора: выполняем команды до конца бинарного кода
-    while pc < code_length:
-        # Извлекаем opcode текущей команды (7 младших битов первого байта)
-        opcode = code[pc] & 0x7F
-
-        if opcode == 10:  # LOAD_CONST
-            """
-            Команда LOAD_CONST:
-                Формат: LOAD_CONST B C
-                Описание: Загружает константу C в регистр по адресу B.
-
-                Биты команды:
-                    A (7 бит): 10 (уже обработано через opcode)
-                    B (3 бита): адрес регистра
-                    C (24 бита): константа
-            """
-            # Извлекаем байты команды (5 байт для LOAD_CONST)
-            instr_bytes = code[pc:pc + 5]
-            # Преобразуем байты в целое число (little endian)
-            instr = int.from_bytes(instr_bytes, byteorder='little')
-            # Извлекаем поля A, B и C из инструкции
-            A = instr & 0x7F
-            B = (instr >> 7) & 0x7
-            C = (instr >> 10) & 0xFFFFFF
-            # Загружаем константу C в регистр B
-            registers[B] = C
-            # Увеличиваем счётчик команд на размер команды (5 байт)
-            pc += 5
-
-        elif opcode == 54:  # READ_MEM
-            """
-            Команда READ_MEM:
-                Формат: READ_MEM B C
-                Описание: Читает значение из памяти по адресу B и сохраняет его в регистр по адресу C.
-
-                Биты команды:
-                    A (7 бит): 54 (уже обработано через opcode)
-                    B (32 бита): адрес в памяти
-                    C (3 бита): адрес регистра
-            """
-            # Извлекаем байты команды (6 байт для READ_MEM)
-            instr_bytes = code[pc:pc + 6]
-            # Преобразуем байты в целое число (little endian)
-            instr = int.from_bytes(instr_bytes, byteorder='little')
-            # Извлекаем поля A, B и C из инструкции
-            A = instr & 0x7F
-            B = (instr >> 7) & 0xFFFFFFFF
-            C = (instr >> 39) & 0x7
-            # Читаем значение из памяти по адресу B и сохраняем в регистр C
-            if B >= len(memory):
-                print(f"Memory read error: Address {B} out of bounds.", file=sys.stderr)
-                sys.exit(1)
-            registers[C] = memory[B]
-            # Увеличиваем счётчик команд на размер команды (6 байт)
-            pc += 6
-
-        elif opcode == 39:  # WRITE_MEM
-            """
-            Команда WRITE_MEM:
-                Формат: WRITE_MEM B C
-                Описание: Записывает значение из регистра по адресу B в память по адресу, хранящемуся в регистре по адресу C.
-
-                Биты команды:
-                    A (7 бит): 39 (уже обработано через opcode)
-                    B (3 бита): адрес регистра источника
-                    C (3 бита): адрес регистра с адресом памяти
-            """
-            # Извлекаем байты команды (2 байта для WRITE_MEM)
-            instr_bytes = code[pc:pc + 2]
-            # Преобразуем байты в целое число (little endian)
-            instr = int.from_bytes(instr_bytes, byteorder='little')
-            # Извлекаем поля A, B и C из инструкции
-            A = instr & 0x7F
-            B = (instr >> 7) & 0x7
-            C = (instr >> 10) & 0x7
-            # Получаем адрес памяти из регистра C
-            addr = registers[C]
-            if addr >= len(memory):
-                print(f"Memory write error: Address {addr} out of bounds.", file=sys.stderr)
-                sys.exit(1)
-            # Записываем значение из регистра B в память по адресу addr
-            memory[addr] = registers[B]
-            # Увеличиваем счётчик команд на размер команды (2 байта)
-            pc += 2
-
-        elif opcode == 18:  # POPCNT
-            """
-            Команда POPCNT:
-                Формат: POPCNT B C
-                Описание: Выполняет операцию popcnt на значении из памяти по адресу C и сохраняет результат в регистр по адресу B.
-
-                Биты команды:
-                    A (7 бит): 18 (уже обработано через opcode)
-                    B (3 бита): адрес регистра для результата
-                    C (32 бита): адрес в памяти для операции popcnt
-            """
-            # Извлекаем байты команды (6 байт для POPCNT)
-            instr_bytes = code[pc:pc + 6]
-            # Преобразуем байты в целое число (little endian)
-            instr = int.from_bytes(instr_bytes, byteorder='little')
-            # Извлекаем поля A, B и C из инструкции
-            A = instr & 0x7F
-            B = (instr >> 7) & 0x7
-            C = (instr >> 10) & 0xFFFFFFFF
-            # Получаем адрес памяти из регистра C
-            if C >= len(memory):
-                print(f"Memory popcnt error: Address {C} out of bounds.", file=sys.stderr)
-                sys.exit(1)
-            # Выполняем popcnt на значении из памяти по адресу C и сохраняем результат в регистр B
-            memory[C] = popcnt(memory[C])
-            registers[B] = memory[C]  # Обновляем регистр B
-            # Увеличиваем счётчик команд на размер команды (6 байт)
-            pc += 6
-
-        else:
-            # Если opcode не распознан, выводим сообщение об ошибке и завершаем работу
-            print(f"Unknown opcode at pc={pc}: {opcode}", file=sys.stderr)
+    # Декодируем программу один раз (или берём готовую из кэша по хэшу содержимого)
+    vm.load(code)
+
+    # Восстанавливаем регистры, память и pc из снимка
+    if args.restore:
+        try:
+            vm.restore(args.restore, use_mmap=args.restore_mmap)
+        except (OSError, ValueError) as e:
+            print(f"Snapshot restore error: {e}", file=sys.stderr)
             sys.exit(1)
 
-    # После выполнения всех команд, извлекаем указанный диапазон памяти
+    # Инструментированный цикл используется только при запросе профиля или трассы
+    if args.profile:
+        vm.profile = Profile(bucket=args.profile_bucket)
+    if args.trace:
+        vm.trace = open_trace(args.trace)
+
+    # Исполняем команды через таблицу обработчиков, индексируемую opcode
+    max_steps = args.max_steps
+    time_budget = args.time_budget
+    suspended = False
     try:
-        start, end = map(int, args.mem_range.split(':'))
-    except ValueError:
-        print(f"Invalid memory range format: {args.mem_range}. Expected format 'start:end'.", file=sys.stderr)
+        if args.snapshot and args.snapshot_steps is not None:
+            # Снимок после заданного количества команд, затем исполнение продолжается
+            snapshot_steps = args.snapshot_steps if max_steps is None else min(args.snapshot_steps, max_steps)
+            started = time.monotonic()
+            executed = vm.run(max_steps=snapshot_steps, time_budget=time_budget)
+            if executed == args.snapshot_steps or vm.halted:
+                vm.snapshot(args.snapshot)
+            if max_steps is not None:
+                max_steps -= executed
+            if time_budget is not None:
+                # Бюджет времени общий для обоих запусков; если он исчерпан до точки снимка
+                # или сразу после неё, остаток не исполняется и записывается контрольная точка
+                time_budget -= time.monotonic() - started
+                suspended = not vm.halted and (executed < snapshot_steps or time_budget <= 0)
+        if not suspended:
+            vm.run(max_steps=max_steps, time_budget=time_budget)
+    except VMError as e:
+        # При ошибке исполнения выводим сообщение и завершаем работу
+        print(e, file=sys.stderr)
         sys.exit(1)
-
-    # Проверяем, что диапазон памяти корректен
-    if not (0 <= start <= end <= len(memory)):
-        print(f"Memory range out of bounds: {args.mem_range}.", file=sys.stderr)
+    finally:
+        # Профиль и трасса сохраняются и при ошибке исполнения
+        if vm.trace:
+            vm.trace.close()
+        if args.profile:
+            with open(args.profile, 'w') as f:
+                json.dump(vm.profile.report(), f, indent=2)
+
+    # Лимит исчерпан до конца программы: сохраняем контрольную точку вместо результата
+    if not vm.halted:
+        checkpoint = args.checkpoint or args.result_file + '.uvms'
+        vm.snapshot(checkpoint)
+        print(f"Execution suspended at pc={vm.pc}; checkpoint written to {checkpoint}.", file=sys.stderr)
+        sys.exit(EXIT_SUSPENDED)
+
+    if args.snapshot and args.snapshot_steps is None:
+        vm.snapshot(args.snapshot)
+
+    # После выполнения всех команд, проверяем указанный диапазон памяти
+    memory = vm.memory
+    try:
+        start, end = parse_mem_range(args.mem_range, len(memory))
+    except ValueError as e:
+        print(e, file=sys.stderr)
         sys.exit(1)
 
-    # Извлекаем значения из памяти в указанном диапазоне
-    result = memory[start:end]
+    # Срез памяти в указанном диапазоне (без копирования буфера)
+    view = memory_slice(memory, start, end)
+
+    # Двоичные форматы записываются прямо из буфера, без промежуточного списка
+    if args.format in BINARY_FORMATS:
+        with open(args.result_file, 'wb') as f:
+            (write_raw if args.format == 'raw' else write_npy)(view, f)
+        return
+
+    if args.format == 'json-compact':
+        with open(args.result_file, 'w') as f:
+            write_json_compact(view, f)
+        return
 
     # Записываем результат в файл-результат в формате JSON
+    result = view.tolist()
     with open(args.result_file, 'w') as f:
         json.dump(result, f, indent=2)
 
@@ -0,0 +1,103 @@
+from collections import namedtuple  # Неизменяемые записи описания команд
+
+# Описание команды УВМ:
+#   name — мнемоника, opcode — значение поля A (биты 0-6), length — длина в байтах,
+#   fields — поля операндов в порядке записи в исходном коде: (имя, смещение в битах, ширина в битах)
+InstructionSpec = namedtuple('InstructionSpec', ['name', 'opcode', 'length', 'fields'])
+
+# Поле A (opcode) всегда занимает биты 0-6
+OPCODE_BITS = 7
+OPCODE_MASK = (1 << OPCODE_BITS) - 1
+
+# Система команд УВМ (вариант 5). Чтобы добавить команду, достаточно добавить строку
+# в этот список и обработчик в dispatch.HANDLERS.
+INSTRUCTIONS = (
+    # LOAD_CONST B C: загружает константу C в регистр B
+    InstructionSpec('LOAD_CONST', 10, 5, (('B', 7, 3), ('C', 10, 24))),
+    # READ_MEM B C: читает ячейку памяти B в регистр C
+    InstructionSpec('READ_MEM', 54, 6, (('B', 7, 32), ('C', 39, 3))),
+    # WRITE_MEM B C: записывает регистр B в ячейку памяти по адресу из регистра C
+    InstructionSpec('WRITE_MEM', 39, 2, (('B', 7, 3), ('C', 10, 3))),
+    # POPCNT B C: popcnt ячейки памяти C, результат в ячейку C и регистр B
+    InstructionSpec('POPCNT', 18, 6, (('B', 7, 3), ('C', 10, 32))),
+    # VPOPCNT B C: popcnt каждой ячейки памяти в диапазоне [B, B + C), результат на месте
+    InstructionSpec('VPOPCNT', 19, 9, (('B', 7, 32), ('C', 39, 32))),
+)
+
+# Команды по мнемонике и по opcode
+BY_NAME = {spec.name: spec for spec in INSTRUCTIONS}
+BY_OPCODE = {spec.opcode: spec for spec in INSTRUCTIONS}
+
+# Значения поля A по мнемонике
+OPCODES = {spec.name: spec.opcode for spec in INSTRUCTIONS}
+
+
+def _build_encoders():
+    # Для каждой команды заранее вычисляем (opcode, длина, поля: (имя, сдвиг, максимум))
+    encoders = {}
+    for spec in INSTRUCTIONS:
+        fields = tuple((name, offset, (1 << width) - 1) for name, offset, width in spec.fields)
+        encoders[spec.name] = (spec.opcode, spec.length, fields)
+    return encoders
+
+
+def _build_decoders():
+    # Для каждого opcode заранее вычисляем (длина, сдвиг B, маска B, сдвиг C, маска C)
+    decoders = {}
+    for spec in INSTRUCTIONS:
+        (_, b_offset, b_width), (_, c_offset, c_width) = spec.fields
+        decoders[spec.opcode] = (spec.length, b_offset, (1 << b_width) - 1, c_offset, (1 << c_width) - 1)
+    return decoders
+
+
+ENCODERS = _build_encoders()
+DECODE_FORMATS = _build_decoders()
+
+
+def encode(name, operands):
+    """
+    Функция для кодирования одной команды по описанию системы команд.
+
+    Параметры:
+        name (str): Мнемоника команды в верхнем регистре.
+        operands (list[int]): Значения полей операндов в порядке записи.
+
+    Возвращает:
+        tuple: Бинарная команда (bytes) и словарь с полями команды для лога.
+
+    Исключения:
+        ValueError: Если мнемоника неизвестна или значение поля вне допустимого диапазона.
+    """
+    encoder = ENCODERS.get(name)
+    if encoder is None:
+        raise ValueError(f"Unknown opcode: {name}")
+    opcode, length, fields = encoder
+
+    instruction = opcode
+    log_entry = {'A': opcode}
+    for (field, shift, limit), value in zip(fields, operands):
+        if not (0 <= value <= limit):
+            raise ValueError(f"Field {field}={value} out of range for {name} (0-{limit})")
+        instruction |= value << shift
+        log_entry[field] = value
+
+    return instruction.to_bytes(length, byteorder='little'), log_entry
+
+
+def decode(code, pc=0):
+    """
+    Функция для декодирования одной команды из бинарного кода.
+
+    Параметры:
+        code (bytes): Бинарный код.
+        pc (int): Смещение команды.
+
+    Возвращает:
+        tuple: (spec, поля операндов в порядке описания) или (None, opcode) для неизвестной команды.
+    """
+    opcode = code[pc] & OPCODE_MASK
+    spec = BY_OPCODE.get(opcode)
+    if spec is None:
+        return None, opcode
+    instr = int.from_bytes(code[pc:pc + spec.length], byteorder='little')
+    return spec, tuple((instr >> offset) & ((1 << width) - 1) for _, offset, width in spec.fields)
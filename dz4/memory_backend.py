@@ -0,0 +1,107 @@
+import mmap  # Отображение памяти УВМ на виртуальную память процесса или файл
+import sys  # Модуль для определения платформы
+import weakref  # Учёт анонимных отображений без продления их жизни
+from array import array  # Компактные типизированные массивы
+
+# Ячейка памяти УВМ — беззнаковое 32-битное число (адреса и значения не превышают 32 бит)
+CELL_TYPECODE = 'I'
+CELL_SIZE = array(CELL_TYPECODE).itemsize
+
+# Команды УВМ адресуют память 32-битными адресами
+MAX_MEMORY_SIZE = 1 << 32
+
+# Флаг MAP_NORESERVE (Linux): не резервировать память под всё отображение сразу.
+# Без него ядро может отказать в отображении размером больше физической памяти.
+_MAP_NORESERVE = getattr(mmap, 'MAP_NORESERVE', 0x4000 if sys.platform.startswith('linux') else 0)
+
+# Анонимные отображения, которые можно обнулять через madvise
+_anonymous_buffers = weakref.WeakSet()
+
+# Размер порции при обнулении больших областей памяти (в ячейках)
+_CLEAR_CHUNK = 1 << 18
+
+
+def create_memory(size, use_mmap=False, path=None):
+    """
+    Функция для создания памяти УВМ заданного размера.
+
+    По умолчанию память — типизированный массив array('I'). В режиме mmap память
+    отображается на анонимную область (или на файл, если указан path) и видна как
+    memoryview с форматом 'I'. Такие страницы выделяются операционной системой
+    только при первом обращении, поэтому многогигабайтное адресное пространство
+    можно использовать разреженно.
+
+    Параметры:
+        size (int): Размер памяти в ячейках.
+        use_mmap (bool): Использовать отображение памяти вместо массива.
+        path (str): Файл для отображения памяти (подразумевает use_mmap); прежнее
+                    содержимое файла не сохраняется.
+
+    Возвращает:
+        array | memoryview: Память УВМ, поддерживающая len(), индексы и срезы.
+
+    Исключения:
+        ValueError: Если размер памяти вне диапазона 1..2**32.
+    """
+    if not (0 < size <= MAX_MEMORY_SIZE):
+        raise ValueError(f"Memory size {size} out of range (1-{MAX_MEMORY_SIZE}).")
+
+    if path is not None:
+        # Содержимое файла от прошлого запуска отбрасывается, и файл расширяется до нужного
+        # размера без записи данных: память начинается с нулей, файл остаётся разреженным
+        with open(path, 'w+b') as f:
+            f.truncate(size * CELL_SIZE)
+            buffer = mmap.mmap(f.fileno(), size * CELL_SIZE)
+        return memoryview(buffer).cast(CELL_TYPECODE)
+
+    if use_mmap:
+        if hasattr(mmap, 'MAP_ANONYMOUS'):
+            flags = mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS | _MAP_NORESERVE
+            buffer = mmap.mmap(-1, size * CELL_SIZE, flags=flags)
+            _anonymous_buffers.add(buffer)
+        else:
+            buffer = mmap.mmap(-1, size * CELL_SIZE)
+        return memoryview(buffer).cast(CELL_TYPECODE)
+
+    return array(CELL_TYPECODE, [0]) * size
+
+
+def memory_slice(memory, start, end):
+    """
+    Возвращает срез памяти УВМ без копирования данных.
+
+    Параметры:
+        memory: Память УВМ, созданная create_memory (или любой буфер с форматом 'I').
+        start (int): Начало диапазона.
+        end (int): Конец диапазона (не включается).
+
+    Возвращает:
+        memoryview: Представление ячеек [start, end) поверх буфера памяти.
+    """
+    return memoryview(memory)[start:end]
+
+
+def clear_memory(memory):
+    """
+    Обнуляет память УВМ на месте, не выделяя буфер размером со всю память.
+
+    Для анонимного отображения страницы возвращаются операционной системе
+    (madvise MADV_DONTNEED), после чего они снова читаются как нули.
+
+    Параметры:
+        memory: Память УВМ.
+    """
+    if isinstance(memory, list):
+        memory[:] = [0] * len(memory)
+        return
+
+    view = memoryview(memory)
+    buffer = view.obj
+    if isinstance(buffer, mmap.mmap) and buffer in _anonymous_buffers and hasattr(mmap, 'MADV_DONTNEED'):
+        buffer.madvise(mmap.MADV_DONTNEED)
+        return
+
+    zeros = array(CELL_TYPECODE, [0]) * min(_CLEAR_CHUNK, len(view))
+    for offset in range(0, len(view), _CLEAR_CHUNK):
+        chunk = view[offset:offset + _CLEAR_CHUNK]
+        chunk[:] = zeros[:len(chunk)]
@@ -0,0 +1,163 @@
+from popcount import popcnt  # Подсчёт битов для известных значений ячеек
+
+# Максимальная константа LOAD_CONST (поле C занимает 24 бита)
+MAX_CONST = (1 << 24) - 1
+
+# Количество регистров УВМ
+REGISTER_COUNT = 8
+
+
+class Instruction:
+    """
+    Команда УВМ в оптимизаторе.
+
+    Атрибуты:
+        name (str): Мнемоника команды.
+        operands (tuple): Значения полей в порядке записи в исходном коде.
+        line_number (int): Номер строки исходного кода.
+    """
+
+    __slots__ = ('name', 'operands', 'line_number')
+
+    def __init__(self, name, operands, line_number=None):
+        self.name = name
+        self.operands = tuple(operands)
+        self.line_number = line_number
+
+    def __str__(self):
+        return f"{self.name} {' '.join(map(str, self.operands))}"
+
+    def __eq__(self, other):
+        return isinstance(other, Instruction) and (self.name, self.operands) == (other.name, other.operands)
+
+    def __repr__(self):
+        return f"Instruction({self.name!r}, {self.operands!r}, {self.line_number!r})"
+
+
+def _eliminate_redundant_loads(instructions, report):
+    # Прямой проход: для каждого регистра и каждой известной ячейки хранится значение —
+    # константа ('const', v) или неизвестное значение ('value', n), одинаковое у всех его копий.
+    # Ячейка становится известной только после обращения к ней в программе, поэтому адрес
+    # уже проверен при исполнении, и удаление или замена чтения не скрывает ошибку границ.
+    registers = [None] * REGISTER_COUNT
+    cells = {}
+    counter = 0
+    result = []
+
+    def new_value():
+        nonlocal counter
+        counter += 1
+        return ('value', counter)
+
+    for index, instr in enumerate(instructions):
+        name = instr.name
+        if name == 'LOAD_CONST':
+            B, C = instr.operands
+            value = ('const', C)
+            if registers[B] == value:
+                report.append(_entry(instr, 'removed', 'register already holds this constant'))
+                continue
+            registers[B] = value
+        elif name == 'READ_MEM':
+            B, C = instr.operands
+            known = cells.get(B)
+            if known is not None:
+                if registers[C] == known:
+                    report.append(_entry(instr, 'removed', 'register already holds the cell value'))
+                    continue
+                if known[0] == 'const' and known[1] <= MAX_CONST:
+                    replacement = Instruction('LOAD_CONST', (C, known[1]), instr.line_number)
+                    report.append(_entry(instr, 'replaced', 'cell value is known', replacement))
+                    registers[C] = known
+                    result.append(replacement)
+                    continue
+                registers[C] = known
+            else:
+                registers[C] = cells[B] = new_value()
+        elif name == 'WRITE_MEM':
+            B, C = instr.operands
+            address = registers[C]
+            if registers[B] is None:
+                registers[B] = new_value()
+            if address is not None and address[0] == 'const':
+                cells[address[1]] = registers[B]
+            else:
+                # Адрес неизвестен: запись могла изменить любую ячейку
+                cells.clear()
+        elif name == 'POPCNT':
+            B, C = instr.operands
+            known = cells.get(C)
+            value = ('const', popcnt(known[1])) if known is not None and known[0] == 'const' else new_value()
+            registers[B] = cells[C] = value
+        elif name == 'VPOPCNT':
+            B, C = instr.operands
+            for address in [address for address in cells if B <= address < B + C]:
+                del cells[address]
+        else:
+            # Неизвестная команда: ничего о состоянии предположить нельзя
+            registers = [None] * REGISTER_COUNT
+            cells.clear()
+        result.append(instr)
+    return result
+
+
+def _eliminate_dead_stores(instructions, report):
+    # Обратный проход: overwritten[r] — следующее обращение к регистру r является записью.
+    # В конце программы регистры считаются прочитанными, чтобы их итоговые значения не изменились.
+    # Удаляются только LOAD_CONST: READ_MEM и POPCNT могут завершиться ошибкой или изменяют память.
+    overwritten = [False] * REGISTER_COUNT
+    kept = []
+    for instr in reversed(instructions):
+        name = instr.name
+        if name == 'LOAD_CONST':
+            B = instr.operands[0]
+            if overwritten[B]:
+                report.append(_entry(instr, 'removed', 'register is overwritten before it is read'))
+                continue
+            overwritten[B] = True
+        elif name == 'READ_MEM':
+            overwritten[instr.operands[1]] = True
+        elif name == 'POPCNT':
+            overwritten[instr.operands[0]] = True
+        elif name == 'WRITE_MEM':
+            B, C = instr.operands
+            overwritten[B] = overwritten[C] = False
+        elif name != 'VPOPCNT':
+            overwritten = [False] * REGISTER_COUNT
+        kept.append(instr)
+    kept.reverse()
+    return kept
+
+
+def _entry(instr, action, reason, replacement=None):
+    entry = {'line': instr.line_number, 'instruction': str(instr), 'action': action, 'reason': reason}
+    if replacement is not None:
+        entry['replacement'] = str(replacement)
+    return entry
+
+
+def optimize(instructions):
+    """
+    Оптимизирует последовательность команд УВМ.
+
+    Выполняются два прохода:
+        1. Устранение избыточных загрузок: READ_MEM ячейки с известным значением заменяется
+           на LOAD_CONST или удаляется, если регистр уже содержит это значение; повторный
+           LOAD_CONST той же константы удаляется.
+        2. Устранение мёртвых записей: LOAD_CONST в регистр, который перезаписывается
+           до первого чтения, удаляется.
+
+    Итоговое состояние памяти и регистров после успешного исполнения не меняется.
+
+    Параметры:
+        instructions (list[Instruction]): Команды программы.
+
+    Возвращает:
+        tuple: Оптимизированный список команд и список записей отчёта
+               (номер строки, команда, действие, причина и, для замены, новая команда).
+    """
+    report = []
+    result = _eliminate_redundant_loads(instructions, report)
+    result = _eliminate_dead_stores(result, report)
+    report.sort(key=lambda entry: (entry['line'] is None, entry['line'] or 0))
+    return result, report
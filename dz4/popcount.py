@@ -0,0 +1,169 @@
+from array import array  # Компактные типизированные массивы
+
+try:
+    import numpy as np  # Необязательная зависимость для векторизованного подсчёта
+except ImportError:
+    np = None
+
+# Количество установленных битов для каждого значения байта (0-255)
+BYTE_TABLE = bytes(bin(i).count('1') for i in range(256))
+
+# Типы массивов для беззнаковых элементов по размеру элемента в байтах
+_UNSIGNED_TYPECODES = {array(code).itemsize: code for code in ('Q', 'L', 'I', 'H', 'B')}
+
+# Начиная с этой длины списка выгоднее переводить данные в NumPy
+NUMPY_THRESHOLD = 64
+
+BACKENDS = ('auto', 'numpy', 'table', 'python')
+
+# int.bit_count доступен начиная с Python 3.10
+HAS_BIT_COUNT = hasattr(int, 'bit_count')
+
+
+if HAS_BIT_COUNT:
+    def popcnt(x):
+        """
+        Функция для подсчёта количества установленных (1) битов в числе.
+
+        Параметры:
+            x (int): Входное число.
+
+        Возвращает:
+            int: Количество установленных битов.
+        """
+        return x.bit_count()
+else:
+    def popcnt(x):
+        """
+        Функция для подсчёта количества установленных (1) битов в числе (Python < 3.10).
+
+        Параметры:
+            x (int): Входное число.
+
+        Возвращает:
+            int: Количество установленных битов.
+        """
+        return bin(x).count('1')
+
+
+def _popcnt_numpy(values):
+    # Векторизованный подсчёт для массива NumPy с целыми беззнаковыми элементами
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    table = np.frombuffer(BYTE_TABLE, dtype=np.uint8)
+    counts = table[np.ascontiguousarray(values).view(np.uint8)]
+    return counts.reshape(values.shape + (values.dtype.itemsize,)).sum(axis=-1, dtype=np.uint8)
+
+
+def popcnt_table(buffer):
+    """
+    Подсчёт битов через таблицу для байтов, без NumPy.
+
+    Все байты буфера переводятся в количества битов одной операцией bytes.translate,
+    затем количества по байтам каждого элемента складываются умножением на 0x0101...01.
+
+    Параметры:
+        buffer: Буфер с беззнаковыми целыми элементами (array, memoryview, bytes).
+
+    Возвращает:
+        list[int]: Количество установленных битов для каждого элемента.
+    """
+    view = memoryview(buffer)
+    itemsize = view.itemsize
+    typecode = _UNSIGNED_TYPECODES.get(itemsize)
+    if typecode is None:
+        raise ValueError(f"Unsupported element size: {itemsize}")
+    counts = array(typecode, view.cast('B').tobytes().translate(BYTE_TABLE))
+    if itemsize == 1:
+        return counts.tolist()
+    # Сумма байтов элемента оказывается в его старшем байте (каждое слагаемое не больше 8)
+    bits = itemsize * 8
+    multiplier = int.from_bytes(b'\x01' * itemsize, 'little')
+    mask = (1 << bits) - 1
+    shift = bits - 8
+    return [((v * multiplier) & mask) >> shift for v in counts]
+
+
+def popcnt_array(values, backend='auto'):
+    """
+    Применяет popcnt поэлементно к последовательности чисел любой длины.
+
+    Параметры:
+        values: Список целых чисел, буфер (array, memoryview) или массив NumPy.
+        backend (str): 'numpy' — векторизованный подсчёт NumPy, 'table' — таблица для байтов
+                       (только для буферов с беззнаковыми элементами), 'python' — int.bit_count
+                       для каждого элемента, 'auto' — выбор самого быстрого доступного способа.
+
+    Возвращает:
+        list[int] | numpy.ndarray: Количество установленных битов для каждого элемента
+        (массив NumPy, если на вход передан массив NumPy).
+
+    Исключения:
+        ValueError: Если запрошенный способ подсчёта недоступен.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown popcount backend: {backend}")
+    if backend == 'numpy' and np is None:
+        raise ValueError("NumPy is not installed.")
+
+    if np is not None and isinstance(values, np.ndarray):
+        if backend in ('auto', 'numpy'):
+            return _popcnt_numpy(values)
+        values = values.tolist() if backend == 'python' else values
+
+    is_buffer = isinstance(values, (array, memoryview, bytes, bytearray))
+
+    if backend == 'auto':
+        if np is not None and (is_buffer or len(values) >= NUMPY_THRESHOLD):
+            backend = 'numpy'
+        elif is_buffer and not HAS_BIT_COUNT:
+            # Без int.bit_count таблица для байтов быстрее, чем bin(x).count для каждого элемента
+            backend = 'table'
+        else:
+            backend = 'python'
+
+    if backend == 'numpy':
+        if is_buffer:
+            return _popcnt_numpy(np.frombuffer(values, dtype=f'u{memoryview(values).itemsize}')).tolist()
+        data = np.asarray(values)
+        if data.dtype.kind not in 'iu' or (data.dtype.kind == 'i' and data.size and data.min() < 0):
+            # Отрицательные и длинные числа NumPy не представляет без потерь: считаем поэлементно
+            return [popcnt(x) for x in values]
+        return _popcnt_numpy(data.astype(np.uint64, copy=False)).tolist()
+
+    if backend == 'table':
+        if not is_buffer:
+            try:
+                values = array('Q', values)
+            except OverflowError:
+                # Отрицательные и длинные числа не помещаются в 64-битные элементы
+                return [popcnt(x) for x in values]
+        return popcnt_table(values)
+
+    return [popcnt(x) for x in values]
+
+
+def popcnt_inplace(memory, start, end):
+    """
+    Заменяет каждую ячейку памяти в диапазоне [start, end) количеством её установленных битов.
+
+    Для буферов (array, memoryview поверх mmap) работа выполняется на месте: с NumPy —
+    одной векторной операцией над представлением буфера, без NumPy — через popcnt_array.
+
+    Параметры:
+        memory: Память УВМ (список, array или memoryview с беззнаковыми элементами).
+        start (int): Начало диапазона.
+        end (int): Конец диапазона (не включается).
+    """
+    if isinstance(memory, list):
+        memory[start:end] = [popcnt(x) for x in memory[start:end]]
+        return
+
+    view = memoryview(memory)[start:end]
+    if not len(view):
+        return
+    if np is not None:
+        cells = np.frombuffer(view, dtype=f'u{view.itemsize}')
+        cells[...] = _popcnt_numpy(cells)
+        return
+    view[:] = array(view.format, popcnt_array(view))
@@ -0,0 +1,209 @@
+import struct  # Упаковка записей бинарной трассы
+import time  # Измерение времени исполнения команд
+from collections import Counter  # Гистограммы адресов и pc
+
+from decoder import RECORD_SIZE  # Размер записи декодированной команды
+from dispatch import HANDLERS  # Таблица обработчиков команд
+from isa import BY_OPCODE, OPCODE_MASK, OPCODES  # Общая спецификация системы команд УВМ
+
+# Формат файла трассы: сигнатура, затем записи (pc, opcode, B, C) в порядке 'little endian'
+TRACE_MAGIC = b'UVMT\x01'
+TRACE_RECORD = struct.Struct('<QBII')
+
+# Размер буфера трассы, после которого он сбрасывается в файл
+_TRACE_FLUSH_SIZE = 1 << 16
+
+_READ_MEM = OPCODES['READ_MEM']
+_WRITE_MEM = OPCODES['WRITE_MEM']
+_POPCNT = OPCODES['POPCNT']
+_VPOPCNT = OPCODES['VPOPCNT']
+
+
+class Profile:
+    """
+    Накопленная статистика исполнения программы УВМ.
+
+    Атрибуты:
+        counts (list[int]): Количество выполненных команд по opcode (0-127).
+        times (list[int]): Суммарное время исполнения по opcode в наносекундах.
+        pcs (Counter): Количество исполнений по pc команды.
+        reads (Counter): Гистограмма чтений памяти по корзинам адресов.
+        writes (Counter): Гистограмма записей в память по корзинам адресов.
+        bucket (int): Размер корзины гистограммы в ячейках.
+        position (tuple): (программа, номер команды, pc), на которых остановился run_profiled;
+                          при продолжении с того же места pc не пересчитывается.
+    """
+
+    def __init__(self, bucket=1):
+        self.counts = [0] * (OPCODE_MASK + 1)
+        self.times = [0] * (OPCODE_MASK + 1)
+        self.pcs = Counter()
+        self.reads = Counter()
+        self.writes = Counter()
+        self.bucket = bucket
+        self.position = None
+
+    def record_access(self, histogram, start, length=1):
+        # Учитывает обращение к ячейкам [start, start + length) в гистограмме по корзинам
+        bucket = self.bucket
+        end = start + length
+        first = start // bucket
+        last = (end - 1) // bucket
+        if first == last:
+            histogram[first] += length
+            return
+        histogram[first] += (first + 1) * bucket - start
+        for index in range(first + 1, last):
+            histogram[index] += bucket
+        histogram[last] += end - last * bucket
+
+    def report(self, top=10):
+        """
+        Формирует отчёт профилирования.
+
+        Параметры:
+            top (int): Количество самых частых pc и корзин памяти в отчёте.
+
+        Возвращает:
+            dict: Отчёт, пригодный для записи в JSON.
+        """
+        opcodes = {}
+        for opcode, count in enumerate(self.counts):
+            if count:
+                spec = BY_OPCODE.get(opcode)
+                opcodes[spec.name if spec else str(opcode)] = {
+                    'count': count,
+                    'time': self.times[opcode] / 1e9,
+                }
+        return {
+            'instructions': sum(self.counts),
+            'opcodes': opcodes,
+            'hot_pcs': self.pcs.most_common(top),
+            'memory_bucket': self.bucket,
+            'memory_reads': [[index * self.bucket, count] for index, count in self.reads.most_common(top)],
+            'memory_writes': [[index * self.bucket, count] for index, count in self.writes.most_common(top)],
+        }
+
+
+def run_profiled(program, state, profile, max_steps=None, trace=None, handlers=HANDLERS):
+    """
+    Исполняет декодированную программу с инструментированием.
+
+    Отдельный вариант цикла run_table: выбирается один раз при запуске, поэтому
+    при выключенном профилировании основной цикл не содержит дополнительных проверок.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+        state (VMState): Состояние УВМ; исполнение начинается с команды state.ip.
+        profile (Profile): Накопитель статистики.
+        max_steps (int): Максимальное количество команд (None — до конца программы).
+        trace: Открытый на запись бинарный файл трассы или None.
+        handlers (list): Таблица обработчиков на 128 элементов.
+
+    Возвращает:
+        int: Количество выполненных команд.
+
+    Исключения:
+        VMError: При ошибке исполнения; state.ip указывает на команду с ошибкой.
+    """
+    records = program.records
+    registers = state.registers
+    counts = profile.counts
+    times = profile.times
+    pcs = profile.pcs
+    reads = profile.reads
+    writes = profile.writes
+    record_access = profile.record_access
+    clock = time.perf_counter_ns
+    pack = TRACE_RECORD.pack
+    buffer = bytearray()
+
+    start = state.ip * RECORD_SIZE
+    index = start
+    end = len(records)
+    if max_steps is not None:
+        end = min(end, start + max_steps * RECORD_SIZE)
+    # pc_at проходит программу с начала, поэтому при исполнении порциями
+    # pc берётся из места, где остановилась предыдущая порция
+    position = profile.position
+    if position is not None and position[0] is program and position[1] == state.ip:
+        pc = position[2]
+    else:
+        pc = program.pc_at(state.ip)
+
+    try:
+        while index < end:
+            opcode = records[index]
+            B = records[index + 1]
+            C = records[index + 2]
+
+            # Адреса обращений к памяти известны до исполнения команды
+            if opcode == _READ_MEM:
+                record_access(reads, B)
+            elif opcode == _WRITE_MEM:
+                record_access(writes, registers[C])
+            elif opcode == _POPCNT:
+                record_access(reads, C)
+                record_access(writes, C)
+            elif opcode == _VPOPCNT and C:
+                record_access(reads, B, C)
+                record_access(writes, B, C)
+
+            if trace is not None:
+                buffer += pack(pc, opcode, B, C)
+                if len(buffer) >= _TRACE_FLUSH_SIZE:
+                    trace.write(buffer)
+                    buffer.clear()
+
+            started = clock()
+            handlers[opcode](state, B, C)
+            times[opcode] += clock() - started
+            counts[opcode] += 1
+            pcs[pc] += 1
+
+            pc += records[index + 3]
+            index += RECORD_SIZE
+    finally:
+        state.ip = index // RECORD_SIZE
+        profile.position = (program, state.ip, pc)
+        if trace is not None:
+            trace.write(buffer)
+    return (index - start) // RECORD_SIZE
+
+
+def open_trace(path):
+    """
+    Создаёт файл бинарной трассы и записывает в него сигнатуру формата.
+
+    Параметры:
+        path (str): Путь к файлу трассы.
+
+    Возвращает:
+        file: Открытый на запись файл.
+    """
+    trace = open(path, 'wb')
+    trace.write(TRACE_MAGIC)
+    return trace
+
+
+def read_trace(path):
+    """
+    Читает бинарную трассу исполнения.
+
+    Параметры:
+        path (str): Путь к файлу трассы.
+
+    Возвращает:
+        generator: Кортежи (pc, opcode, B, C) в порядке исполнения.
+
+    Исключения:
+        ValueError: Если файл не является трассой УВМ.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"Not a UVM trace file: {path}")
+        while True:
+            data = f.read(TRACE_RECORD.size * 4096)
+            if not data:
+                break
+            yield from TRACE_RECORD.iter_unpack(data)
@@ -0,0 +1,86 @@
+import sys  # Модуль для определения порядка байтов платформы
+from array import array  # Компактные типизированные массивы
+
+from memory_backend import CELL_SIZE, CELL_TYPECODE  # Формат ячеек памяти УВМ
+
+# Форматы файла-результата: json — исходный формат (indent=2), остальные — для больших диапазонов
+FORMATS = ('json', 'json-compact', 'raw', 'npy')
+
+# Форматы, файл которых открывается в двоичном режиме
+BINARY_FORMATS = ('raw', 'npy')
+
+# Сигнатура и версия формата NumPy .npy (1.0)
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+# Размер порции при записи (в ячейках)
+_CHUNK = 1 << 16
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _little_endian_chunks(view):
+    # Порции ячеек в порядке байтов 'little endian'; на little-endian платформах — без копирования
+    if _LITTLE_ENDIAN:
+        yield view
+        return
+    for offset in range(0, len(view), _CHUNK):
+        chunk = array(CELL_TYPECODE, view[offset:offset + _CHUNK])
+        chunk.byteswap()
+        yield chunk
+
+
+def write_raw(view, f):
+    """
+    Записывает ячейки памяти как 32-битные беззнаковые числа 'little endian' прямо из буфера.
+
+    Параметры:
+        view (memoryview): Срез памяти УВМ (формат 'I').
+        f: Файл, открытый на запись в двоичном режиме.
+    """
+    for chunk in _little_endian_chunks(view):
+        f.write(chunk)
+
+
+def npy_header(count):
+    """
+    Формирует заголовок файла .npy для одномерного массива uint32.
+
+    Параметры:
+        count (int): Количество элементов.
+
+    Возвращает:
+        bytes: Заголовок, выровненный так, чтобы данные начинались с границы 64 байт.
+    """
+    header = f"{{'descr': '<u{CELL_SIZE}', 'fortran_order': False, 'shape': ({count},), }}"
+    # Сигнатура (8 байт) + длина заголовка (2 байта) + заголовок + пробелы + '\n'
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + ' ' * padding + '\n').encode('latin1')
+    return NPY_MAGIC + len(header).to_bytes(2, 'little') + header
+
+
+def write_npy(view, f):
+    """
+    Записывает ячейки памяти в формате NumPy .npy (без зависимости от NumPy).
+
+    Параметры:
+        view (memoryview): Срез памяти УВМ (формат 'I').
+        f: Файл, открытый на запись в двоичном режиме.
+    """
+    f.write(npy_header(len(view)))
+    write_raw(view, f)
+
+
+def write_json_compact(view, f):
+    """
+    Записывает ячейки памяти JSON-массивом без пробелов и переводов строк.
+
+    Параметры:
+        view (memoryview): Срез памяти УВМ.
+        f: Файл, открытый на запись в текстовом режиме.
+    """
+    f.write('[')
+    for offset in range(0, len(view), _CHUNK):
+        if offset:
+            f.write(',')
+        f.write(','.join(map(str, view[offset:offset + _CHUNK])))
+    f.write(']')
@@ -0,0 +1,334 @@
+import argparse  # Модуль для парсинга аргументов командной строки
+import asyncio  # Асинхронный сервер
+import json  # Модуль для работы с JSON-форматом
+import os  # Модуль для работы с файловой системой
+import socket  # Синхронный клиент
+import struct  # Заголовки кадров протокола
+import sys  # Модуль для взаимодействия с интерпретатором Python
+from concurrent.futures import ProcessPoolExecutor  # Пул процессов для исполнения программ
+from concurrent.futures.process import BrokenProcessPool  # Аварийное завершение рабочего процесса
+
+import decoder  # Кэш декодированных программ рабочего процесса
+from interpreter import parse_mem_range  # Разбор диапазона памяти, как в interpreter.py
+from memory_backend import memory_slice  # Срезы памяти без копирования
+from vm import VM, VMError  # Виртуальная машина для исполнения внутри процесса
+
+# Протокол: каждый кадр — длина JSON-заголовка (4 байта, 'big endian'), затем заголовок.
+# Запрос: {"id": ..., "mem_range": "start:end", "size": длина программы[, "memory_size": N]},
+#         за заголовком следуют size байтов программы.
+# Ответ:  {"id": ..., "status": "ok", "result": [...]} или {"id": ..., "status": "error", "error": "..."}.
+FRAME_HEADER = struct.Struct('>I')
+
+# Максимальный размер JSON-заголовка в байтах
+MAX_HEADER_SIZE = 1 << 16
+
+# Размер программы по умолчанию, больше которого запрос отклоняется
+MAX_PROGRAM_SIZE = 64 << 20
+
+# УВМ рабочего процесса по размеру памяти, создаются при первом использовании
+_vms = {}
+_MAX_VMS = 4
+_worker_options = {}
+
+
+def _init_worker(cache_dir, cache_size):
+    # Каждый рабочий процесс хранит свои УВМ и LRU-кэш декодированных программ
+    _worker_options['cache_dir'] = cache_dir
+    decoder.CACHE_SIZE = cache_size
+
+
+def run_job(code, mem_range, memory_size):
+    """
+    Исполняет одну программу в рабочем процессе.
+
+    Семантика совпадает с interpreter.py: программа стартует с нулевыми регистрами
+    и памятью и проверяется при загрузке. Повторно присланная программа берётся из
+    LRU-кэша декодированных программ по хэшу содержимого.
+
+    Параметры:
+        code (bytes): Бинарный код программы.
+        mem_range (str): Диапазон памяти "start:end".
+        memory_size (int): Размер памяти УВМ в ячейках.
+
+    Возвращает:
+        dict: Ответ со статусом и результатом или сообщением об ошибке.
+    """
+    try:
+        vm = _vms.get(memory_size)
+        if vm is None:
+            if len(_vms) >= _MAX_VMS:
+                # Память УВМ для редких размеров не удерживается
+                _vms.clear()
+            vm = _vms[memory_size] = VM(memory_size=memory_size, cache_dir=_worker_options.get('cache_dir'),
+                                        verify=True)
+        vm.reset()
+        vm.load(code)
+        vm.run()
+        start, end = parse_mem_range(mem_range, len(vm.memory))
+        return {'status': 'ok', 'result': memory_slice(vm.memory, start, end).tolist()}
+    except (ValueError, VMError) as e:
+        return {'status': 'error', 'error': str(e)}
+
+
+class InterpreterServer:
+    """
+    Асинхронный сервер исполнения программ УВМ.
+
+    Запросы принимаются через Unix-сокет или TCP на localhost и исполняются в пуле процессов.
+    Одновременно принимается не больше queue_size + workers заданий: при заполненной очереди
+    сервер перестаёт читать новые запросы, и клиенты ждут (обратное давление через сокет).
+    В одном соединении запросы можно отправлять подряд, ответы приходят по готовности с тем же id.
+    """
+
+    def __init__(self, workers=None, queue_size=64, memory_size=1024, cache_dir=None, cache_size=256,
+                 max_program_size=MAX_PROGRAM_SIZE, max_memory_size=1 << 26):
+        """
+        Параметры:
+            workers (int): Количество рабочих процессов (по умолчанию — количество ядер).
+            queue_size (int): Количество заданий, ожидающих свободного процесса.
+            memory_size (int): Размер памяти УВМ по умолчанию.
+            cache_dir (str): Каталог дискового кэша декодированных программ.
+            cache_size (int): Размер LRU-кэша декодированных программ в каждом процессе.
+            max_program_size (int): Максимальный размер программы в байтах.
+            max_memory_size (int): Максимальный размер памяти, который может запросить клиент.
+        """
+        self.workers = workers or os.cpu_count()
+        self.memory_size = memory_size
+        self.max_program_size = max_program_size
+        self.max_memory_size = max_memory_size
+        self.pool_options = {'max_workers': self.workers, 'initializer': _init_worker,
+                             'initargs': (cache_dir, cache_size)}
+        self.pool = ProcessPoolExecutor(**self.pool_options)
+        self.slots = asyncio.Semaphore(self.workers + queue_size)
+        self.server = None
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """
+        Запускает сервер на Unix-сокете (если указан path) или на TCP-порту.
+
+        Параметры:
+            path (str): Путь к Unix-сокету.
+            host (str): Адрес для TCP (по умолчанию только localhost).
+            port (int): TCP-порт (0 — выбрать свободный).
+
+        Возвращает:
+            str | tuple: Путь к сокету или пара (адрес, порт).
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+            return path
+        self.server = await asyncio.start_server(self.handle, host=host, port=port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """Останавливает приём соединений и завершает пул процессов."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.pool.shutdown()
+
+    async def handle(self, reader, writer):
+        # Обработка одного соединения: чтение запросов, запуск заданий, запись ответов
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    header, code = await self._read_request(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                except ValueError as e:
+                    await self._send(writer, lock, {'id': None, 'status': 'error', 'error': str(e)})
+                    break
+
+                # Ожидание свободного места: пока очередь заполнена, следующий запрос не читается
+                await self.slots.acquire()
+                task = asyncio.ensure_future(self._run(header, code, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _read_request(self, reader):
+        size, = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        if size > MAX_HEADER_SIZE:
+            raise ValueError(f"Request header too large: {size} bytes.")
+        try:
+            header = json.loads(await reader.readexactly(size))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid request header: {e}")
+        if not isinstance(header, dict):
+            raise ValueError("Invalid request header: expected a JSON object.")
+        program_size = header.get('size', 0)
+        if not isinstance(program_size, int) or not (0 <= program_size <= self.max_program_size):
+            raise ValueError(f"Invalid program size: {program_size}.")
+        code = await reader.readexactly(program_size)
+        return header, code
+
+    async def _run(self, header, code, writer, lock):
+        try:
+            response = self._validate(header)
+            if response is None:
+                loop = asyncio.get_running_loop()
+                memory_size = header.get('memory_size', self.memory_size)
+                pool = self.pool
+                try:
+                    response = await loop.run_in_executor(pool, run_job, code, header['mem_range'], memory_size)
+                except BrokenProcessPool as e:
+                    # Рабочий процесс завершился аварийно: пул заменяется новым,
+                    # а клиент получает ответ с ошибкой вместо бесконечного ожидания
+                    if self.pool is pool:
+                        self.pool = ProcessPoolExecutor(**self.pool_options)
+                        pool.shutdown(wait=False)
+                    response = {'status': 'error', 'error': f"Worker process failed: {e}"}
+                except Exception as e:
+                    response = {'status': 'error', 'error': f"Internal server error: {e!r}"}
+        finally:
+            self.slots.release()
+        response['id'] = header.get('id')
+        await self._send(writer, lock, response)
+
+    def _validate(self, header):
+        # Ошибки запроса возвращаются клиенту без передачи задания в пул
+        if not isinstance(header.get('mem_range'), str):
+            return {'status': 'error', 'error': "Missing memory range 'mem_range'."}
+        memory_size = header.get('memory_size', self.memory_size)
+        if not isinstance(memory_size, int) or not (0 < memory_size <= self.max_memory_size):
+            return {'status': 'error', 'error': f"Memory size {memory_size} out of range (1-{self.max_memory_size})."}
+        return None
+
+    async def _send(self, writer, lock, response):
+        data = json.dumps(response, separators=(',', ':')).encode()
+        async with lock:
+            writer.write(FRAME_HEADER.pack(len(data)) + data)
+            await writer.drain()
+
+
+class Client:
+    """
+    Синхронный клиент сервера УВМ.
+
+    Пример:
+        with Client(path='/tmp/uvm.sock') as client:
+            result = client.run(code, '0:10')
+    """
+
+    def __init__(self, path=None, host='127.0.0.1', port=None, timeout=None):
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.sock.settimeout(timeout)
+        self.file = self.sock.makefile('rb')
+        self.next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def send(self, code, mem_range, memory_size=None):
+        """
+        Отправляет запрос, не дожидаясь ответа.
+
+        Параметры:
+            code (bytes): Бинарный код программы.
+            mem_range (str): Диапазон памяти "start:end".
+            memory_size (int): Размер памяти УВМ (None — по умолчанию сервера).
+
+        Возвращает:
+            int: id запроса.
+        """
+        self.next_id += 1
+        header = {'id': self.next_id, 'mem_range': mem_range, 'size': len(code)}
+        if memory_size is not None:
+            header['memory_size'] = memory_size
+        data = json.dumps(header).encode()
+        self.sock.sendall(FRAME_HEADER.pack(len(data)) + data + bytes(code))
+        return self.next_id
+
+    def receive(self):
+        """
+        Читает следующий ответ сервера.
+
+        Возвращает:
+            dict: Ответ с полями id, status и result или error.
+        """
+        header = self.file.read(FRAME_HEADER.size)
+        if len(header) != FRAME_HEADER.size:
+            raise ConnectionError("Connection closed by server.")
+        size, = FRAME_HEADER.unpack(header)
+        return json.loads(self.file.read(size))
+
+    def run(self, code, mem_range, memory_size=None):
+        """
+        Исполняет программу на сервере и возвращает диапазон памяти.
+
+        Исключения:
+            VMError: Если программа завершилась ошибкой.
+        """
+        self.send(code, mem_range, memory_size)
+        response = self.receive()
+        if response['status'] != 'ok':
+            raise VMError(response['error'])
+        return response['result']
+
+
+async def serve(args):
+    server = InterpreterServer(workers=args.workers, queue_size=args.queue_size, memory_size=args.memory_size,
+                               cache_dir=args.decode_cache, cache_size=args.cache_size)
+    address = await server.start(path=args.unix, host=args.host, port=args.port)
+    print(f"Listening on {address}", file=sys.stderr, flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    """
+    Основная функция сервера УВМ.
+
+    Аргументы командной строки:
+        --unix (str): Путь к Unix-сокету (иначе используется TCP).
+        --host (str): Адрес для TCP (по умолчанию 127.0.0.1).
+        --port (int): TCP-порт.
+        --workers (int): Количество рабочих процессов.
+        --queue-size (int): Количество заданий в очереди, после которого чтение запросов приостанавливается.
+        --memory-size (int): Размер памяти УВМ по умолчанию.
+        --decode-cache (str): Каталог дискового кэша декодированных программ.
+        --cache-size (int): Размер LRU-кэша декодированных программ в каждом процессе.
+    """
+    parser = argparse.ArgumentParser(description='Interpreter service for EVM.')
+    parser.add_argument('--unix', help='Listen on this Unix socket path.')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP host (default 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default 8765).')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='Jobs waiting for a worker before the server stops reading requests.')
+    parser.add_argument('--memory-size', type=int, default=1024, help='Default VM memory size in cells.')
+    parser.add_argument('--decode-cache', help='Directory for caching decoded programs by content hash.')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Decoded programs kept in each worker LRU cache (default 256).')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import mmap  # Отображение памяти из снимка без чтения файла целиком
+import struct  # Упаковка заголовка снимка
+import sys  # Модуль для определения порядка байтов платформы
+from array import array  # Компактные типизированные массивы
+
+from memory_backend import CELL_SIZE, CELL_TYPECODE, MAX_MEMORY_SIZE  # Формат ячеек памяти УВМ
+
+# Формат файла снимка:
+#   заголовок — сигнатура, pc, размер памяти в ячейках, смещение памяти в файле, 8 регистров
+#   ('little endian'), затем с выровненного смещения — память УВМ как есть (ячейки 'I', 'little endian').
+SNAPSHOT_MAGIC = b'UVMS\x01\x00\x00\x00'
+SNAPSHOT_HEADER = struct.Struct('<8sQQQ8Q')
+
+# Память начинается с границы, допустимой для смещения mmap, поэтому её можно отобразить напрямую
+MEMORY_OFFSET = max(mmap.ALLOCATIONGRANULARITY, SNAPSHOT_HEADER.size)
+
+# Размер порции при записи памяти (в байтах); нулевые порции пропускаются (разреженный файл)
+_WRITE_CHUNK = 1 << 20
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class Snapshot:
+    """
+    Сохранённое состояние УВМ.
+
+    Атрибуты:
+        pc (int): Смещение следующей исполняемой команды в бинарном коде.
+        registers (list[int]): 8 регистров УВМ.
+        memory: Память УВМ (array('I') или memoryview поверх отображения файла).
+    """
+
+    __slots__ = ('pc', 'registers', 'memory')
+
+    def __init__(self, pc, registers, memory):
+        self.pc = pc
+        self.registers = registers
+        self.memory = memory
+
+
+def save_snapshot(path, state, program):
+    """
+    Сохраняет регистры, память и pc УВМ в бинарный файл снимка.
+
+    Память записывается порциями прямо из буфера; порции из одних нулей не записываются,
+    а пропускаются, поэтому снимок разреженной памяти занимает на диске мало места.
+
+    Параметры:
+        path (str): Путь к файлу снимка.
+        state (VMState): Состояние УВМ.
+        program (DecodedProgram): Исполняемая программа (для перевода ip в pc).
+    """
+    memory = state.memory
+    if isinstance(memory, list) or memoryview(memory).format != CELL_TYPECODE:
+        memory = array(CELL_TYPECODE, memory)
+    view = memoryview(memory)
+    size = len(view)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, program.pc_at(state.ip), size, MEMORY_OFFSET,
+                                  *state.registers)
+
+    data = view.cast('B')
+    zeros = bytes(_WRITE_CHUNK)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.seek(MEMORY_OFFSET)
+        for offset in range(0, len(data), _WRITE_CHUNK):
+            chunk = data[offset:offset + _WRITE_CHUNK]
+            if chunk == zeros[:len(chunk)]:
+                f.seek(len(chunk), 1)
+                continue
+            if not _LITTLE_ENDIAN:
+                chunk = array(CELL_TYPECODE, chunk.tobytes())
+                chunk.byteswap()
+            f.write(chunk)
+        # Конец файла фиксируется явно, даже если последняя порция была пропущена
+        f.truncate(MEMORY_OFFSET + size * CELL_SIZE)
+
+
+def load_snapshot(path, use_mmap=False):
+    """
+    Читает снимок состояния УВМ.
+
+    Параметры:
+        path (str): Путь к файлу снимка.
+        use_mmap (bool): Отобразить память из файла (копирование при записи: сам снимок
+                         не изменяется) вместо чтения в массив.
+
+    Возвращает:
+        Snapshot: pc, регистры и память.
+
+    Исключения:
+        ValueError: Если файл не является снимком УВМ или повреждён.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+        if len(header) != SNAPSHOT_HEADER.size or not header.startswith(SNAPSHOT_MAGIC):
+            raise ValueError(f"Not a UVM snapshot file: {path}")
+        magic, pc, size, offset, *registers = SNAPSHOT_HEADER.unpack(header)
+        if not (0 < size <= MAX_MEMORY_SIZE):
+            raise ValueError(f"Invalid memory size in snapshot: {size}")
+
+        f.seek(0, 2)
+        if f.tell() < offset + size * CELL_SIZE:
+            raise ValueError(f"Truncated UVM snapshot file: {path}")
+
+        if use_mmap and _LITTLE_ENDIAN and offset % mmap.ALLOCATIONGRANULARITY == 0:
+            buffer = mmap.mmap(f.fileno(), size * CELL_SIZE, access=mmap.ACCESS_COPY, offset=offset)
+            return Snapshot(pc, registers, memoryview(buffer).cast(CELL_TYPECODE))
+
+        f.seek(offset)
+        memory = array(CELL_TYPECODE)
+        memory.fromfile(f, size)
+        if not _LITTLE_ENDIAN:
+            memory.byteswap()
+        return Snapshot(pc, registers, memory)
@@ -75,6 +75,16 @@ class TestAssembler(unittest.TestCase):
         self.read_binary(expected_binary)
         self.read_log(expected_log)
 
+    def test_vpopcnt(self):
+        # Тест для команды VPOPCNT: A=19, B — биты 7-38, C — биты 39-70 (9 байт)
+        self.source_file.write("VPOPCNT 100 8\n")
+        self.source_file.flush()
+        self.run_assembler()
+        expected_binary = (19 | (100 << 7) | (8 << 39)).to_bytes(9, byteorder='little')
+        expected_log = [{"A": 19, "B": 100, "C": 8}]
+        self.read_binary(expected_binary)
+        self.read_log(expected_log)
+
     def test_multiple_instructions(self):
         # Тест с несколькими инструкциями
         self.source_file.write(
@@ -127,6 +137,88 @@ class TestAssembler(unittest.TestCase):
         self.assertNotEqual(result.returncode, 0, "Assembler should fail when fields overflow.")
         self.assertIn("Field B=8 out of range for LOAD_CONST (0-7)", result.stderr)
 
+    def test_jsonl_log(self):
+        # Лог в формате JSON Lines: по одной записи в строке
+        self.source_file.write("LOAD_CONST 6 632\nWRITE_MEM 1 5\n")
+        self.source_file.flush()
+        result = subprocess.run([
+            'python', 'assembler.py',
+            self.source_file.name,
+            self.binary_file.name,
+            '--log_file', self.log_file.name,
+            '--log_format', 'jsonl'
+        ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with open(self.log_file.name, 'r') as f:
+            log_data = [json.loads(line) for line in f]
+        self.assertEqual(log_data, [{"A": 10, "B": 6, "C": 632}, {"A": 39, "B": 1, "C": 5}])
+
+    def test_large_source_streamed(self):
+        # Исходный файл больше буфера вывода: бинарный код сбрасывается в файл порциями
+        count = 50000
+        self.source_file.write("WRITE_MEM 1 5\n" * count)
+        self.source_file.flush()
+        self.run_assembler()
+        self.read_binary(bytes([0xA7, 0x14]) * count)
+        with open(self.log_file.name, 'r') as f:
+            self.assertEqual(len(json.load(f)), count)
+
+    def test_error_keeps_previous_output(self):
+        # При ошибке ассемблирования ранее записанный бинарный файл не изменяется
+        with open(self.binary_file.name, 'wb') as f:
+            f.write(b'previous')
+        self.source_file.write("WRITE_MEM 1 5\nLOAD_CONST 8 123456\n")
+        self.source_file.flush()
+        result = subprocess.run([
+            'python', 'assembler.py',
+            self.source_file.name,
+            self.binary_file.name,
+            '--log_file', self.log_file.name
+        ], capture_output=True, text=True)
+        self.assertNotEqual(result.returncode, 0)
+        self.read_binary(b'previous')
+        self.assertFalse(os.path.exists(self.binary_file.name + '.tmp'))
+
+    def write_large_source(self, count, bad_line=None):
+        # Смешанная программа; при bad_line строка с этим номером содержит ошибку
+        templates = ["LOAD_CONST {} {}", "READ_MEM {} {}", "WRITE_MEM {} {}", "POPCNT {} {}", "# комментарий {} {}"]
+        for number in range(1, count + 1):
+            if number == bad_line:
+                self.source_file.write("POPCNT 9 1\n")
+            else:
+                self.source_file.write(templates[number % 5].format(number % 8, number % 7) + "\n")
+        self.source_file.flush()
+
+    def run_parallel(self, binary_file, log_file):
+        return subprocess.run([
+            'python', 'assembler.py',
+            self.source_file.name,
+            binary_file,
+            '--log_file', log_file,
+            '--jobs', '3',
+            '--chunk_size', '4096'
+        ], capture_output=True, text=True)
+
+    def test_parallel_matches_serial(self):
+        self.write_large_source(20000)
+        self.run_assembler()
+        with tempfile.TemporaryDirectory() as tmp:
+            binary_file = os.path.join(tmp, 'parallel.bin')
+            log_file = os.path.join(tmp, 'parallel.json')
+            result = self.run_parallel(binary_file, log_file)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            for serial, parallel in ((self.binary_file.name, binary_file), (self.log_file.name, log_file)):
+                with open(serial, 'rb') as f1, open(parallel, 'rb') as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+    def test_parallel_error_line_number(self):
+        # Ошибка далеко от начала файла, в одном из последних фрагментов
+        self.write_large_source(20000, bad_line=17321)
+        with tempfile.TemporaryDirectory() as tmp:
+            result = self.run_parallel(os.path.join(tmp, 'p.bin'), os.path.join(tmp, 'p.json'))
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("Error assembling line 17321: POPCNT 9 1", result.stderr)
+            self.assertIn("Field B=9 out of range for POPCNT (0-7)", result.stderr)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import subprocess
+import tempfile
+import os
+import json
+
+
+def load_const(B, C):
+    return (10 | (B << 7) | (C << 10)).to_bytes(5, byteorder='little')
+
+
+def write_mem(B, C):
+    return (39 | (B << 7) | (C << 10)).to_bytes(2, byteorder='little')
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        # Программа i записывает значение i + 1 в ячейку i
+        for i in range(3):
+            with open(os.path.join(self.dir, f'prog{i}.bin'), 'wb') as f:
+                f.write(load_const(0, i + 1) + load_const(1, i) + write_mem(0, 1))
+        self.output = os.path.join(self.dir, 'results.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_batch(self, source, *options):
+        return subprocess.run([
+            'python', 'batch.py', source, '0:4', self.output, '--jobs', '2', *options
+        ], capture_output=True, text=True)
+
+    def read_records(self):
+        with open(self.output, 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def test_directory(self):
+        result = self.run_batch(self.dir)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        records = self.read_records()
+        self.assertEqual([os.path.basename(r['file']) for r in records], ['prog0.bin', 'prog1.bin', 'prog2.bin'])
+        self.assertEqual([r['result'] for r in records], [[1, 0, 0, 0], [0, 2, 0, 0], [0, 0, 3, 0]])
+        for record in records:
+            self.assertEqual(record['status'], 'ok')
+            self.assertGreaterEqual(record['wall_time'], 0)
+
+    def test_manifest_with_error(self):
+        with open(os.path.join(self.dir, 'bad.bin'), 'wb') as f:
+            f.write(bytes([99]))
+        manifest = os.path.join(self.dir, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write("# программы для проверки\nprog2.bin\nbad.bin\n")
+        result = self.run_batch(manifest)
+        self.assertNotEqual(result.returncode, 0)
+        records = self.read_records()
+        self.assertEqual(records[0]['result'], [0, 0, 3, 0])
+        self.assertEqual(records[1]['status'], 'error')
+        self.assertIn("Unknown opcode", records[1]['error'])
+
+    def test_invalid_options(self):
+        for options, message in ((('--jobs', '0'), '--jobs must be at least 1'),
+                                 (('--memory-size', '0'), '--memory-size must be at least 1')):
+            with self.subTest(options=options):
+                result = self.run_batch(self.dir, *options)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn(message, result.stderr)
+
+    def test_verify_default_and_opt_out(self):
+        # POPCNT 0 2000 (адрес вне памяти) после корректной записи
+        popcnt = (18 | (2000 << 10)).to_bytes(6, byteorder='little')
+        manifest = os.path.join(self.dir, 'manifest.txt')
+        with open(os.path.join(self.dir, 'bad.bin'), 'wb') as f:
+            f.write(load_const(0, 1) + load_const(1, 0) + write_mem(0, 1) + popcnt)
+        with open(manifest, 'w') as f:
+            f.write("bad.bin\n")
+
+        self.run_batch(manifest)
+        self.assertIn("Invalid program at pc=12", self.read_records()[0]['error'])
+
+        self.run_batch(manifest, '--no-verify')
+        self.assertEqual(self.read_records()[0]['error'], "Memory popcnt error: Address 2000 out of bounds.")
+
+
+if __name__ == '__main__':
+    unittest.main()
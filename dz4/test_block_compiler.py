@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import block_compiler
+from bench_dispatch import make_program
+from block_compiler import compile_program, generate_source, run_compiled
+from decoder import decode_program, load_program
+from dispatch import VMError, VMState, run_table
+from memory_backend import create_memory
+from test_vm import assemble
+from vm import VM
+
+
+class TestBlockCompiler(unittest.TestCase):
+    def setUp(self):
+        block_compiler._cache.clear()
+
+    def run_both(self, code, memory_size=1024):
+        # Исполняет программу обоими движками и возвращает пары состояний и ошибок
+        program = decode_program(code, digest=None)
+        results = []
+        for engine in ('table', 'compiled'):
+            state = VMState(create_memory(memory_size))
+            error = None
+            try:
+                if engine == 'table':
+                    run_table(program, state)
+                else:
+                    run_compiled(compile_program(program), program, state)
+            except VMError as e:
+                error = str(e)
+            results.append((state.registers, state.memory.tolist(), state.ip, error))
+        return results
+
+    def test_matches_table(self):
+        # Несколько участков подряд дают то же состояние, что и цикл с таблицей
+        with patch.object(block_compiler, 'SEGMENT_SIZE', 64):
+            table, compiled = self.run_both(make_program(1000, seed=7))
+        self.assertEqual(table, compiled)
+        self.assertIsNone(compiled[3])
+
+    def test_straight_line_source(self):
+        source = generate_source(decode_program(assemble("LOAD_CONST 1 5\nREAD_MEM 3 2\nWRITE_MEM 1 2")))
+        self.assertIn("r1 = 5", source)
+        self.assertIn("r2 = mem[3]", source)
+        # Значение r1 известно при генерации и подставляется в код
+        self.assertIn("mem[r2] = 5", source)
+        self.assertNotIn("while", source)
+
+    def test_constant_address_hoisted(self):
+        # Адрес из LOAD_CONST проверяется один раз на входе участка, а не перед записью
+        source = generate_source(decode_program(assemble("LOAD_CONST 2 30\nREAD_MEM 3 1\nWRITE_MEM 1 2")))
+        self.assertIn("if n <= 30:", source)
+        self.assertIn("mem[30] = r1", source)
+        self.assertNotIn("if r2 >= n", source)
+
+    def test_dead_store_removed(self):
+        source = generate_source(decode_program(assemble("READ_MEM 3 1\nLOAD_CONST 1 5\nPOPCNT 2 4\nLOAD_CONST 2 0")))
+        self.assertNotIn("r1 = mem[3]", source)
+        self.assertIn("    mem[4] = mem[4].bit_count()", source)
+
+    def test_inherited_register_guard(self):
+        # Следующий участок опирается на r2 = 3 из предыдущего; при другом значении
+        # (например, после restore) участок исполняет интерпретатор
+        code = assemble("LOAD_CONST 2 3\nLOAD_CONST 1 7\nWRITE_MEM 1 2\nWRITE_MEM 1 2")
+        program = decode_program(code, digest=None)
+        with patch.object(block_compiler, 'SEGMENT_SIZE', 2):
+            compiled = compile_program(program)
+            self.assertIn("regs[2] != 3", generate_source(program))
+        state = VMState(create_memory(16))
+        state.ip = 2
+        state.registers[1:3] = [7, 9]
+        run_compiled(compiled, program, state)
+        self.assertEqual(state.memory[9], 7)
+        self.assertEqual(state.memory[3], 0)
+
+    def test_errors_match_table(self):
+        sources = [
+            "LOAD_CONST 0 5\nREAD_MEM 2000 1",
+            "LOAD_CONST 2 4000\nWRITE_MEM 0 2",
+            "LOAD_CONST 0 1\nPOPCNT 1 1024",
+            "VPOPCNT 1000 100",
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                table, compiled = self.run_both(assemble(source))
+                self.assertIsNotNone(table[3])
+                self.assertEqual(table, compiled)
+
+    def test_unknown_opcode(self):
+        table, compiled = self.run_both(assemble("LOAD_CONST 0 5") + bytes([99]))
+        self.assertEqual(compiled[3], "Unknown opcode at pc=5: 99")
+        self.assertEqual(table, compiled)
+
+    def test_disk_cache(self):
+        code = assemble("LOAD_CONST 1 7\nLOAD_CONST 2 3\nWRITE_MEM 1 2")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            program = load_program(code)
+            compile_program(program, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # Второй процесс берёт код из дискового кэша без генерации исходного текста
+            block_compiler._cache.clear()
+            with patch.object(block_compiler, 'generate_source', side_effect=AssertionError):
+                compiled = compile_program(program, cache_dir=cache_dir)
+            state = VMState(create_memory(16))
+            run_compiled(compiled, program, state)
+            self.assertEqual(state.memory[3], 7)
+
+    def test_vm_engine(self):
+        vm = VM(memory_size=64, engine='compiled')
+        vm.load(assemble("LOAD_CONST 1 7\nLOAD_CONST 2 3\nWRITE_MEM 1 2\nPOPCNT 4 3"))
+        self.assertEqual(vm.run(max_steps=2), 2)
+        self.assertEqual(vm.run(), 2)
+        self.assertTrue(vm.halted)
+        self.assertEqual(vm.memory[3], 3)
+        self.assertEqual(vm.registers[4], 3)
+
+    def test_max_steps_slices(self):
+        # Исполнение порциями произвольной длины совпадает с исполнением целиком
+        with patch.object(block_compiler, 'SEGMENT_SIZE', 16):
+            program = decode_program(make_program(1000, seed=3), digest=None)
+            compiled = compile_program(program)
+        expected = VMState(create_memory(1024))
+        run_table(program, expected)
+
+        state = VMState(create_memory(1024))
+        for steps in (0, 5, 16, 11, 100, 1, 400, 1000):
+            ip = state.ip
+            self.assertEqual(run_compiled(compiled, program, state, steps), min(steps, len(program) - ip))
+            self.assertEqual(state.ip, min(ip + steps, len(program)))
+        self.assertEqual((state.registers, state.memory.tolist()), (expected.registers, expected.memory.tolist()))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            VM(engine='jit')
+
+
+if __name__ == '__main__':
+    unittest.main()
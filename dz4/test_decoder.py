@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+import os
+
+import decoder
+
+
+class TestDecoder(unittest.TestCase):
+    def setUp(self):
+        # Каждый тест начинает с пустого кэша процесса
+        decoder._cache.clear()
+
+    def test_decode_all_opcodes(self):
+        # LOAD_CONST 6 632, READ_MEM 328 3, WRITE_MEM 1 5, POPCNT 6 310
+        code = (
+                bytes([0x0A, 0xE3, 0x09, 0x00, 0x00]) +
+                bytes([0x36, 0xA4, 0x00, 0x00, 0x80, 0x01]) +
+                bytes([0xA7, 0x14]) +
+                bytes([0x12, 0xDB, 0x04, 0x00, 0x00, 0x00])
+        )
+        program = decoder.decode_program(code)
+        self.assertEqual(list(program), [
+            (10, 6, 632, 5),
+            (54, 328, 3, 6),
+            (39, 1, 5, 2),
+            (18, 6, 310, 6),
+        ])
+
+    def test_unknown_opcode_record(self):
+        # После LOAD_CONST идёт неизвестный opcode 99 по адресу pc=5
+        code = bytes([0x0A, 0xE3, 0x09, 0x00, 0x00, 99, 0xFF])
+        program = decoder.decode_program(code)
+        self.assertEqual(list(program), [(10, 6, 632, 5), (99, 99, 5, 0)])
+
+    def test_empty_program(self):
+        self.assertEqual(len(decoder.load_program(b'')), 0)
+
+    def test_process_cache_by_content(self):
+        code = bytes([0xA7, 0x14])
+        first = decoder.load_program(code)
+        second = decoder.load_program(bytes(code))
+        self.assertIs(first, second)
+
+    def test_disk_cache_roundtrip(self):
+        code = bytes([0x0A, 0xE3, 0x09, 0x00, 0x00, 0xA7, 0x14])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = decoder.load_program(code, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # Очищаем кэш процесса: программа должна загрузиться с диска без декодирования
+            decoder._cache.clear()
+            original = decoder.decode_program
+            decoder.decode_program = None
+            try:
+                second = decoder.load_program(code, cache_dir=cache_dir)
+            finally:
+                decoder.decode_program = original
+            self.assertEqual(list(second), list(first))
+            self.assertEqual(second.digest, first.digest)
+
+
+if __name__ == '__main__':
+    unittest.main()
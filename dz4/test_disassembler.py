@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from assembler import assemble_instruction
+from bench_dispatch import make_program
+from disassembler import build_index, disassemble, load_index, open_index
+from test_vm import assemble
+
+
+class TestDisassembler(unittest.TestCase):
+    SOURCE = "LOAD_CONST 1 5\nWRITE_MEM 1 2\nREAD_MEM 700 3\nPOPCNT 4 10\nVPOPCNT 0 8"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.binary = os.path.join(self.tmp.name, 'program.bin')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_binary(self, code):
+        with open(self.binary, 'wb') as f:
+            f.write(code)
+
+    def test_round_trip(self):
+        code = assemble(self.SOURCE)
+        offsets = build_index(code)
+        self.assertEqual(list(offsets), [0, 5, 7, 13, 19])
+        self.assertEqual(list(disassemble(code, offsets)), self.SOURCE.splitlines())
+
+    def test_window(self):
+        code = make_program(1000, seed=3)
+        offsets = build_index(code)
+        lines = list(disassemble(code, offsets))
+        self.assertEqual(list(disassemble(code, offsets, 500, 20)), lines[500:520])
+        self.assertEqual(list(disassemble(code, offsets, 990, 100)), lines[990:])
+        # Повторное ассемблирование окна даёт те же байты
+        window = b''.join(assemble_instruction(line)[0] for line in lines[500:520])
+        self.assertEqual(window, code[offsets[500]:offsets[520]])
+
+    def test_unknown_opcode(self):
+        code = assemble("LOAD_CONST 1 5") + bytes([99, 0])
+        offsets = build_index(code)
+        self.assertEqual(list(offsets), [0, 5])
+        self.assertEqual(list(disassemble(code, offsets))[-1], "# Unknown opcode 99 at pc=5")
+
+    def test_offsets_annotation(self):
+        code = assemble(self.SOURCE)
+        line = list(disassemble(code, build_index(code), 2, 1, show_offsets=True))[0]
+        self.assertEqual(line, "READ_MEM 700 3  # 2: pc=7")
+        # Комментарий в конце строки не мешает ассемблированию
+        self.assertEqual(assemble_instruction(line)[0], code[7:13])
+
+    def test_persisted_index(self):
+        self.write_binary(make_program(100, seed=1))
+        offsets = open_index(self.binary)
+        index_path = self.binary + '.uvmx'
+        self.assertTrue(os.path.exists(index_path))
+        self.assertEqual(list(load_index(index_path, self.binary)), list(offsets))
+
+        # После изменения бинарного файла индекс считается устаревшим и строится заново
+        self.write_binary(assemble(self.SOURCE))
+        os.utime(self.binary, ns=(0, 0))
+        self.assertIsNone(load_index(index_path, self.binary))
+        self.assertEqual(list(open_index(self.binary)), [0, 5, 7, 13, 19])
+
+    def test_cli_streams_window(self):
+        self.write_binary(assemble(self.SOURCE))
+        output = subprocess.run([sys.executable, 'disassembler.py', self.binary, '--start', '1', '--count', '2'],
+                                check=True, capture_output=True, text=True).stdout
+        self.assertEqual(output, "WRITE_MEM 1 2\nREAD_MEM 700 3\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
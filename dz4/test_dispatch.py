@@ -0,0 +1,41 @@
+import unittest
+
+from bench_dispatch import make_program
+from decoder import decode_program
+from dispatch import HANDLERS, VMError, VMState, run_chain, run_table
+
+
+class TestDispatch(unittest.TestCase):
+    def test_table_covers_all_opcodes(self):
+        # Таблица индексируется 7-битным полем A
+        self.assertEqual(len(HANDLERS), 128)
+
+    def test_table_matches_chain(self):
+        # Оба движка должны давать одинаковое состояние на смешанном потоке команд
+        program = decode_program(make_program(5000, seed=42))
+        table_state = VMState([0] * 1024)
+        chain_state = VMState([0] * 1024)
+        self.assertEqual(run_table(program, table_state), 5000)
+        self.assertEqual(run_chain(program, chain_state), 5000)
+        self.assertEqual(table_state.registers, chain_state.registers)
+        self.assertEqual(table_state.memory, chain_state.memory)
+
+    def test_error_stops_at_instruction(self):
+        # LOAD_CONST 0 5, затем READ_MEM 2000 1 (вне памяти)
+        code = (10 | (5 << 10)).to_bytes(5, 'little') + (54 | (2000 << 7) | (1 << 39)).to_bytes(6, 'little')
+        state = VMState([0] * 1024)
+        with self.assertRaises(VMError) as cm:
+            run_table(decode_program(code), state)
+        self.assertIn("Memory read error: Address 2000", str(cm.exception))
+        self.assertEqual(state.ip, 1)
+        self.assertEqual(state.registers[0], 5)
+
+    def test_unknown_opcode_reports_pc(self):
+        code = (10 | (5 << 10)).to_bytes(5, 'little') + bytes([99])
+        with self.assertRaises(VMError) as cm:
+            run_table(decode_program(code), VMState([0] * 1024))
+        self.assertEqual(str(cm.exception), "Unknown opcode at pc=5: 99")
+
+
+if __name__ == '__main__':
+    unittest.main()
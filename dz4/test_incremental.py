@@ -0,0 +1,143 @@
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import incremental
+from assembler import AssemblyError, LogWriter, assemble_serial
+from incremental import assemble_incremental
+
+
+def random_line(rng):
+    kind = rng.randrange(7)
+    if kind == 0:
+        return f"LOAD_CONST {rng.randrange(8)} {rng.randrange(1 << 24)}"
+    if kind == 1:
+        return f"READ_MEM {rng.randrange(1024)} {rng.randrange(8)}"
+    if kind == 2:
+        return f"WRITE_MEM {rng.randrange(8)} {rng.randrange(8)}"
+    if kind == 3:
+        return f"POPCNT {rng.randrange(8)} {rng.randrange(1024)}"
+    if kind == 4:
+        return f"VPOPCNT {rng.randrange(1024)} {rng.randrange(8)}"
+    if kind == 5:
+        return "# comment"
+    return ""
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'program.asm')
+        self.binary = os.path.join(self.tmp.name, 'program.bin')
+        self.log = os.path.join(self.tmp.name, 'program_log.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, text):
+        with open(self.source, 'w') as f:
+            f.write(text)
+
+    def full_build(self, log_format):
+        # Эталон: обычное последовательное ассемблирование
+        out = io.BytesIO()
+        log = io.StringIO()
+        writer = LogWriter(log, log_format)
+        assemble_serial(self.source, out, writer)
+        writer.close()
+        return out.getvalue(), log.getvalue().encode()
+
+    def assertMatchesFullBuild(self, log_format, log_file=True):
+        stats = assemble_incremental(self.source, self.binary, self.log if log_file else None, log_format)
+        binary, log = self.full_build(log_format)
+        with open(self.binary, 'rb') as f:
+            self.assertEqual(f.read(), binary)
+        if log_file:
+            with open(self.log, 'rb') as f:
+                self.assertEqual(f.read(), log)
+        return stats
+
+    def test_random_edits(self):
+        rng = random.Random(4)
+        with patch.object(incremental, 'BLOCK_SIZE', 64):
+            for log_format in ('json', 'jsonl'):
+                lines = [random_line(rng) for _ in range(300)]
+                self.write_source('\n'.join(lines) + '\n')
+                self.assertTrue(self.assertMatchesFullBuild(log_format)['full_rebuild'])
+                for _ in range(60):
+                    position = rng.randrange(len(lines) + 1)
+                    action = rng.randrange(3)
+                    if action == 0 or not lines:
+                        lines.insert(position, random_line(rng))
+                    elif action == 1 and position < len(lines):
+                        del lines[position]
+                    elif position < len(lines):
+                        lines[position] = random_line(rng)
+                    trailing = '\n' if rng.randrange(4) else ''
+                    self.write_source('\n'.join(lines) + trailing)
+                    with self.subTest(log_format=log_format, lines=len(lines)):
+                        self.assertFalse(self.assertMatchesFullBuild(log_format)['full_rebuild'])
+
+    def test_only_changed_region_is_reassembled(self):
+        rng = random.Random(8)
+        lines = [random_line(rng) for _ in range(20000)]
+        self.write_source('\n'.join(lines) + '\n')
+        self.assertEqual(self.assertMatchesFullBuild('json')['reassembled_lines'], 20000)
+
+        lines[10000] = "LOAD_CONST 1 5"
+        self.write_source('\n'.join(lines) + '\n')
+        stats = self.assertMatchesFullBuild('json')
+        self.assertLess(stats['reassembled_lines'], 2 * incremental.BLOCK_SIZE // 10)
+
+    def test_empty_source_and_log(self):
+        for text in ('', '# only a comment\n', 'LOAD_CONST 1 5\n'):
+            self.write_source(text)
+            self.assertMatchesFullBuild('json')
+        self.write_source('# only a comment\n')
+        self.assertMatchesFullBuild('json')
+
+    def test_without_log(self):
+        self.write_source("LOAD_CONST 1 5\nWRITE_MEM 1 2\n")
+        self.assertMatchesFullBuild('json', log_file=False)
+        self.write_source("LOAD_CONST 1 6\nWRITE_MEM 1 2\n")
+        self.assertMatchesFullBuild('json', log_file=False)
+        # Лог запрошен впервые: кэш без лога не подходит, выполняется полная сборка
+        self.assertTrue(self.assertMatchesFullBuild('json')['full_rebuild'])
+
+    def test_changed_output_forces_full_rebuild(self):
+        self.write_source("LOAD_CONST 1 5\nWRITE_MEM 1 2\n")
+        assemble_incremental(self.source, self.binary, self.log)
+        with open(self.binary, 'ab') as f:
+            f.write(b'garbage')
+        self.assertTrue(self.assertMatchesFullBuild('json')['full_rebuild'])
+
+    def test_error_keeps_outputs(self):
+        self.write_source("LOAD_CONST 1 5\nWRITE_MEM 1 2\n")
+        assemble_incremental(self.source, self.binary, self.log)
+        with open(self.binary, 'rb') as f:
+            before = f.read()
+        self.write_source("LOAD_CONST 1 5\nFOO 1 2\n")
+        with self.assertRaises(AssemblyError) as cm:
+            assemble_incremental(self.source, self.binary, self.log)
+        self.assertIn("Error assembling line 2", str(cm.exception))
+        with open(self.binary, 'rb') as f:
+            self.assertEqual(f.read(), before)
+
+    def test_cli_rejects_incompatible_options(self):
+        self.write_source("LOAD_CONST 1 5\n")
+        for options in (['--optimize'], ['--optimize_report', self.log], ['--jobs', '2']):
+            with self.subTest(options=options):
+                process = subprocess.run([sys.executable, 'assembler.py', self.source, self.binary, '--incremental',
+                                          *options], capture_output=True, text=True)
+                self.assertEqual(process.returncode, 2)
+                self.assertIn('--incremental cannot be combined', process.stderr)
+                self.assertFalse(os.path.exists(self.binary))
+
+
+if __name__ == '__main__':
+    unittest.main()
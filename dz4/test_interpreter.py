@@ -132,6 +132,15 @@ class TestUVMInterpreter(unittest.TestCase):
             self.assertNotEqual(cm.exception.code, 0)
             self.assertIn("Memory range out of bounds", mock_stderr.getvalue())
 
+    @patch('interpreter.sys.argv', ['interpreter.py', 'binary.bin', 'result.json', '0:10',
+                                    '--profile', 'profile.json', '--profile-bucket', '0'])
+    def test_invalid_profile_bucket(self):
+        with patch('interpreter.sys.stderr', new_callable=StringIO) as mock_stderr:
+            with self.assertRaises(SystemExit) as cm:
+                interpreter.main()
+            self.assertEqual(cm.exception.code, 2)
+            self.assertIn("--profile-bucket must be at least 1", mock_stderr.getvalue())
+
     @patch('interpreter.open', new_callable=mock_open)
     @patch('interpreter.sys.argv', ['interpreter.py', 'binary.bin', 'result.json', '0:10'])
     def test_memory_address_out_of_bounds_read(self, mock_file):
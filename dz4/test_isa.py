@@ -0,0 +1,43 @@
+import unittest
+import random
+
+import isa
+from decoder import decode_program
+
+
+class TestISA(unittest.TestCase):
+    def test_encode_matches_reference(self):
+        # Эталонные байты из test_assembler.py
+        self.assertEqual(isa.encode('LOAD_CONST', [6, 632])[0], bytes([0x0A, 0xE3, 0x09, 0x00, 0x00]))
+        self.assertEqual(isa.encode('READ_MEM', [328, 3])[0], bytes([0x36, 0xA4, 0x00, 0x00, 0x80, 0x01]))
+        self.assertEqual(isa.encode('WRITE_MEM', [1, 5])[0], bytes([0xA7, 0x14]))
+        self.assertEqual(isa.encode('POPCNT', [6, 310])[0], bytes([0x12, 0xDB, 0x04, 0x00, 0x00, 0x00]))
+
+    def test_field_ranges(self):
+        with self.assertRaises(ValueError) as cm:
+            isa.encode('READ_MEM', [1 << 32, 0])
+        self.assertEqual(str(cm.exception), "Field B=4294967296 out of range for READ_MEM (0-4294967295)")
+        with self.assertRaises(ValueError) as cm:
+            isa.encode('NOP', [])
+        self.assertEqual(str(cm.exception), "Unknown opcode: NOP")
+
+    def test_roundtrip_all_instructions(self):
+        # Кодер и декодер построены по одной спецификации и взаимно обратны
+        rng = random.Random(1)
+        for spec in isa.INSTRUCTIONS:
+            for _ in range(100):
+                operands = [rng.randrange(1 << width) for _, _, width in spec.fields]
+                binary, log_entry = isa.encode(spec.name, operands)
+                self.assertEqual(len(binary), spec.length)
+                self.assertEqual(log_entry['A'], spec.opcode)
+                self.assertEqual(isa.decode(binary), (spec, tuple(operands)))
+                self.assertEqual(list(decode_program(binary)), [(spec.opcode, *operands, spec.length)])
+
+    def test_opcodes_fit_field_a(self):
+        for spec in isa.INSTRUCTIONS:
+            self.assertLessEqual(spec.opcode, isa.OPCODE_MASK)
+        self.assertEqual(len(isa.BY_OPCODE), len(isa.INSTRUCTIONS))
+
+
+if __name__ == '__main__':
+    unittest.main()
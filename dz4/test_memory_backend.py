@@ -0,0 +1,73 @@
+import unittest
+import subprocess
+import tempfile
+import os
+import json
+from array import array
+
+from memory_backend import clear_memory, create_memory, memory_slice
+
+
+class TestMemoryBackend(unittest.TestCase):
+    def test_default_array(self):
+        memory = create_memory(16)
+        self.assertIsInstance(memory, array)
+        self.assertEqual(len(memory), 16)
+        memory[3] = 0xFFFFFFFF
+        self.assertEqual(memory[3], 0xFFFFFFFF)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            create_memory(0)
+        with self.assertRaises(ValueError):
+            create_memory((1 << 32) + 1)
+
+    def test_sparse_mmap(self):
+        # 2**30 ячеек (4 ГиБ) не выделяются заранее: страницы появляются при обращении
+        memory = create_memory(1 << 30, use_mmap=True)
+        self.assertEqual(len(memory), 1 << 30)
+        memory[(1 << 30) - 1] = 7
+        self.assertEqual(memory[(1 << 30) - 1], 7)
+        clear_memory(memory)
+        self.assertEqual(memory[(1 << 30) - 1], 0)
+
+    def test_file_mmap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'memory.bin')
+            memory = create_memory(1024, path=path)
+            memory[1] = 5
+            self.assertEqual(os.path.getsize(path), 1024 * 4)
+            memory.release()
+
+            # Повторно используемый файл не переносит значения прошлого запуска
+            memory = create_memory(512, path=path)
+            self.assertEqual(memory.tolist(), [0] * 512)
+            self.assertEqual(os.path.getsize(path), 512 * 4)
+            memory.release()
+
+    def test_slice_is_view(self):
+        memory = create_memory(8)
+        view = memory_slice(memory, 2, 5)
+        memory[3] = 42
+        self.assertEqual(view.tolist(), [0, 42, 0])
+
+    def test_interpreter_memory_size(self):
+        # LOAD_CONST 0 9, LOAD_CONST 1 100000, WRITE_MEM 0 1 — адрес за пределами 1024 ячеек
+        code = ((10 | (9 << 10)).to_bytes(5, 'little') +
+                (10 | (1 << 7) | (100000 << 10)).to_bytes(5, 'little') +
+                (39 | (1 << 10)).to_bytes(2, 'little'))
+        with tempfile.TemporaryDirectory() as tmp:
+            bin_name = os.path.join(tmp, 'program.bin')
+            res_name = os.path.join(tmp, 'result.json')
+            with open(bin_name, 'wb') as f:
+                f.write(code)
+            for extra in (['--memory-size', '200000'], ['--memory-size', '200000', '--mmap']):
+                result = subprocess.run(['python', 'interpreter.py', bin_name, res_name, '99999:100001'] + extra,
+                                        capture_output=True, text=True)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                with open(res_name, 'r') as f:
+                    self.assertEqual(json.load(f), [0, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
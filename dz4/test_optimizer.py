@@ -0,0 +1,129 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from isa import encode
+from optimizer import Instruction, optimize
+from vm import VM
+
+
+def parse(source):
+    instructions = []
+    for line_number, line in enumerate(source.strip().splitlines(), 1):
+        name, *operands = line.split()
+        instructions.append(Instruction(name, [int(x) for x in operands], line_number))
+    return instructions
+
+
+def run(instructions):
+    vm = VM(memory_size=64)
+    vm.load(b''.join(encode(instr.name, instr.operands)[0] for instr in instructions))
+    vm.run()
+    return vm.registers, vm.memory.tolist()
+
+
+class TestOptimizer(unittest.TestCase):
+    def assertOptimized(self, source, expected):
+        instructions = parse(source)
+        optimized, report = optimize(instructions)
+        self.assertEqual([str(instr) for instr in optimized], expected)
+        self.assertEqual(run(optimized), run(instructions))
+        return report
+
+    def test_dead_store(self):
+        report = self.assertOptimized(
+            "LOAD_CONST 0 1\nLOAD_CONST 0 2\nLOAD_CONST 1 5\nWRITE_MEM 0 1",
+            ["LOAD_CONST 0 2", "LOAD_CONST 1 5", "WRITE_MEM 0 1"],
+        )
+        self.assertEqual(report, [{'line': 1, 'instruction': 'LOAD_CONST 0 1', 'action': 'removed',
+                                   'reason': 'register is overwritten before it is read'}])
+
+    def test_read_after_write_known_value(self):
+        report = self.assertOptimized(
+            "LOAD_CONST 0 25\nLOAD_CONST 1 10\nWRITE_MEM 0 1\nREAD_MEM 10 2",
+            ["LOAD_CONST 0 25", "LOAD_CONST 1 10", "WRITE_MEM 0 1", "LOAD_CONST 2 25"],
+        )
+        self.assertEqual(report[0]['replacement'], "LOAD_CONST 2 25")
+
+    def test_read_into_same_register(self):
+        # Значение неизвестно, но регистр уже содержит значение ячейки
+        self.assertOptimized(
+            "READ_MEM 5 0\nLOAD_CONST 1 3\nWRITE_MEM 0 1\nREAD_MEM 3 0\nREAD_MEM 5 0",
+            ["READ_MEM 5 0", "LOAD_CONST 1 3", "WRITE_MEM 0 1"],
+        )
+
+    def test_popcnt_of_known_cell(self):
+        self.assertOptimized(
+            "LOAD_CONST 0 7\nLOAD_CONST 1 4\nWRITE_MEM 0 1\nPOPCNT 2 4\nREAD_MEM 4 3",
+            ["LOAD_CONST 0 7", "LOAD_CONST 1 4", "WRITE_MEM 0 1", "POPCNT 2 4", "LOAD_CONST 3 3"],
+        )
+
+    def test_unknown_address_invalidates(self):
+        source = "LOAD_CONST 0 25\nLOAD_CONST 1 10\nWRITE_MEM 0 1\nREAD_MEM 3 2\nWRITE_MEM 0 2\nREAD_MEM 10 4"
+        optimized, report = optimize(parse(source))
+        self.assertEqual(report, [])
+        self.assertEqual(len(optimized), 6)
+
+    def test_vpopcnt_invalidates_range(self):
+        source = "LOAD_CONST 0 7\nLOAD_CONST 1 4\nWRITE_MEM 0 1\nVPOPCNT 0 8\nREAD_MEM 4 2"
+        self.assertOptimized(source, source.splitlines())
+
+    def test_final_registers_preserved(self):
+        # Последняя запись в регистр не удаляется, даже если регистр больше не читается
+        self.assertOptimized("LOAD_CONST 3 1", ["LOAD_CONST 3 1"])
+
+    def test_random_programs_equivalent(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            instructions = []
+            for _ in range(40):
+                kind = rng.randrange(5)
+                if kind == 0:
+                    instructions.append(Instruction('LOAD_CONST', (rng.randrange(8), rng.randrange(64))))
+                elif kind == 1:
+                    instructions.append(Instruction('READ_MEM', (rng.randrange(8), rng.randrange(8))))
+                elif kind == 2:
+                    instructions.append(Instruction('WRITE_MEM', (rng.randrange(8), rng.randrange(8))))
+                elif kind == 3:
+                    instructions.append(Instruction('POPCNT', (rng.randrange(8), rng.randrange(8))))
+                else:
+                    instructions.append(Instruction('VPOPCNT', (rng.randrange(8), rng.randrange(8))))
+            optimized, _ = optimize(instructions)
+            try:
+                expected = run(instructions)
+            except Exception:
+                continue
+            self.assertEqual(run(optimized), expected)
+
+    def test_assembler_optimize(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'program.asm')
+            with open(source, 'w') as f:
+                f.write("# test\nLOAD_CONST 0 1\nLOAD_CONST 0 25\nLOAD_CONST 1 10\nWRITE_MEM 0 1\nREAD_MEM 10 2\n")
+            binary = os.path.join(tmp, 'program.bin')
+            log = os.path.join(tmp, 'log.json')
+            report_path = os.path.join(tmp, 'report.json')
+            subprocess.run([sys.executable, 'assembler.py', source, binary, '--log_file', log,
+                            '--optimize_report', report_path], check=True)
+
+            with open(report_path) as f:
+                report = json.load(f)
+            with open(log) as f:
+                log_entries = json.load(f)
+            with open(binary, 'rb') as f:
+                code = f.read()
+
+        self.assertEqual(report['instructions_before'], 5)
+        self.assertEqual(report['instructions_after'], 4)
+        self.assertEqual(report['bytes_before'], 23)
+        self.assertEqual(report['bytes_after'], len(code))
+        self.assertEqual([change['line'] for change in report['changes']], [2, 6])
+        self.assertEqual(log_entries[-1], {'A': 10, 'B': 2, 'C': 25})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import random
+from array import array
+
+from popcnt_vector import apply_popcnt_to_vector
+from popcount import np, popcnt, popcnt_array
+
+
+class TestPopcount(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.values = [rng.getrandbits(32) for _ in range(1000)] + [0, 1, 0xFFFFFFFF]
+        self.expected = [bin(x).count('1') for x in self.values]
+
+    def test_scalar(self):
+        self.assertEqual(popcnt(0), 0)
+        self.assertEqual(popcnt(0b1011), 3)
+        self.assertEqual(popcnt(2 ** 100 - 1), 100)
+
+    def test_vector_any_length(self):
+        # Вектор больше не ограничен длиной 8
+        self.assertEqual(apply_popcnt_to_vector([3, 7, 15, 31, 63, 127, 255, 511]), [2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(apply_popcnt_to_vector([]), [])
+        self.assertEqual(apply_popcnt_to_vector(self.values), self.expected)
+
+    def test_python_and_table_backends(self):
+        cells = array('I', self.values)
+        self.assertEqual(popcnt_array(self.values, 'python'), self.expected)
+        self.assertEqual(popcnt_array(cells, 'table'), self.expected)
+        self.assertEqual(popcnt_array(self.values, 'table'), self.expected)
+        self.assertEqual(popcnt_array(array('Q', [2 ** 64 - 1, 5]), 'table'), [64, 2])
+
+    def test_large_and_negative_numbers(self):
+        # Такие числа не помещаются в массивы и считаются поэлементно
+        self.assertEqual(popcnt_array([2 ** 70, -3], 'table'), [1, 2])
+        self.assertEqual(popcnt_array([2 ** 70, -3]), [1, 2])
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy_backend(self):
+        data = np.array(self.values, dtype=np.uint32)
+        self.assertEqual(popcnt_array(data).tolist(), self.expected)
+        self.assertEqual(popcnt_array(self.values, 'numpy'), self.expected)
+        self.assertEqual(popcnt_array(array('I', self.values), 'numpy'), self.expected)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            popcnt_array([1], 'simd')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+import os
+from unittest.mock import patch
+
+from profiler import Profile, open_trace, read_trace
+from test_vm import assemble
+from vm import VM
+
+
+class TestProfiler(unittest.TestCase):
+    SOURCE = """
+    LOAD_CONST 0 25
+    LOAD_CONST 1 10
+    WRITE_MEM 0 1
+    READ_MEM 10 2
+    POPCNT 2 10
+    VPOPCNT 0 20
+    """
+
+    def test_report(self):
+        vm = VM()
+        vm.profile = Profile(bucket=8)
+        vm.load(assemble(self.SOURCE))
+        vm.run()
+        report = vm.profile.report()
+        self.assertEqual(report['instructions'], 6)
+        self.assertEqual(report['opcodes']['LOAD_CONST']['count'], 2)
+        self.assertEqual(report['opcodes']['VPOPCNT']['count'], 1)
+        self.assertGreaterEqual(report['opcodes']['POPCNT']['time'], 0)
+        self.assertEqual(sorted(pc for pc, _ in report['hot_pcs']), [0, 5, 10, 12, 18, 24])
+        # Корзины по 8 ячеек: VPOPCNT 0 20 затрагивает корзины 0, 8 и 16
+        self.assertEqual(dict(vm.profile.reads), {0: 8, 1: 10, 2: 4})
+        self.assertEqual(dict(vm.profile.writes), {0: 8, 1: 10, 2: 4})
+        # Результат исполнения не зависит от профилирования
+        self.assertEqual(vm.memory[10], 2)
+
+    def test_sliced_run_reuses_pc(self):
+        # При исполнении порциями pc вычисляется по номеру команды только при первом запуске
+        vm = VM()
+        vm.profile = Profile()
+        vm.load(assemble(self.SOURCE))
+        vm.run(max_steps=2)
+        with patch.object(type(vm.program), 'pc_at', side_effect=AssertionError("pc recomputed")):
+            vm.run(max_steps=2)
+            vm.run()
+        self.assertEqual(sorted(pc for pc, _ in vm.profile.report()['hot_pcs']), [0, 5, 10, 12, 18, 24])
+
+    def test_trace_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.bin')
+            vm = VM()
+            vm.trace = open_trace(path)
+            vm.load(assemble(self.SOURCE))
+            vm.run(max_steps=3)
+            vm.run()
+            vm.trace.close()
+            records = list(read_trace(path))
+        self.assertEqual(records[0], (0, 10, 0, 25))
+        self.assertEqual(records[2], (10, 39, 0, 1))
+        self.assertEqual(records[-1], (24, 19, 0, 20))
+        self.assertEqual(len(records), 6)
+
+    def test_disabled_uses_plain_loop(self):
+        # Без профиля инструментированный цикл не вызывается
+        with patch('vm.run_profiled', side_effect=AssertionError("instrumented loop used")):
+            vm = VM()
+            vm.load(assemble(self.SOURCE))
+            self.assertEqual(vm.run(), 6)
+
+    def test_invalid_trace(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b'garbage')
+        try:
+            with self.assertRaises(ValueError):
+                list(read_trace(f.name))
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+from array import array
+
+from result_format import npy_header, write_json_compact, write_npy, write_raw
+from test_vm import assemble
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestResultFormat(unittest.TestCase):
+    VALUES = [0, 1, 25, 700, 2 ** 32 - 1]
+
+    def view(self):
+        return memoryview(array('I', self.VALUES))
+
+    def test_raw(self):
+        f = io.BytesIO()
+        write_raw(self.view(), f)
+        self.assertEqual(list(struct.unpack('<5I', f.getvalue())), self.VALUES)
+
+    def test_npy_header_alignment(self):
+        for count in (0, 5, 10 ** 9):
+            header = npy_header(count)
+            self.assertEqual(len(header) % 64, 0)
+            self.assertTrue(header.endswith(b'\n'))
+            self.assertIn(f"'shape': ({count},)".encode(), header)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_npy_loads_with_numpy(self):
+        f = io.BytesIO()
+        write_npy(self.view(), f)
+        f.seek(0)
+        self.assertEqual(np.load(f).tolist(), self.VALUES)
+
+    def test_json_compact(self):
+        f = io.StringIO()
+        write_json_compact(self.view(), f)
+        self.assertEqual(f.getvalue(), '[0,1,25,700,4294967295]')
+        self.assertEqual(json.loads(f.getvalue()), self.VALUES)
+
+        f = io.StringIO()
+        write_json_compact(memoryview(array('I')), f)
+        self.assertEqual(f.getvalue(), '[]')
+
+    def test_interpreter_formats(self):
+        # Все форматы содержат одни и те же значения диапазона памяти
+        with tempfile.TemporaryDirectory() as tmp:
+            binary = os.path.join(tmp, 'program.bin')
+            with open(binary, 'wb') as f:
+                f.write(assemble("LOAD_CONST 0 25\nLOAD_CONST 1 3\nWRITE_MEM 0 1"))
+
+            outputs = {}
+            for result_format in ('json', 'json-compact', 'raw', 'npy'):
+                result = os.path.join(tmp, f'result.{result_format}')
+                subprocess.run([sys.executable, 'interpreter.py', binary, result, '0:8',
+                                '--format', result_format], check=True)
+                with open(result, 'rb') as f:
+                    outputs[result_format] = f.read()
+
+        expected = [0, 0, 0, 25, 0, 0, 0, 0]
+        self.assertEqual(json.loads(outputs['json']), expected)
+        self.assertEqual(json.loads(outputs['json-compact']), expected)
+        self.assertEqual(list(struct.unpack('<8I', outputs['raw'])), expected)
+        self.assertEqual(outputs['npy'], npy_header(8) + outputs['raw'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import struct
+import tempfile
+import unittest
+
+from server import FRAME_HEADER, Client, InterpreterServer
+from test_vm import assemble
+from vm import VMError
+
+PROGRAM = assemble("LOAD_CONST 0 25\nLOAD_CONST 1 3\nWRITE_MEM 0 1\nPOPCNT 2 3")
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = InterpreterServer(workers=2, queue_size=2)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.tmp.cleanup()
+
+    async def test_unix_socket(self):
+        path = await self.server.start(path=os.path.join(self.tmp.name, 'uvm.sock'))
+
+        def client_calls():
+            with Client(path=path) as client:
+                return client.run(PROGRAM, '0:5'), client.run(PROGRAM, '3:4', memory_size=8)
+
+        first, second = await asyncio.to_thread(client_calls)
+        self.assertEqual(first, [0, 0, 0, 3, 0])
+        self.assertEqual(second, [3])
+
+    async def test_tcp_pipelined_requests(self):
+        # Запросов больше, чем мест в очереди: сервер принимает их по мере освобождения мест
+        host, port = await self.server.start(port=0)
+
+        def client_calls():
+            with Client(host=host, port=port) as client:
+                ids = [client.send(PROGRAM + assemble(f"LOAD_CONST 0 {i}\nWRITE_MEM 0 1"), '3:4')
+                       for i in range(20)]
+                responses = {}
+                for _ in ids:
+                    response = client.receive()
+                    responses[response['id']] = response
+                return ids, responses
+
+        ids, responses = await asyncio.to_thread(client_calls)
+        self.assertEqual(sorted(responses), ids)
+        for i, request_id in enumerate(ids):
+            self.assertEqual(responses[request_id], {'id': request_id, 'status': 'ok', 'result': [i]})
+
+    async def test_errors(self):
+        host, port = await self.server.start(port=0)
+
+        def client_calls():
+            with Client(host=host, port=port) as client:
+                errors = []
+                for code, mem_range, memory_size in ((assemble("READ_MEM 5000 1"), '0:1', None),
+                                                     (PROGRAM, '0:2000', None),
+                                                     (PROGRAM, '0:1', 0)):
+                    try:
+                        client.run(code, mem_range, memory_size)
+                    except VMError as e:
+                        errors.append(str(e))
+                # Соединение остаётся рабочим после ошибок
+                errors.append(client.run(PROGRAM, '3:4'))
+                return errors
+
+        errors = await asyncio.to_thread(client_calls)
+        self.assertIn("Memory read error", errors[0])
+        self.assertIn("Memory range out of bounds", errors[1])
+        self.assertIn("Memory size 0 out of range", errors[2])
+        self.assertEqual(errors[3], [3])
+
+    async def test_malformed_request(self):
+        host, port = await self.server.start(port=0)
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(FRAME_HEADER.pack(3) + b'{{{')
+        await writer.drain()
+        size, = struct.unpack('>I', await reader.readexactly(4))
+        self.assertIn(b'Invalid request header', await reader.readexactly(size))
+        self.assertEqual(await reader.read(), b'')
+        writer.close()
+
+    async def test_broken_worker_pool(self):
+        # Аварийное завершение рабочего процесса ломает пул: клиент получает ошибку,
+        # а следующие запросы исполняются новым пулом
+        host, port = await self.server.start(port=0)
+        with self.assertRaises(Exception):
+            await asyncio.wrap_future(self.server.pool.submit(os._exit, 1))
+
+        def client_calls():
+            with Client(host=host, port=port, timeout=30) as client:
+                client.send(PROGRAM, '0:5')
+                return client.receive(), client.run(PROGRAM, '3:4')
+
+        response, result = await asyncio.to_thread(client_calls)
+        self.assertEqual(response['status'], 'error')
+        self.assertIn('Worker process failed', response['error'])
+        self.assertEqual(result, [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
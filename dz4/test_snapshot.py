@@ -0,0 +1,152 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from snapshot import MEMORY_OFFSET, load_snapshot
+from test_vm import assemble
+from vm import VM
+
+PREFIX = """
+LOAD_CONST 0 25
+LOAD_CONST 1 10
+WRITE_MEM 0 1
+LOAD_CONST 1 700
+WRITE_MEM 0 1
+"""
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'state.uvms')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        vm = VM()
+        vm.load(assemble(PREFIX))
+        vm.run(max_steps=3)
+        vm.snapshot(self.path)
+
+        snapshot = load_snapshot(self.path)
+        self.assertEqual(snapshot.pc, 12)
+        self.assertEqual(snapshot.registers, vm.registers)
+        self.assertEqual(snapshot.memory, vm.memory)
+        self.assertEqual(os.path.getsize(self.path), MEMORY_OFFSET + 1024 * 4)
+
+    def test_resume_divergent_program(self):
+        # Общий префикс исполняется один раз, затем со снимка продолжаются разные программы
+        vm = VM()
+        vm.load(assemble(PREFIX))
+        vm.run()
+        vm.snapshot(self.path)
+
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap):
+                code = assemble(PREFIX + "POPCNT 3 700\nREAD_MEM 10 4")
+                expected = VM()
+                expected.load(code)
+                expected.run()
+
+                restored = VM()
+                restored.load(code)
+                restored.restore(self.path, use_mmap=use_mmap)
+                self.assertEqual(restored.ip, 5)
+                self.assertEqual(restored.run(), 2)
+                self.assertEqual(restored.registers, expected.registers)
+                self.assertEqual(restored.memory.tolist(), expected.memory.tolist())
+
+        # Память из отображения копируется при записи: сам снимок не изменился
+        self.assertEqual(load_snapshot(self.path).memory[700], 25)
+
+    def test_pc_not_instruction_boundary(self):
+        vm = VM()
+        vm.load(assemble(PREFIX))
+        vm.run(max_steps=1)
+        vm.snapshot(self.path)
+
+        other = VM()
+        other.load(assemble("READ_MEM 0 0"))
+        with self.assertRaises(ValueError):
+            other.restore(self.path)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_interpreter_restore(self):
+        # mem_range из восстановленного состояния совпадает с полным исполнением
+        binary = os.path.join(self.tmp.name, 'program.bin')
+        with open(binary, 'wb') as f:
+            f.write(assemble(PREFIX + "POPCNT 3 700"))
+
+        def interpret(*options):
+            result = os.path.join(self.tmp.name, 'result.json')
+            subprocess.run([sys.executable, 'interpreter.py', binary, result, '695:705', *options], check=True)
+            with open(result) as f:
+                return json.load(f)
+
+        full = interpret()
+        self.assertEqual(interpret('--snapshot', self.path, '--snapshot-steps', '5'), full)
+        self.assertEqual(interpret('--restore', self.path), full)
+        self.assertEqual(interpret('--restore', self.path, '--restore-mmap'), full)
+
+    def test_interpreter_suspend_and_resume(self):
+        binary = os.path.join(self.tmp.name, 'program.bin')
+        with open(binary, 'wb') as f:
+            f.write(assemble(PREFIX + "POPCNT 3 700"))
+        result = os.path.join(self.tmp.name, 'result.json')
+
+        def interpret(*options):
+            return subprocess.run([sys.executable, 'interpreter.py', binary, result, '695:705', *options],
+                                  capture_output=True, text=True)
+
+        self.assertEqual(interpret().returncode, 0)
+        with open(result) as f:
+            full = json.load(f)
+        os.remove(result)
+
+        # Остановка по лимиту: код EXIT_SUSPENDED, контрольная точка вместо результата
+        process = interpret('--max-steps', '2', '--checkpoint', self.path)
+        self.assertEqual(process.returncode, 3)
+        self.assertIn("pc=10", process.stderr)
+        self.assertFalse(os.path.exists(result))
+        self.assertEqual(load_snapshot(self.path).pc, 10)
+
+        process = interpret('--restore', self.path, '--max-steps', '2', '--checkpoint', self.path)
+        self.assertEqual(process.returncode, 3)
+        self.assertEqual(interpret('--restore', self.path, '--max-steps', '2').returncode, 0)
+        with open(result) as f:
+            self.assertEqual(json.load(f), full)
+
+        # Контрольная точка по умолчанию — рядом с файлом-результата
+        os.remove(result)
+        self.assertEqual(interpret('--time-budget', '0', '--max-steps', '1').returncode, 3)
+        self.assertEqual(load_snapshot(result + '.uvms').pc, 5)
+
+    def test_interpreter_time_budget_before_snapshot(self):
+        # Бюджет времени действует и до точки снимка: после первой порции исполнения
+        # (TIME_SLICE команд) работа приостанавливается, снимок не записывается
+        binary = os.path.join(self.tmp.name, 'program.bin')
+        with open(binary, 'wb') as f:
+            f.write(assemble("LOAD_CONST 1 1\n" * (VM.TIME_SLICE + 100)))
+        result = os.path.join(self.tmp.name, 'result.json')
+        checkpoint = os.path.join(self.tmp.name, 'checkpoint.uvms')
+        process = subprocess.run([sys.executable, 'interpreter.py', binary, result, '0:1',
+                                  '--snapshot', self.path, '--snapshot-steps', str(VM.TIME_SLICE + 50),
+                                  '--time-budget', '0', '--checkpoint', checkpoint],
+                                 capture_output=True, text=True)
+        self.assertEqual(process.returncode, 3, process.stderr)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(result))
+        self.assertEqual(load_snapshot(checkpoint).pc, VM.TIME_SLICE * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
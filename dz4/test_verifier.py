@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+
+import vm as vm_module
+from bench_dispatch import make_program
+from decoder import decode_program
+from dispatch import UNCHECKED_HANDLERS, VMError, VMState, run_table
+from test_vm import assemble
+from verifier import VerificationError, verify_program
+from vm import VM
+
+
+class TestVerifier(unittest.TestCase):
+    def test_valid_program(self):
+        verify_program(decode_program(make_program(2000, seed=5)), 1024)
+        verify_program(decode_program(assemble("VPOPCNT 1000 24\nPOPCNT 7 1023\nREAD_MEM 1023 7")), 1024)
+        verify_program(decode_program(b''), 1)
+
+    def test_rejects_invalid_programs(self):
+        cases = [
+            ("LOAD_CONST 0 5\nREAD_MEM 1024 1", "Invalid program at pc=5: Memory read error: Address 1024", 1),
+            ("POPCNT 1 4000", "Invalid program at pc=0: Memory popcnt error: Address 4000", 0),
+            ("LOAD_CONST 0 5\nVPOPCNT 1000 25", "Memory popcnt error: Range 1000:1025 out of bounds.", 1),
+        ]
+        for source, message, ip in cases:
+            with self.subTest(source=source):
+                with self.assertRaises(VerificationError) as cm:
+                    verify_program(decode_program(assemble(source)), 1024)
+                self.assertIn(message, str(cm.exception))
+                self.assertEqual(cm.exception.ip, ip)
+
+        with self.assertRaises(VerificationError) as cm:
+            verify_program(decode_program(assemble("LOAD_CONST 0 5") + bytes([99])), 1024)
+        self.assertEqual(str(cm.exception), "Unknown opcode at pc=5: 99")
+        self.assertEqual(cm.exception.pc, 5)
+
+    def test_unchecked_handlers_match(self):
+        program = decode_program(make_program(3000, seed=9))
+        checked = VMState([0] * 1024)
+        unchecked = VMState([0] * 1024)
+        run_table(program, checked)
+        run_table(program, unchecked, handlers=UNCHECKED_HANDLERS)
+        self.assertEqual(checked.registers, unchecked.registers)
+        self.assertEqual(checked.memory, unchecked.memory)
+
+    def test_vm_rejects_before_execution(self):
+        vm = VM(memory_size=16, verify=True)
+        vm.load(assemble("LOAD_CONST 0 5\nLOAD_CONST 1 3\nWRITE_MEM 0 1\nREAD_MEM 16 2"))
+        with self.assertRaises(VerificationError):
+            vm.run()
+        # Ни одна команда не выполнена
+        self.assertEqual(vm.ip, 0)
+        self.assertEqual(vm.registers, [0] * 8)
+        self.assertEqual(vm.memory[3], 0)
+
+    def test_write_mem_keeps_dynamic_check(self):
+        vm = VM(memory_size=16, verify=True)
+        vm.load(assemble("LOAD_CONST 1 16\nWRITE_MEM 0 1"))
+        with self.assertRaises(VMError) as cm:
+            vm.run()
+        self.assertNotIsInstance(cm.exception, VerificationError)
+        self.assertIn("Memory write error: Address 16", str(cm.exception))
+        self.assertEqual(vm.ip, 1)
+
+    def test_verified_once(self):
+        vm = VM(memory_size=64, verify=True)
+        vm.load(assemble("LOAD_CONST 0 5\nREAD_MEM 10 1\nPOPCNT 2 10"))
+        with patch.object(vm_module, 'verify_program', wraps=verify_program) as verify:
+            vm.run(max_steps=1)
+            vm.run()
+            vm.state.ip = 0
+            vm.run()
+        self.assertEqual(verify.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
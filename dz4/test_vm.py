@@ -0,0 +1,106 @@
+import unittest
+from array import array
+
+from assembler import assemble_instruction
+from memory_backend import create_memory
+from vm import VM, VMError
+
+
+def assemble(source):
+    # Ассемблирует исходный текст внутри процесса, без запуска assembler.py
+    code = b''
+    for line in source.splitlines():
+        binary, _ = assemble_instruction(line)
+        if binary:
+            code += binary
+    return code
+
+
+class TestVM(unittest.TestCase):
+    SOURCE = """
+    LOAD_CONST 0 25
+    LOAD_CONST 1 10
+    WRITE_MEM 0 1
+    READ_MEM 10 2
+    POPCNT 2 3
+    """
+
+    def test_run_in_process(self):
+        # Та же программа, что и в test_full_system.py, но без subprocess
+        vm = VM()
+        vm.load(assemble(self.SOURCE))
+        self.assertEqual(vm.run(), 5)
+        self.assertTrue(vm.halted)
+        expected_memory = [0] * 15
+        expected_memory[10] = 25
+        self.assertEqual(list(vm.memory[0:15]), expected_memory)
+        self.assertEqual(vm.registers[:2], [25, 10])
+
+    def test_max_steps_and_resume(self):
+        vm = VM()
+        vm.load(assemble(self.SOURCE))
+        self.assertEqual(vm.run(max_steps=2), 2)
+        self.assertEqual(vm.ip, 2)
+        self.assertEqual(vm.pc, 10)
+        self.assertFalse(vm.halted)
+        self.assertEqual(vm.memory[10], 0)
+        self.assertEqual(vm.run(), 3)
+        self.assertEqual(vm.memory[10], 25)
+
+    def test_time_budget(self):
+        # Нулевой бюджет: выполняется одна порция команд, затем исполнение продолжается
+        for engine in VM.ENGINES:
+            with self.subTest(engine=engine):
+                vm = VM(engine=engine)
+                vm.TIME_SLICE = 2
+                vm.load(assemble(self.SOURCE))
+                self.assertEqual(vm.run(time_budget=0), 2)
+                self.assertEqual(vm.run(max_steps=1, time_budget=0), 1)
+                self.assertEqual(vm.run(time_budget=60), 2)
+                self.assertTrue(vm.halted)
+                self.assertEqual(vm.memory[10], 25)
+
+    def test_reset_reuses_state(self):
+        vm = VM()
+        code = assemble(self.SOURCE)
+        memory = vm.memory
+        for _ in range(100):
+            vm.reset()
+            vm.load(code)
+            vm.run()
+        # Память не пересоздаётся между запусками
+        self.assertIs(vm.memory, memory)
+        self.assertEqual(vm.memory[10], 25)
+        vm.reset()
+        self.assertEqual(vm.memory[10], 0)
+        self.assertEqual(vm.registers, [0] * 8)
+        self.assertEqual(vm.ip, 0)
+
+    def test_error(self):
+        vm = VM(memory_size=16)
+        vm.load(assemble("LOAD_CONST 1 16\nWRITE_MEM 0 1\n"))
+        with self.assertRaises(VMError) as cm:
+            vm.run()
+        self.assertIn("Memory write error: Address 16", str(cm.exception))
+        self.assertEqual(vm.pc, 5)
+
+
+    def test_vpopcnt_range(self):
+        # Одна команда VPOPCNT заменяет popcnt для каждой ячейки диапазона
+        for memory in (None, create_memory(4096, use_mmap=True)):
+            vm = VM(memory=memory)
+            vm.memory[100:108] = array('I', [3, 7, 15, 31, 63, 127, 255, 0xFFFFFFFF])
+            vm.memory[108] = 7
+            vm.load(assemble("VPOPCNT 100 8\n"))
+            self.assertEqual(vm.run(), 1)
+            self.assertEqual(list(vm.memory[100:109]), [2, 3, 4, 5, 6, 7, 8, 32, 7])
+
+    def test_vpopcnt_out_of_bounds(self):
+        vm = VM(memory_size=16)
+        vm.load(assemble("VPOPCNT 10 7\n"))
+        with self.assertRaises(VMError) as cm:
+            vm.run()
+        self.assertIn("Memory popcnt error: Range 10:17 out of bounds.", str(cm.exception))
+
+if __name__ == '__main__':
+    unittest.main()
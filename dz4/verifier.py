@@ -0,0 +1,67 @@
+from decoder import RECORD_SIZE  # Размер записи декодированной команды
+from dispatch import VMError  # Ошибка исполнения программы УВМ
+from isa import OPCODES  # Общая спецификация системы команд УВМ
+
+_LOAD_CONST = OPCODES['LOAD_CONST']
+_READ_MEM = OPCODES['READ_MEM']
+_WRITE_MEM = OPCODES['WRITE_MEM']
+_POPCNT = OPCODES['POPCNT']
+_VPOPCNT = OPCODES['VPOPCNT']
+
+
+class VerificationError(VMError):
+    """
+    Программа отклонена при загрузке, до исполнения первой команды.
+
+    Атрибуты:
+        ip (int): Номер некорректной команды.
+        pc (int): Смещение некорректной команды в бинарном коде.
+    """
+
+    def __init__(self, message, ip, pc):
+        super().__init__(message)
+        self.ip = ip
+        self.pc = pc
+
+
+def verify_program(program, memory_size):
+    """
+    Проверяет программу один раз при загрузке.
+
+    Проверяются все непосредственные адреса (READ_MEM, POPCNT, VPOPCNT) и отсутствие
+    неизвестных команд; индексы регистров занимают 3 бита и всегда корректны. Программа, прошедшая проверку, может исполняться через
+    dispatch.UNCHECKED_HANDLERS: во время исполнения проверяется только адрес WRITE_MEM,
+    который берётся из регистра.
+
+    Параметры:
+        program (DecodedProgram): Декодированная программа.
+        memory_size (int): Размер памяти УВМ в ячейках.
+
+    Исключения:
+        VerificationError: Для первой некорректной команды; сообщение совпадает
+                           с сообщением ошибки, которую выдало бы исполнение.
+    """
+    records = program.records
+    pc = 0
+    for index in range(0, len(records), RECORD_SIZE):
+        opcode = records[index]
+        B = records[index + 1]
+        C = records[index + 2]
+
+        if opcode == _LOAD_CONST or opcode == _WRITE_MEM:
+            # Адрес WRITE_MEM берётся из регистра и проверяется при исполнении
+            error = None
+        elif opcode == _READ_MEM:
+            error = f"Memory read error: Address {B} out of bounds." if B >= memory_size else None
+        elif opcode == _POPCNT:
+            error = f"Memory popcnt error: Address {C} out of bounds." if C >= memory_size else None
+        elif opcode == _VPOPCNT:
+            error = f"Memory popcnt error: Range {B}:{B + C} out of bounds." if B + C > memory_size else None
+        else:
+            # Декодер записывает для неизвестной команды её opcode в поле B и pc в поле C
+            raise VerificationError(f"Unknown opcode at pc={C}: {B}", index // RECORD_SIZE, C)
+
+        if error is not None:
+            raise VerificationError(f"Invalid program at pc={pc}: {error}", index // RECORD_SIZE, pc)
+
+        pc += records[index + 3]
@@ -0,0 +1,196 @@
+import time  # Ограничение времени исполнения
+
+from block_compiler import compile_program, run_compiled  # Компиляция программы в функции Python
+from decoder import decode_program, load_program  # Декодирование программы и кэш
+from dispatch import HANDLERS, UNCHECKED_HANDLERS, VMError, VMState, run_table  # Табличное исполнение команд
+from memory_backend import clear_memory, create_memory  # Типизированная память УВМ
+from profiler import Profile, run_profiled  # Инструментированный вариант цикла исполнения
+from snapshot import load_snapshot, save_snapshot  # Снимки состояния УВМ
+from verifier import verify_program  # Проверка программы при загрузке
+
+__all__ = ['VM', 'VMError']
+
+
+class VM:
+    """
+    Учебная виртуальная машина (УВМ) для исполнения программ внутри процесса.
+
+    Один экземпляр можно многократно использовать для тысяч коротких программ:
+    память и регистры выделяются один раз, а reset() лишь обнуляет их.
+
+    Пример:
+        vm = VM()
+        vm.load(code)
+        vm.run()
+        print(vm.memory[0:8])
+    """
+
+    ENGINES = ('table', 'compiled')
+
+    # Количество команд между проверками времени при исполнении с ограничением по времени
+    TIME_SLICE = 1 << 16
+
+    def __init__(self, memory_size=1024, cache_dir=None, memory=None, engine='table', verify=False):
+        """
+        Параметры:
+            memory_size (int): Размер памяти УВМ в ячейках.
+            cache_dir (str): Каталог дискового кэша декодированных и скомпилированных программ.
+            memory: Готовая память УВМ (например, create_memory(..., use_mmap=True));
+                    если указана, memory_size не используется.
+            engine (str): 'table' — цикл с таблицей обработчиков, 'compiled' — программа
+                          компилируется в функции Python (block_compiler).
+            verify (bool): Проверять программу перед исполнением (verifier.verify_program):
+                           некорректная программа отклоняется до первой команды, а корректная
+                           исполняется без проверок непосредственных адресов.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.cache_dir = cache_dir
+        self.engine = engine
+        self.compiled = None
+        self.verify = verify
+        # Размер памяти, для которого текущая программа прошла проверку (None — не проверялась)
+        self.verified_size = None
+        if memory is None:
+            memory = create_memory(memory_size)
+        self.state = VMState(memory)
+        self.program = decode_program(b'')
+
+        # Профилирование (profiler.Profile) и файл трассы; при None используется обычный цикл
+        self.profile = None
+        self.trace = None
+
+    @property
+    def registers(self):
+        """list[int]: Регистры УВМ (изменяемые напрямую)."""
+        return self.state.registers
+
+    @property
+    def memory(self):
+        """Память УВМ (изменяемая напрямую)."""
+        return self.state.memory
+
+    @property
+    def ip(self):
+        """int: Номер следующей исполняемой команды."""
+        return self.state.ip
+
+    @property
+    def pc(self):
+        """int: Смещение следующей исполняемой команды в бинарном коде."""
+        return self.program.pc_at(self.state.ip)
+
+    @property
+    def halted(self):
+        """bool: True, если все команды программы выполнены."""
+        return self.state.ip >= len(self.program)
+
+    def load(self, code):
+        """
+        Загружает бинарный код программы и устанавливает исполнение на первую команду.
+
+        Регистры и память не обнуляются, чтобы программа могла работать
+        с подготовленным заранее состоянием; для очистки используйте reset().
+
+        Параметры:
+            code (bytes): Бинарный код программы УВМ (любой bytes-подобный объект).
+        """
+        self.program = load_program(code, cache_dir=self.cache_dir)
+        self.compiled = None
+        self.verified_size = None
+        self.state.ip = 0
+
+    def run(self, max_steps=None, time_budget=None):
+        """
+        Исполняет загруженную программу с текущей команды.
+
+        При ограничении по времени программа исполняется порциями по TIME_SLICE команд,
+        и время проверяется между порциями, поэтому бюджет может быть превышен на время
+        исполнения одной порции. Остановленное исполнение продолжается следующим вызовом run()
+        или после restore() из снимка.
+
+        Параметры:
+            max_steps (int): Максимальное количество команд (None — до конца программы).
+            time_budget (float): Максимальное время исполнения в секундах (None — без ограничения).
+
+        Возвращает:
+            int: Количество выполненных команд.
+
+        Исключения:
+            VMError: При ошибке исполнения; состояние остаётся на команде с ошибкой.
+            VerificationError: Если включена проверка и программа некорректна
+                               (ни одна команда не исполняется).
+        """
+        if time_budget is None:
+            return self._run(max_steps)
+
+        deadline = time.monotonic() + time_budget
+        executed = 0
+        while not self.halted:
+            steps = self.TIME_SLICE if max_steps is None else min(self.TIME_SLICE, max_steps - executed)
+            if steps <= 0:
+                break
+            executed += self._run(steps)
+            if time.monotonic() >= deadline:
+                break
+        return executed
+
+    def _run(self, max_steps):
+        # Проверка выполняется один раз для программы и размера памяти
+        handlers = HANDLERS
+        if self.verify:
+            memory_size = len(self.state.memory)
+            if self.verified_size != memory_size:
+                verify_program(self.program, memory_size)
+                self.verified_size = memory_size
+            handlers = UNCHECKED_HANDLERS
+
+        # Вариант цикла выбирается один раз на запуск, а не на каждой команде
+        if self.profile is None and self.trace is None:
+            if self.engine == 'compiled':
+                if self.compiled is None:
+                    self.compiled = compile_program(self.program, cache_dir=self.cache_dir)
+                return run_compiled(self.compiled, self.program, self.state, max_steps)
+            return run_table(self.program, self.state, max_steps, handlers)
+        if self.profile is None:
+            self.profile = Profile()
+        return run_profiled(self.program, self.state, self.profile, max_steps, self.trace, handlers)
+
+    def snapshot(self, path):
+        """
+        Сохраняет регистры, память и pc в файл снимка.
+
+        Параметры:
+            path (str): Путь к файлу снимка.
+        """
+        save_snapshot(path, self.state, self.program)
+
+    def restore(self, path, use_mmap=False):
+        """
+        Восстанавливает регистры, память и pc из файла снимка.
+
+        Программа должна быть загружена заранее: исполнение продолжится с команды,
+        начинающейся со смещения pc из снимка. Это может быть и другая программа
+        с тем же началом (общий префикс подготовки данных).
+
+        Параметры:
+            path (str): Путь к файлу снимка.
+            use_mmap (bool): Отобразить память из файла снимка вместо чтения в массив.
+
+        Исключения:
+            ValueError: Если файл не является снимком или pc не совпадает с началом команды.
+        """
+        snapshot = load_snapshot(path, use_mmap=use_mmap)
+        ip = self.program.ip_at(snapshot.pc)
+        state = self.state
+        state.registers[:] = snapshot.registers
+        state.memory = snapshot.memory
+        state.ip = ip
+        self.verified_size = None
+
+    def reset(self):
+        """Обнуляет регистры и память и возвращает исполнение к первой команде."""
+        state = self.state
+        state.registers[:] = [0] * len(state.registers)
+        clear_memory(state.memory)
+        state.ip = 0